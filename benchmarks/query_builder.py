@@ -0,0 +1,54 @@
+"""
+Measure how long building a query document takes for narrow and very wide selections.
+
+Warm runs reuse the same selection, so memoized field texts are used.
+Cold runs build a new selection with unseen field names for every document.
+
+    PYTHONPATH=. python benchmarks/query_builder.py --fields 1000 --number 200
+"""
+import timeit
+from argparse import ArgumentParser
+from typing import Tuple
+
+from graphy.builder import GraphQLBuilder, SelectedField, fields
+
+
+def make_selection(width: int, depth: int = 2, prefix: str = "field") -> Tuple[SelectedField]:
+    """
+    Create a selection with width scalar fields and width // 10 nested objects on every level.
+    """
+    scalars = [f"{prefix}{i}" for i in range(width)]
+    if depth <= 1:
+        return fields(*scalars)
+    nested = {f"{prefix}Object{i}": make_selection(width // 10 or 1, depth - 1, prefix) for i in range(width // 10)}
+    return fields(*scalars, **nested)
+
+
+def build(selection: Tuple[SelectedField]) -> str:
+    builder = GraphQLBuilder()
+    builder = builder.operation("query", name="items", params={"$first": "Int", "$after": "String"})
+    builder = builder.query("items", params={"first": "$first", "after": "$after"})
+    return builder.fields(selection).generate()
+
+
+def main():
+    parser = ArgumentParser(description="Query document builder benchmark")
+    parser.add_argument("--fields", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, width in (("narrow", 3), ("wide", args.fields)):
+        selection = make_selection(width)
+        document = build(selection)
+        warm = timeit.timeit(lambda: build(selection), number=args.number) / args.number
+        counter = iter(range(args.number * 2))
+        cold = timeit.timeit(
+            lambda: build(make_selection(width, prefix=f"f{next(counter)}_")), number=args.number
+        ) / args.number
+        print(f"{label}: {len(document)} characters")
+        print(f"  warm: {warm * 1e6:.1f} us per document")
+        print(f"  cold: {cold * 1e6:.1f} us per document (including the selection)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Measure the memory used by the parsed schema object model.
+
+A synthetic introspection result is decoded and every type is parsed.
+The memory retained by the parsed types is measured with tracemalloc after the raw result has been released.
+As a baseline the same result is parsed into the previous object model, plain classes with an instance dict
+and lists, which also kept the raw types around for lazy parsing.
+
+    PYTHONPATH=. python benchmarks/schema_memory.py --types 2000 --fields 20
+"""
+import gc
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Dict, List
+
+from graphy.loaders import iter_schema
+from graphy.schema import Schema
+from graphy.settings import Settings
+
+
+def type_ref(kind: str, name: str = None, of_type: Dict = None) -> Dict:
+    return {"kind": kind, "name": name, "ofType": of_type}
+
+
+def make_introspection(type_count: int, field_count: int) -> Dict:
+    types = []
+    for t in range(type_count):
+        fields = []
+        for f in range(field_count):
+            if f % 3 == 0:
+                field_type = type_ref("NON_NULL", of_type=type_ref("SCALAR", "String"))
+            elif f % 3 == 1:
+                field_type = type_ref("OBJECT", f"Type{(t + f) % type_count}")
+            else:
+                field_type = type_ref(
+                    "NON_NULL",
+                    of_type=type_ref("LIST", of_type=type_ref("NON_NULL", of_type=type_ref("OBJECT", "Type0")))
+                )
+            fields.append({
+                "name": f"field{f}",
+                "description": f"The field number {f} of type number {t}.",
+                "args": [{
+                    "name": "first",
+                    "description": "Limits the amount of results.",
+                    "type": type_ref("SCALAR", "Int"),
+                    "defaultValue": None
+                }] if f % 3 == 2 else [],
+                "type": field_type,
+                "isDeprecated": False,
+                "deprecationReason": None
+            })
+        types.append({
+            "kind": "OBJECT",
+            "name": f"Type{t}",
+            "description": f"The type number {t}.",
+            "fields": fields,
+            "inputFields": None,
+            "interfaces": [],
+            "enumValues": None,
+            "possibleTypes": None
+        })
+    return {"queryType": {"name": "Type0"}, "types": types, "directives": []}
+
+
+class BaselineTypeDefer:
+    def __init__(self, raw_defer: Dict):
+        self.kind = raw_defer.get("kind")
+        self.name = raw_defer.get("name")
+        self.of_type = BaselineTypeDefer(raw_defer["ofType"]) if raw_defer.get("ofType") is not None else None
+
+
+class BaselineArgument:
+    def __init__(self, raw_arg: Dict):
+        self.name = raw_arg.get("name")
+        self.description = raw_arg.get("description")
+        self.type = BaselineTypeDefer(raw_arg["type"]) if raw_arg.get("type") is not None else None
+        self.default_value = raw_arg.get("defaultValue")
+
+
+class BaselineField:
+    def __init__(self, raw_field: Dict):
+        self.name = raw_field.get("name")
+        self.description = raw_field.get("description")
+        self.args = {a["name"]: BaselineArgument(a) for a in raw_field.get("args") or [] if a}
+        self.type = BaselineTypeDefer(raw_field["type"]) if raw_field.get("type") is not None else None
+        self.is_deprecated = raw_field.get("isDeprecated")
+        self.deprecation_reason = raw_field.get("deprecationReason")
+
+
+class BaselineType:
+    def __init__(self, raw_type: Dict):
+        self.kind = raw_type.get("kind")
+        self.name = raw_type.get("name")
+        self.description = raw_type.get("description")
+        self.fields: List[BaselineField] = [BaselineField(f) for f in raw_type.get("fields") or [] if f]
+        self.input_fields = [BaselineField(i) for i in raw_type.get("inputFields") or [] if i]
+        self.interfaces = [BaselineTypeDefer(i) for i in raw_type.get("interfaces") or [] if i]
+        self.enum_values = [BaselineField(e) for e in raw_type.get("enumValues") or [] if e]
+        self.possible_types = raw_type.get("possibleTypes")
+
+
+def measure_baseline(content: str) -> int:
+    """
+    Decode the raw schema, parse every type into the previous object model and return the memory retained
+    by the parsed objects and the raw types they were parsed from in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    raw_schema = json.loads(content)
+    raw_types = {t["name"]: t for t in raw_schema["types"] if t}
+    parsed = {name: BaselineType(raw_type) for name, raw_type in raw_types.items()}
+    del raw_schema
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed, raw_types
+    return used
+
+
+def measure(content: str, settings: Settings) -> int:
+    """
+    Decode the raw schema, parse every type and return the memory retained by the parsed objects in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    raw_schema = json.loads(content)
+    schema_types = Schema.parse_types(raw_schema["types"], settings.keep_descriptions)
+    parsed = [schema_types[name] for name in schema_types]
+    del raw_schema, schema_types
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return used
+
+
+def measure_peak(content: str, stream: bool) -> int:
+    """
+    Parse every type of the raw schema either from the decoded document or while streaming it
+    and return the peak memory in bytes. The document text itself is not included.
+    """
+    gc.collect()
+    tracemalloc.start()
+    if stream:
+        chunks = (content[i:i + 65536] for i in range(0, len(content), 65536))
+        events = iter_schema(chunks)
+        _, schema_types, _ = Schema.parse_schema_stream(events, keep_descriptions=False)
+    else:
+        raw_schema = json.loads(content)
+        schema_types = Schema.parse_types(raw_schema["data"]["__schema"]["types"], keep_descriptions=False)
+        _ = [schema_types[name] for name in schema_types]
+        del raw_schema
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del schema_types
+    return peak
+
+
+def main():
+    parser = ArgumentParser(description="Schema object model memory benchmark")
+    parser.add_argument("--types", type=int, default=2000)
+    parser.add_argument("--fields", type=int, default=20)
+    args = parser.parse_args()
+
+    content = json.dumps(make_introspection(args.types, args.fields))
+    print(f"{args.types} types x {args.fields} fields")
+    print(f"  previous model: {measure_baseline(content) / 1024 / 1024:.2f} MiB")
+    for label, settings in (
+            ("with descriptions", Settings()),
+            ("without descriptions", Settings(keep_descriptions=False))
+    ):
+        used = measure(content, settings)
+        print(f"  {label}: {used / 1024 / 1024:.2f} MiB")
+
+    # the streamed document is wrapped the way a server would respond
+    content = json.dumps({"data": {"__schema": make_introspection(args.types, args.fields)}})
+    print("peak while parsing without descriptions")
+    for label, stream in (("decoded", False), ("streamed", True)):
+        peak = measure_peak(content, stream)
+        print(f"  {label}: {peak / 1024 / 1024:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+from .batch import BatchLoader
 from .builder import fields
+from .cache import HTTPCache, ResponseCache, SchemaCache
 from .client import Client
+from .entities import EntityCache
+from .exceptions import GraphQLError
+from .persisted import PersistedQueries
 from .proxy import QueryServiceProxy, MutationServiceProxy
+from .registry import SchemaRegistry
 from .schema import Schema
 from .settings import Settings
-from .transport import Transporter, PromiseTransporter, AsyncTransporter
+from .transport import Transporter, PromiseTransporter, AsyncTransporter, AsyncHTTPTransporter
 
 __version__ = "0.3.0"
@@ -0,0 +1,290 @@
+import asyncio
+import copy
+import inspect
+import itertools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Tuple
+
+from graphy import helpers
+from graphy.builder import SelectedField
+from graphy.concurrency import BatchQueue, fail, gather_futures
+from graphy.utils import canonical_json
+
+
+class BatchLoader:
+    """
+    A batch loader collects the calls of one operation that are made within a short time window
+    and sends them as a single document with an aliased field for every call.
+    The response is split up again, so every caller gets its own result or GraphQLError.
+
+    A batch is sent once the window has passed or once it holds max_batch_size calls.
+    Calls with identical variables in the same batch share one aliased field.
+
+    loader = client.query.user.loader(select=fields("id", "name"), window=0.005)
+    users = [loader.load({"id": i}) for i in ids]  # threads, promises or coroutines depending on the transporter
+    """
+
+    def __init__(self, proxy, select: Tuple[SelectedField] = None, window: float = 0.005, max_batch_size: int = 50):
+        """
+        Instantiate a new BatchLoader.
+
+        :param proxy: holds the operation proxy of the operation to load
+        :param select: holds the selection of every call
+        :param window: holds the time in seconds calls are collected for after the first call of a batch
+        :param max_batch_size: holds the maximum amount of calls that are sent together
+        """
+        self.proxy = proxy
+        self.select = select
+        self.queue = BatchQueue(
+            self._send,
+            window,
+            max_batch_size,
+            asyncio.iscoroutinefunction(proxy.client.transporter.post)
+        )
+
+    @property
+    def loads(self) -> int:
+        """
+        :return: the amount of calls
+        """
+        return self.queue.items
+
+    @property
+    def batches(self) -> int:
+        """
+        :return: the amount of sent batches
+        """
+        return self.queue.batches
+
+    @property
+    def average_batch_size(self) -> float:
+        """
+        :return: the average amount of calls per sent batch. 0.0 if no batch was sent yet.
+        """
+        return self.queue.average_batch_size
+
+    def load(self, variables: Dict):
+        """
+        Add a call to the current batch.
+
+        :param variables: holds the variables of the call
+        :return: the result of the call in the form of the transporter.
+        Blocking transporters wait for the batch to be sent.
+        :raises: ValueError if the operation does not support a variable
+        """
+        return self.proxy.client.transporter.from_future(self._add(variables))
+
+    def load_many(self, variables: Iterable[Dict]) -> List:
+        """
+        Add many calls at once.
+
+        :param variables: holds the variables of every call
+        :return: the list of results in the form of the transporter. Calls that failed hold their exception instead.
+        Blocking transporters return the list once all batches were sent.
+        :raises: ValueError if the operation does not support a variable
+        """
+        futures = [self._add(call_variables) for call_variables in variables]
+        return self.proxy.client.transporter.from_future(gather_futures(futures))
+
+    def flush(self):
+        """ Send the current batch now instead of waiting for the window to pass. """
+        self.queue.flush()
+
+    def _add(self, variables: Dict) -> Future:
+        """
+        :param variables: holds the variables of the call
+        :return: the future of the call
+        """
+        helpers.map_variables_to_types(variables, self.proxy.operation)
+        return self.queue.put(variables, canonical_json(variables))
+
+    def _send(self, batch: List[Dict], futures: List[Future]):
+        """
+        Send the calls of a batch as one document and settle their futures.
+
+        :param batch: holds the variables of the calls
+        :param futures: holds the futures of the calls
+        """
+        client = self.proxy.client
+        transporter = client.transporter
+        settings = copy.copy(client.settings)
+        settings.return_requests_response = True
+        document, variables, aliases = self.proxy.batch_document(self.select, batch)
+
+        def deliver(response):
+            try:
+                results = helpers.split_aliased_response(response.json(), aliases, settings.default_response_key)
+            except Exception as e:
+                fail(futures, e)
+                return
+            for future, (value, error) in zip(futures, results):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(value)
+
+        result = transporter.post(
+            client.endpoint, document, variables, self.proxy.name, settings, self.proxy.operation_type
+        )
+        result = transporter.then(result, deliver, lambda e: fail(futures, e))
+        if inspect.isawaitable(result):
+            asyncio.ensure_future(result)
+
+
+class BulkResult:
+    """ The result of one item of a bulk mutation or of a fan out. """
+
+    __slots__ = ("index", "data", "error")
+
+    def __init__(self, index: int, data: Any = None, error: Exception = None):
+        """
+        Instantiate a new BulkResult.
+
+        :param index: holds the position of the item in the input
+        :param data: holds the data the server returned for the item
+        :param error: holds the exception if the item failed, a GraphQLError if the server rejected it
+        """
+        self.index = index
+        self.data = data
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """
+        :return: True if the item did not fail
+        """
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return f"<BulkResult({self.index}, {'ok' if self.ok else repr(self.error)})>"
+
+
+class BulkMutation:
+    """
+    A bulk mutation calls one mutation for every item of an iterable.
+    The items are packed into chunks, every chunk is sent as one document with an aliased field per item,
+    and a limited amount of chunks is sent at the same time.
+
+    Results are streamed in the order of the input while the input is read lazily, so only the chunks
+    that are in flight are held in memory. A failed chunk or item does not stop the others.
+    """
+
+    def __init__(self, proxy, select: Tuple = None, chunk_size: int = 50, concurrency: int = 4):
+        """
+        Instantiate a new BulkMutation.
+
+        :param proxy: holds the operation proxy of the mutation
+        :param select: holds the selection of every item
+        :param chunk_size: holds the amount of items per document
+        :param concurrency: holds the maximum amount of documents that are sent at the same time
+        """
+        if chunk_size < 1 or concurrency < 1:
+            raise ValueError("chunk_size and concurrency have to be at least 1")
+        self.proxy = proxy
+        self.select = select
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    def chunks(self, data: Iterable[Dict]) -> Iterator[List[Tuple[int, Dict]]]:
+        """
+        :param data: holds the variables of every item
+        :return: an iterator over the chunks of indexed items
+        """
+        items = enumerate(data)
+        while True:
+            chunk = list(itertools.islice(items, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def run(self, data: Iterable[Dict]) -> Iterator[BulkResult]:
+        """
+        Send the items from worker threads. Used for transporters with a blocking or Promise based post().
+
+        :param data: holds the variables of every item
+        :return: an iterator over the results in input order
+        """
+        pending: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="graphy-bulk") as executor:
+            for chunk in self.chunks(data):
+                pending.append(executor.submit(self.send, chunk))
+                if len(pending) >= self.concurrency:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    async def run_async(self, data: Iterable[Dict]) -> AsyncIterator[BulkResult]:
+        """
+        Send the items as tasks of the running event loop. Used for transporters with an async post().
+
+        :param data: holds the variables of every item
+        :return: an async iterator over the results in input order
+        """
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            for chunk in self.chunks(data):
+                pending.append(asyncio.ensure_future(self.send_async(chunk)))
+                if len(pending) >= self.concurrency:
+                    for result in await pending.popleft():
+                        yield result
+            while pending:
+                for result in await pending.popleft():
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def send(self, chunk: List[Tuple[int, Dict]]) -> List[BulkResult]:
+        """
+        :param chunk: holds the indexed items of a chunk
+        :return: the results of the items
+        """
+        try:
+            aliases, result = self.post(chunk)
+            return self.split(chunk, aliases, self.proxy.client.transporter.wait(result))
+        except Exception as e:
+            return [BulkResult(index, error=e) for index, _ in chunk]
+
+    async def send_async(self, chunk: List[Tuple[int, Dict]]) -> List[BulkResult]:
+        """
+        :param chunk: holds the indexed items of a chunk
+        :return: the results of the items
+        """
+        try:
+            aliases, result = self.post(chunk)
+            return self.split(chunk, aliases, await result)
+        except Exception as e:
+            return [BulkResult(index, error=e) for index, _ in chunk]
+
+    def post(self, chunk: List[Tuple[int, Dict]]) -> Tuple[List[str], Any]:
+        """
+        :param chunk: holds the indexed items of a chunk
+        :return: the aliases of the items and the result of the transporter
+        """
+        client = self.proxy.client
+        settings = copy.copy(client.settings)
+        settings.return_requests_response = True
+        document, variables, aliases = self.proxy.batch_document(self.select, [item for _, item in chunk])
+        result = client.transporter.post(
+            client.endpoint, document, variables, self.proxy.name, settings, self.proxy.operation_type
+        )
+        return aliases, result
+
+    def split(self, chunk: List[Tuple[int, Dict]], aliases: List[str], response) -> List[BulkResult]:
+        """
+        :param chunk: holds the indexed items of a chunk
+        :param aliases: holds the aliases of the items
+        :param response: holds the response of the chunk
+        :return: the results of the items. Successful ones update the entity cache of the client.
+        """
+        settings = self.proxy.client.settings
+        results = helpers.split_aliased_response(response.json(), aliases, settings.default_response_key)
+        entities = self.proxy.entity_cache()
+        matcher = helpers.fragment_matcher(self.proxy.client.schema.types)
+        bulk_results = []
+        for (index, item), (data, error) in zip(chunk, results):
+            if error is None and entities is not None and self.select is not None:
+                entities.write(None, item, self.select, data, matcher)
+            bulk_results.append(BulkResult(index, data, error))
+        return bulk_results
@@ -1,4 +1,7 @@
-from typing import Dict, Union, List, Tuple
+import threading
+import weakref
+from collections import Counter
+from typing import Callable, Dict, Iterable, Union, List, Tuple
 
 from graphy import utils
 
@@ -7,39 +10,148 @@ class SelectedField:
     """
     Used for selection response fields in a request query.
     Fields can be selected via arguments and key word arguments by using the fields() method
+
+    Selected fields are immutable and hashable, so selections can be compared cheaply and used as cache keys.
+    Identical fields are only created once and shared, and their rendered text is memoized.
     """
 
-    def __init__(self, name: str, children: List = None):
+    __slots__ = ("name", "children", "_hash", "_text", "__weakref__")
+
+    _instances: "weakref.WeakValueDictionary[Tuple, SelectedField]" = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __new__(cls, name: str, children: Iterable = None):
         """
-        Instantiate a new SelectedField.
+        Return the SelectedField with this name and children. It is created if there is none yet.
 
         :param name: holds the name of the selected field
-        :param children: holds a list of optional children
+        :param children: holds optional children
         """
-        self.name: str = name
-        self.children: List = children
+        children = tuple(c if isinstance(c, SelectedField) else SelectedField(str(c)) for c in children or () if c)
+        key = (name, children or None)
+        with cls._lock:
+            field = cls._instances.get(key)
+            if field is None:
+                field = object.__new__(cls)
+                object.__setattr__(field, "name", name)
+                object.__setattr__(field, "children", key[1])
+                object.__setattr__(field, "_hash", hash(key))
+                object.__setattr__(field, "_text", None)
+                cls._instances[key] = field
+        return field
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SelectedField is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("SelectedField is immutable")
+
+    def __reduce__(self):
+        return SelectedField, (self.name, self.children)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, SelectedField):
+            return NotImplemented
+        return self._hash == other._hash and self.name == other.name and self.children == other.children
+
+    def __repr__(self) -> str:
+        return f"<SelectedField({self})>"
 
     def __str__(self):
         """
         Return the field selection as used in query language
         :return: string of field selection
         """
-        result = self.name
-        if self.children:
-            result += " { " + " ".join([str(c) for c in self.children]) + " } "
+        result = self._text
+        if result is None:
+            result = self.name
+            if self.children:
+                result = f"{result} {{ {' '.join([str(c) for c in self.children])} }}"
+            object.__setattr__(self, "_text", result)
         return result
 
 
+def selection_key(selection: Union[Tuple[SelectedField], List[SelectedField], None]) -> Union[Tuple, None]:
+    """
+    Return a hashable key describing the shape of a selection.
+
+    :param selection: holds a selection of fields
+    :return: a tuple of the selected fields or None if there is no selection
+    """
+    if selection is None:
+        return None
+    return tuple(f for f in selection if f)
+
+
+class DocumentWriter:
+    """
+    Writes a graphql document token by token into a single buffer.
+    Tokens are separated by exactly one space, so the document never has to be cleaned up afterwards.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        """ Instantiate a new DocumentWriter """
+        self._parts: List[str] = []
+
+    def token(self, text: str):
+        """
+        Write a token.
+
+        :param text: holds the token
+        """
+        if text:
+            self._parts.append(text)
+
+    def arguments(self, params: Dict[str, Union[str, int]]):
+        """
+        Write an argument or variable list like (id: $id, first: 10).
+
+        :param params: holds the arguments
+        """
+        if params:
+            self._parts.append("(" + ", ".join([f"{key}: {value}" for key, value in params.items()]) + ")")
+
+    def selection(self, selection: Tuple[SelectedField]):
+        """
+        Write a selection set. The memoized texts of the selected fields are used.
+
+        :param selection: holds the selected fields
+        """
+        if selection:
+            parts = self._parts
+            parts.append("{")
+            parts.extend([str(f) for f in selection if f])
+            parts.append("}")
+
+    def getvalue(self) -> str:
+        """
+        :return: the written document
+        """
+        return " ".join(self._parts)
+
+
 class GraphQLBuilder:
     """ The graph query language builder is used for building the actual queries in the end. """
 
     def __init__(self):
         """ Instantiate a new GraphQLBuilder """
-        self.object: str = ""
-        self.return_field: str = ""
-        self.query_field: str = ""
-        self.operation_field: str = ""
+        self.selection: Tuple[SelectedField] = ()
+        self.query_name: str = ""
+        self.query_alias: str = ""
+        self.query_params: Dict[str, Union[str, int]] = {}
+        self.operation_type: str = ""
+        self.operation_name: str = ""
+        self.operation_params: Dict[str, Union[str, int]] = {}
+        self.queries: List[str] = []
         self.fragment_field: str = ""
+        self.fragments: List[GraphQLBuilder] = []
 
     def fields(self, selection: Tuple[SelectedField]):
         """
@@ -48,11 +160,7 @@ class GraphQLBuilder:
         :param selection: holds a tuple of all selected fields
         :return: itself
         """
-        if selection is None or len(selection) == 0:
-            self.return_field = ""
-            return self
-
-        self.return_field = "{ " + " ".join([str(s) for s in selection if s]) + " }"
+        self.selection = selection or ()
         return self
 
     def query(self, name: str, alias: str = '', params: Dict[str, Union[str, int]] = None):
@@ -64,17 +172,9 @@ class GraphQLBuilder:
         :param params: holds optional params that can be passed byo
         :return: itself
         """
-        if params is None:
-            params = {}
-        self.query_field = name
-        inputs: List[str] = []
-        if params != {}:
-            for key, value in params.items():
-                inputs.append(f'{key}: {value}')
-            self.query_field = self.query_field + ' (' + ", ".join(inputs) + ') '
-        if alias != '':
-            self.query_field = f'{alias}: {self.query_field}'
-
+        self.query_name = name
+        self.query_alias = alias
+        self.query_params = params or {}
         return self
 
     def operation(self, query_type: str = 'query', name: str = '',
@@ -85,45 +185,102 @@ class GraphQLBuilder:
 
         :param query_type: holds the operation type (query/mutation)
         :param name: holds the name of the operation
-        :param params: holds optional params
+        :param params: holds optional params. They are only used for named operations.
         :param queries: holds optional queries
         :return: itself
         """
-        if params is None:
-            params = {}
+        self.operation_type = query_type
+        self.operation_name = name
+        self.operation_params = params or {}
+        self.queries = queries or []
+        return self
+
+    def fragment(self, name: str, type_name: str):
+        """
+        Turn the builder into a fragment definition. Its selection is the body of the fragment.
+
+        :param name: holds the name of the fragment
+        :param type_name: holds the type the fragment is defined on
+        :return: itself
+        """
+        self.fragment_field = f"fragment {name} on {type_name}"
+        return self
 
-        if queries is None:
-            queries = []
-        self.operation_field = query_type
-        inputs: List[str] = []
-        if name != '':
-            self.operation_field = f'{self.operation_field} {name}'
-            if params != {}:
-                for key, value in params.items():
-                    inputs.append(f'{key}: {value}')
-                self.operation_field = self.operation_field + ' (' + ", ".join(inputs) + ') '
+    def add_fragment(self, name: str, type_name: str, selection: Tuple[SelectedField]):
+        """
+        Add a fragment definition that is written after the operation.
+        It is used by selecting a field named "...<name>".
 
-        if len(queries) != 0:
-            self.object = self.operation_field + ' { ' + " ".join(queries) + ' }'
+        :param name: holds the name of the fragment
+        :param type_name: holds the type the fragment is defined on
+        :param selection: holds the body of the fragment
+        :return: itself
+        """
+        self.fragments.append(GraphQLBuilder().fragment(name, type_name).fields(selection))
+        return self
+
+    def extract_fragments(self, type_name: str, field_type: Callable[[str, str], Union[str, None]]):
+        """
+        Hoist repeated sub selections of the selection into fragments, see extract_fragments().
 
+        :param type_name: holds the name of the type the selection is made on
+        :param field_type: holds a callable returning the type name of a field by the parent type and field name
+        :return: itself
+        """
+        self.selection, fragments = extract_fragments(self.selection, type_name, field_type)
+        for name, fragment_type, selection in fragments:
+            self.add_fragment(name, fragment_type, selection)
         return self
 
-    def generate(self) -> str:
+    def write(self, writer: DocumentWriter):
         """
-        Generate and return the overall query string
-        :return: query string
+        Write the overall query into a writer
+
+        :param writer: holds the document writer
         """
         if self.fragment_field != '':
-            self.object = f'{self.fragment_field} {self.return_field}'
+            writer.token(self.fragment_field)
+            writer.selection(self.selection)
+        elif self.operation_type != '':
+            writer.token(self.operation_type)
+            if self.operation_name != '':
+                writer.token(self.operation_name)
+                writer.arguments(self.operation_params)
+            writer.token("{")
+            if self.queries:
+                # queries are passed by as text, so they are the only part that needs to be cleaned up
+                writer.token(utils.remove_duplicate_spaces(" ".join(self.queries)))
+            else:
+                self.write_query(writer)
+            writer.token("}")
+        elif self.query_name != '':
+            self.write_query(writer)
         else:
-            if self.object == '' and self.operation_field == '' and self.query_field == '':
-                self.object = self.return_field
-            elif self.object == '' and self.operation_field == '':
-                self.object = self.query_field + ' ' + self.return_field
-            elif self.object == '':
-                self.object = self.operation_field + ' { ' + self.query_field + ' ' + self.return_field + ' }'
+            writer.selection(self.selection)
+
+        for fragment in self.fragments:
+            fragment.write(writer)
 
-        return utils.remove_duplicate_spaces(self.object)
+    def write_query(self, writer: DocumentWriter):
+        """
+        Write the query field and its selection into a writer
+
+        :param writer: holds the document writer
+        """
+        if self.query_alias != '':
+            writer.token(f"{self.query_alias}:")
+        writer.token(self.query_name)
+        writer.arguments(self.query_params)
+        writer.selection(self.selection)
+
+    def generate(self) -> str:
+        """
+        Generate and return the overall query string
+        :return: query string
+        """
+        writer = DocumentWriter()
+        self.write(writer)
+        return writer.getvalue()
 
     def __str__(self) -> str:
         """
@@ -148,10 +305,83 @@ def fields(*args, **kwargs) -> Tuple[SelectedField]:
     for key, value in kwargs.items():
         if value is None:
             continue
-        result.append(
-            SelectedField(
-                key,
-                children=[v if isinstance(v, SelectedField) else SelectedField(str(v)) for v in value if v]
-            )
-        )
+        result.append(SelectedField(key, children=value))
     return tuple(result)
+
+
+def selected_field_name(name: str) -> str:
+    """
+    :param name: holds the name of a selected field, optionally with an alias or arguments
+    :return: the name of the field in the schema
+    """
+    return name.split("(", 1)[0].split(":")[-1].strip()
+
+
+def extract_fragments(
+        selection: Tuple[SelectedField],
+        type_name: str,
+        field_type: Callable[[str, str], Union[str, None]]
+) -> Tuple[Tuple[SelectedField], List[Tuple[str, str, Tuple[SelectedField]]]]:
+    """
+    Hoist sub selections that are repeated on the same type into named fragments.
+
+    Sub selections are compared structurally and only hoisted if the fragment makes the document shorter.
+    Sub selections whose type can not be resolved stay as they are.
+
+    :param selection: holds the selection
+    :param type_name: holds the name of the type the selection is made on
+    :param field_type: holds a callable returning the type name of a field by the parent type and field name
+    :return: the rewritten selection and a list of fragments as tuples of name, type name and selection
+    """
+    def child_type(parent_type: Union[str, None], name: str) -> Union[str, None]:
+        if name.startswith("... on "):
+            return name[len("... on "):].strip()
+        if parent_type is None:
+            return None
+        return field_type(parent_type, selected_field_name(name))
+
+    uses = Counter()
+
+    def count(fields_: Tuple[SelectedField], parent_type: Union[str, None]):
+        for f in fields_:
+            if f and f.children:
+                key = (child_type(parent_type, f.name), f.children)
+                uses[key] += 1
+                if uses[key] == 1:
+                    count(f.children, key[0])  # repeated sub selections are only walked through once
+
+    count(selection, type_name)
+
+    fragments: Dict[Tuple, Tuple[str, str, Tuple[SelectedField]]] = {}
+    names: Counter = Counter()
+
+    def worth(key: Tuple) -> bool:
+        hoisted_type, children = key
+        if hoisted_type is None or uses[key] < 2:
+            return False
+        body = len(" ".join(str(c) for c in children)) + 4  # { ... }
+        name = len(hoisted_type) + 8  # <type>Fields and an optional number
+        spread = name + 7  # { ...<name> }
+        definition = 9 + name + 4 + len(hoisted_type) + 1 + body  # fragment <name> on <type> { ... }
+        return body * uses[key] > spread * uses[key] + definition
+
+    def rewrite(fields_: Tuple[SelectedField], parent_type: Union[str, None]) -> Tuple[SelectedField]:
+        result = []
+        for f in fields_:
+            if not f or not f.children:
+                result.append(f)
+                continue
+            key = (child_type(parent_type, f.name), f.children)
+            if not worth(key):
+                result.append(SelectedField(f.name, children=rewrite(f.children, key[0])))
+                continue
+            fragment = fragments.get(key)
+            if fragment is None:
+                names[key[0]] += 1
+                fragment_name = f"{key[0]}Fields" + (str(names[key[0]]) if names[key[0]] > 1 else "")
+                fragment = fragments[key] = (fragment_name, key[0], rewrite(f.children, key[0]))
+            result.append(SelectedField(f.name, children=(SelectedField(f"...{fragment[0]}"),)))
+        return tuple(result)
+
+    rewritten = rewrite(selection, type_name)
+    return rewritten, list(fragments.values())
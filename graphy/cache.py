@@ -0,0 +1,581 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Iterator, TextIO, Tuple, Union
+
+from requests.structures import CaseInsensitiveDict
+
+from graphy.logger import logger
+from graphy.utils import canonical_json
+
+
+class SchemaCache:
+    """
+    A schema cache stores schema introspection results on disk.
+
+    Every endpoint gets its own entry which consists of the raw introspection result and a small
+    metadata file holding the creation time and a hash of the result.
+    This allows a client to skip the schema introspection on start up and read the schema from a local file instead.
+
+    cache = SchemaCache("/tmp/graphy", ttl=3600)
+    client = Client("https://foo.bar/", schema_cache=cache)
+    """
+
+    def __init__(self, directory: str, ttl: Union[int, float] = None, refresh_if_stale: bool = True):
+        """
+        Instantiate a new SchemaCache.
+
+        :param directory: holds the directory the cache entries are written to. It is created if necessary.
+        :param ttl: holds the time in seconds after which an entry is considered stale. None means never.
+        :param refresh_if_stale: True if stale entries should be refreshed by a new introspection.
+        If False, stale entries are used until they are invalidated explicitly.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.refresh_if_stale = refresh_if_stale
+
+    def key(self, endpoint: str) -> str:
+        """
+        :param endpoint: holds the endpoint url as a string
+        :return: the key under which the entry for this endpoint is stored
+        """
+        return hashlib.sha256(endpoint.encode("UTF-8")).hexdigest()
+
+    def schema_path(self, endpoint: str) -> str:
+        """
+        :param endpoint: holds the endpoint url as a string
+        :return: the path of the file holding the introspection result
+        """
+        return os.path.join(self.directory, f"{self.key(endpoint)}.json")
+
+    def meta_path(self, endpoint: str) -> str:
+        """
+        :param endpoint: holds the endpoint url as a string
+        :return: the path of the file holding the entries metadata
+        """
+        return os.path.join(self.directory, f"{self.key(endpoint)}.meta.json")
+
+    def meta(self, endpoint: str) -> Union[Dict, None]:
+        """
+        Read the metadata of an entry.
+
+        :param endpoint: holds the endpoint url as a string
+        :return: the metadata or None if there is no (readable) entry
+        """
+        try:
+            with open(self.meta_path(endpoint), "r", encoding="UTF-8") as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        if meta.get("endpoint") != endpoint:
+            return None
+        return meta
+
+    def is_stale(self, endpoint: str) -> bool:
+        """
+        :param endpoint: holds the endpoint url as a string
+        :return: True if the entry is older than the ttl or if there is no entry at all
+        """
+        meta = self.meta(endpoint)
+        if meta is None:
+            return True
+        if self.ttl is None:
+            return False
+        return time.time() - meta.get("created", 0) > self.ttl
+
+    def reader(self, endpoint: str, allow_stale: bool = False) -> Union[TextIO, None]:
+        """
+        Open the stored introspection result of an endpoint for reading.
+
+        :param endpoint: holds the endpoint url as a string
+        :param allow_stale: True if a stale entry should be returned regardless of refresh_if_stale
+        :return: an open text file or None if the result has to be requested from the endpoint
+        """
+        if self.meta(endpoint) is None:
+            return None
+        if self.is_stale(endpoint) and self.refresh_if_stale and not allow_stale:
+            logger.debug(f"SCHEMA CACHE - STALE - {endpoint}")
+            return None
+        try:
+            schema_file = open(self.schema_path(endpoint), "r", encoding="UTF-8")
+        except OSError:
+            return None
+        logger.debug(f"SCHEMA CACHE - HIT - {endpoint}")
+        return schema_file
+
+    def load(self, endpoint: str, allow_stale: bool = False) -> Union[Dict, None]:
+        """
+        Load the introspection result for an endpoint.
+
+        :param endpoint: holds the endpoint url as a string
+        :param allow_stale: True if a stale entry should be returned regardless of refresh_if_stale
+        :return: the introspection result or None if it has to be requested from the endpoint
+        """
+        schema_file = self.reader(endpoint, allow_stale)
+        if schema_file is None:
+            return None
+        with schema_file:
+            try:
+                return json.load(schema_file)
+            except ValueError:
+                return None
+
+    def store(self, endpoint: str, introspection: Dict) -> str:
+        """
+        Store the introspection result for an endpoint.
+        Both files are written to a temporary file first and then moved, so readers never see partial entries.
+
+        :param endpoint: holds the endpoint url as a string
+        :param introspection: holds the introspection result
+        :return: the hash of the stored introspection result
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        content = json.dumps(introspection, separators=(",", ":"))
+        schema_hash = hashlib.sha256(content.encode("UTF-8")).hexdigest()
+        self._write(self.schema_path(endpoint), content)
+        self._write_meta(endpoint, schema_hash)
+        return schema_hash
+
+    def tee(self, endpoint: str, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Pass the chunks of a streamed introspection result through while storing them for an endpoint.
+        The entry is only replaced once all chunks have been read successfully.
+
+        :param endpoint: holds the endpoint url as a string
+        :param chunks: holds the text chunks of the introspection result
+        :return: an iterator over the very same chunks
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        schema_path = self.schema_path(endpoint)
+        temporary_path = f"{schema_path}.{uuid.uuid4().hex}.tmp"
+        digest = hashlib.sha256()
+        try:
+            with open(temporary_path, "w", encoding="UTF-8") as temporary_file:
+                for chunk in chunks:
+                    temporary_file.write(chunk)
+                    digest.update(chunk.encode("UTF-8"))
+                    yield chunk
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        os.replace(temporary_path, schema_path)
+        self._write_meta(endpoint, digest.hexdigest())
+
+    def _write_meta(self, endpoint: str, schema_hash: str):
+        """
+        Write the metadata of a freshly stored entry.
+
+        :param endpoint: holds the endpoint url as a string
+        :param schema_hash: holds the hash of the stored introspection result
+        """
+        meta = {
+            "endpoint": endpoint,
+            "created": time.time(),
+            "hash": schema_hash
+        }
+        self._write(self.meta_path(endpoint), json.dumps(meta))
+        logger.debug(f"SCHEMA CACHE - STORE - {endpoint}")
+
+    def invalidate(self, endpoint: str):
+        """
+        Remove the entry of an endpoint. The next client will introspect the schema again.
+
+        :param endpoint: holds the endpoint url as a string
+        """
+        for path in (self.meta_path(endpoint), self.schema_path(endpoint)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """ Remove all entries from the cache directory. """
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".json"):
+                os.remove(os.path.join(self.directory, file_name))
+
+    @staticmethod
+    def _write(path: str, content: str):
+        """
+        Atomically write content to a file.
+
+        :param path: holds the target path
+        :param content: holds the content to write
+        """
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "w", encoding="UTF-8") as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary_path, path)
+
+
+class LRUCache:
+    """
+    A thread safe, bounded mapping that drops the least recently used entry once it is full.
+    Hits and misses are counted for sizing the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Instantiate a new LRUCache.
+
+        :param maxsize: holds the maximum amount of entries
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return an entry and mark it as recently used.
+
+        :param key: holds the key of the entry
+        :param default: holds the value to return if there is no entry
+        :return: the value of the entry or the default
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Add or replace an entry. The least recently used entry is dropped if the cache is full.
+
+        :param key: holds the key of the entry
+        :param value: holds the value of the entry
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove an entry.
+
+        :param key: holds the key of the entry
+        :param default: holds the value to return if there is no entry
+        :return: the value of the removed entry or the default
+        """
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        """ Remove all entries and reset the counters. """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: the share of lookups that found an entry. 0.0 if there were no lookups yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_cache_control(header: Union[str, None]) -> Dict[str, Union[str, bool]]:
+    """
+    Parse a Cache-Control header.
+
+    :param header: holds the header value
+    :return: the directives in lower case. Directives without a value are mapped to True.
+    """
+    directives = {}
+    for directive in (header or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else True
+    return directives
+
+
+class CachedResponse:
+    """ A response stored in the HTTP cache together with its validators and freshness. """
+
+    __slots__ = ("status_code", "headers", "content", "etag", "last_modified", "cache_control", "expires")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        """
+        Instantiate a new CachedResponse.
+
+        :param status_code: holds the status code of the original response
+        :param headers: holds the headers of the original response
+        :param content: holds the body of the original response
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.cache_control: Dict[str, Union[str, bool]] = {}
+        self.expires: Union[float, None] = None
+        self.refresh(headers)
+
+    def refresh(self, headers: Dict[str, str]):
+        """
+        Update the freshness from the headers of a new or revalidated response.
+
+        :param headers: holds the response headers
+        """
+        self.cache_control = parse_cache_control(headers.get("Cache-Control"))
+        self.expires = None
+        max_age = self.cache_control.get("max-age")
+        if isinstance(max_age, str) and max_age.isdigit() and "no-cache" not in self.cache_control:
+            age = headers.get("Age", "").strip()
+            self.expires = time.time() + int(max_age) - (int(age) if age.isdigit() else 0)
+        self.etag = headers.get("ETag") or self.etag
+        self.last_modified = headers.get("Last-Modified") or self.last_modified
+
+    @property
+    def is_fresh(self) -> bool:
+        """
+        :return: True if the response may be used without asking the server
+        """
+        return self.expires is not None and time.time() < self.expires
+
+
+CREDENTIAL_HEADERS = ("Authorization", "Proxy-Authorization", "Cookie")
+
+
+class HTTPCache:
+    """
+    A private HTTP cache for GET requests which honors Cache-Control and revalidates stale responses
+    with conditional requests using their ETag or Last-Modified validators.
+
+    Responses are stored per credentials, so a cache can be shared between transporters that authenticate
+    differently. Request headers listed in the Vary header of a response are part of its key as well.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Instantiate a new HTTPCache.
+
+        :param maxsize: holds the maximum amount of stored responses
+        """
+        self._entries = LRUCache(maxsize)
+        self._vary = LRUCache(maxsize)  # the names of the request headers the responses of an url vary by
+        self.revalidated = 0
+
+    def key(self, url: str, headers: Dict[str, str] = None) -> Tuple:
+        """
+        :param url: holds the requested url
+        :param headers: holds the headers of the request
+        :return: the key the response to the request is stored under
+        """
+        headers = CaseInsensitiveDict(headers or {})
+        credentials = [f"{name}:{headers[name]}" for name in CREDENTIAL_HEADERS if name in headers]
+        identity = hashlib.sha256("\n".join(credentials).encode("UTF-8")).hexdigest() if credentials else None
+        vary = self._vary.get(url) or ()
+        return url, identity, tuple(headers.get(name) for name in vary)
+
+    def get(self, url: str, headers: Dict[str, str] = None) -> Union[CachedResponse, None]:
+        """
+        :param url: holds the requested url
+        :param headers: holds the headers of the request
+        :return: the stored response or None
+        """
+        return self._entries.get(self.key(url, headers))
+
+    def fresh(self, url: str, headers: Dict[str, str] = None) -> Union[CachedResponse, None]:
+        """
+        :param url: holds the requested url
+        :param headers: holds the headers of the request
+        :return: the stored response if it is still fresh
+        """
+        entry = self.get(url, headers)
+        return entry if entry is not None and entry.is_fresh else None
+
+    def conditional_headers(self, url: str, headers: Dict[str, str] = None) -> Dict[str, str]:
+        """
+        :param url: holds the requested url
+        :param headers: holds the headers of the request
+        :return: the headers for revalidating a stored response. Empty if there is none.
+        """
+        entry = self.get(url, headers)
+        conditional = {}
+        if entry is not None:
+            if entry.etag:
+                conditional["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                conditional["If-Modified-Since"] = entry.last_modified
+        return conditional
+
+    def update(self, url: str, response, headers: Dict[str, str] = None) -> Union[CachedResponse, None]:
+        """
+        Store a response or refresh the stored one if the server answered with 304 Not Modified.
+
+        :param url: holds the requested url
+        :param response: holds the response
+        :param headers: holds the headers of the request
+        :return: the stored response to use instead of a 304 response, otherwise None.
+        None for a 304 response means the stored response is gone and the request has to be sent again
+        without validators.
+        """
+        if response.status_code == 304:
+            entry = self.get(url, headers)
+            if entry is not None:
+                entry.refresh(response.headers)
+                self.revalidated += 1
+            return entry
+        if response.status_code != 200:
+            return None
+        entry = CachedResponse(response.status_code, CaseInsensitiveDict(response.headers), response.content)
+        vary = tuple(name.strip() for name in (entry.headers.get("Vary") or "").split(",") if name.strip())
+        if "no-store" in entry.cache_control or "*" in vary:
+            self._entries.pop(self.key(url, headers))  # the stored response must not be used anymore
+            return None
+        if entry.etag or entry.last_modified or entry.expires is not None:
+            self._vary.put(url, vary)
+            self._entries.put(self.key(url, headers), entry)
+        return None
+
+    def clear(self):
+        """ Remove all stored responses. """
+        self._entries.clear()
+        self._vary.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+MISS = object()  # returned by ResponseCache.get if there is no usable entry
+
+
+class ResponseCache:
+    """
+    A thread safe, bounded cache for the results of queries which sits in front of the transporter.
+
+    Results are keyed by operation, query document, variables and endpoint, so repeated identical queries
+    are answered without a round trip. Every operation can have its own time to live.
+    Mutations are never cached and cached results are shared, so do not modify them.
+    The key does not contain any credentials, so do not share a cache between clients that authenticate differently.
+
+    cache = ResponseCache(ttl=10, ttls={"pokemon": 60, "trainer": 0})  # trainer results are not cached
+    client = Client("https://foo.bar/", response_cache=cache)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Union[int, float] = 60, ttls: Dict[str, Union[int, float]] = None):
+        """
+        Instantiate a new ResponseCache.
+
+        :param maxsize: holds the maximum amount of stored results. The least recently used one is dropped first.
+        :param ttl: holds the time in seconds a result is used for. None means until it is invalidated.
+        :param ttls: holds times to live by operation name which replace the default ttl. 0 disables the cache.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls: Dict[str, Union[int, float]] = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Union[float, None], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, operation: str, document: str, variables: Dict, endpoint: str = None) -> Union[Tuple, None]:
+        """
+        :param operation: holds the operation name
+        :param document: holds the query document
+        :param variables: holds the variables. Their key order does not matter.
+        :param endpoint: holds the endpoint url the query is sent to
+        :return: the key of a result or None if results of the operation are not cached
+        or the variables can not be serialized.
+        """
+        if self.ttls.get(operation, self.ttl) == 0:
+            return None
+        canonical = canonical_json(variables)
+        if canonical is None:
+            return None
+        return operation, document, canonical, endpoint
+
+    def get(self, key: Tuple, default: Any = MISS) -> Any:
+        """
+        Return a result and mark it as recently used. Expired results are dropped.
+
+        :param key: holds the key of the result
+        :param default: holds the value to return if there is no usable result
+        :return: the result or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, value: Any):
+        """
+        Store a result. The least recently used result is dropped if the cache is full.
+
+        :param key: holds the key of the result
+        :param value: holds the result
+        """
+        ttl = self.ttls.get(key[0], self.ttl)
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, operation: str = None, variables: Dict = None, endpoint: str = None):
+        """
+        Drop stored results.
+
+        :param operation: holds the name of the operation whose results are dropped. None drops all results.
+        :param variables: holds the variables of the results to drop. None drops the results for all variables.
+        :param endpoint: holds the endpoint url of the results to drop. None drops the results of all endpoints.
+        """
+        canonical = canonical_json(variables) if variables is not None else None
+        with self._lock:
+            if operation is None and variables is None and endpoint is None:
+                self._entries.clear()
+                return
+            for key in [
+                k for k in self._entries
+                if operation in (None, k[0]) and canonical in (None, k[2]) and endpoint in (None, k[3])
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        """ Drop all results and reset the counters. """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: the share of lookups that found a usable result. 0.0 if there were no lookups yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
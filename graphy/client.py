@@ -1,7 +1,15 @@
+import asyncio
+from typing import Dict, Iterable, Sequence, Tuple, Union
+
+from graphy.cache import LRUCache, ResponseCache, SchemaCache
+from graphy.concurrency import SingleFlight
+from graphy.entities import EntityCache
+from graphy.fanout import FanOut, OperationSpec
 from graphy.proxy import MutationServiceProxy, QueryServiceProxy, SubscriptionServiceProxy
+from graphy.registry import SchemaRegistry
 from graphy.schema import Schema
 from graphy.settings import Settings
-from graphy.transport import Transporter
+from graphy.transport import AsyncHTTPTransporter, Transporter
 from graphy.utils import adapt_websocket_endpoint
 
 
@@ -12,7 +20,21 @@ class Client:
     It is used for requests and holds important variables like endpoint, settings and the schema.
     """
 
-    def __init__(self, endpoint: str, ws_endpoint: str = None, transporter=None, settings=None):
+    def __init__(
+            self,
+            endpoint: str,
+            ws_endpoint: str = None,
+            transporter=None,
+            settings=None,
+            schema_cache: SchemaCache = None,
+            schema_registry: SchemaRegistry = None,
+            schema_snapshot: str = None,
+            refresh_interval: float = None,
+            schema: Schema = None,
+            response_cache: ResponseCache = None,
+            entity_cache: EntityCache = None,
+            single_flight: Union[bool, SingleFlight] = False
+    ):
         """
         Instantiate a new Client.
 
@@ -20,6 +42,18 @@ class Client:
         :param ws_endpoint: holds the websocket endpoint URL.
         :param transporter: holds the transporter to use for requests.
         :param settings: holds the settings to apply.
+        :param schema_cache: holds an optional schema cache for skipping the introspection on start up.
+        :param schema_registry: holds an optional registry for sharing the schema with other clients.
+        Shared schemas are introspected with the transporter of the registry.
+        :param schema_snapshot: holds the path of an optional schema snapshot to map instead of introspecting.
+        :param refresh_interval: holds an optional time in seconds after which the schema is introspected again
+        in a background thread. A changed schema is swapped in without interrupting running requests.
+        :param schema: holds an already created schema to use instead of introspecting.
+        :param response_cache: holds an optional cache for the results of queries.
+        Only share it between clients with the same credentials.
+        :param entity_cache: holds an optional normalized cache for the objects in the results of queries and mutations.
+        :param single_flight: True or a shared SingleFlight if identical queries that are in flight at the same time
+        should share one request. The amount of shared calls is counted in single_flight.coalesced.
         """
         if not endpoint:
             raise ValueError("No Endpoint specified.")
@@ -35,8 +69,124 @@ class Client:
         self._query_services = None
         self._mutation_services = None
         self._subscription_services = None
+        self._services_generation = 0
+
+        # built query documents by operation, selection shape and variable names
+        size = self.settings.query_cache_size
+        self.query_cache: Union[LRUCache, None] = LRUCache(size) if size else None
+        # selections with the identity fields of the entity cache by operation and selection shape
+        self.identity_cache: Union[LRUCache, None] = LRUCache(size) if size and entity_cache is not None else None
+        self.response_cache: Union[ResponseCache, None] = response_cache
+        self.entity_cache: Union[EntityCache, None] = entity_cache
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight: Union[SingleFlight, None] = single_flight or None
+
+        if schema is not None:
+            self.schema = schema
+        elif schema_snapshot is not None:
+            self.schema = Schema.from_snapshot(schema_snapshot, self.transporter, self.settings)
+        elif schema_registry is not None:
+            self.schema = schema_registry.get(self.endpoint, self.settings, schema_cache)
+        else:
+            self.schema = Schema(self.endpoint, self.transporter, self.settings, schema_cache)
+
+        if refresh_interval is not None:
+            self.schema.start_refresher(refresh_interval)
+
+    @classmethod
+    async def create(
+            cls,
+            endpoint: str,
+            ws_endpoint: str = None,
+            transporter=None,
+            settings=None,
+            schema_cache: SchemaCache = None,
+            **kwargs
+    ) -> "Client":
+        """
+        Create a new Client and introspect the schema without blocking the event loop.
+        Without a transporter an AsyncHTTPTransporter is used.
+
+        client = await Client.create("https://foo.bar/")
+
+        :param endpoint: holds the endpoint URL.
+        :param ws_endpoint: holds the websocket endpoint URL.
+        :param transporter: holds the transporter to use for requests.
+        :param settings: holds the settings to apply.
+        :param schema_cache: holds an optional schema cache for skipping the introspection.
+        :param kwargs: holds further arguments of the Client like refresh_interval.
+        :return: the client
+        """
+        if not endpoint:
+            raise ValueError("No Endpoint specified.")
+        transporter = transporter or AsyncHTTPTransporter()
+        settings = settings or Settings()
+        schema = await Schema.create(endpoint, transporter, settings, schema_cache)
+        return cls(endpoint, ws_endpoint, transporter, settings, schema=schema, **kwargs)
 
-        self.schema = Schema(self.endpoint, self.transporter, self.settings)
+    def refresh_schema(self, background: bool = False) -> bool:
+        """
+        Introspect the schema again and swap it in if it changed.
+
+        :param background: True if the refresh should run in the background refresher thread.
+        The refresher is started with the default interval of an hour if there is none yet.
+        :return: True if the schema changed. Always False for background refreshes.
+        """
+        if background:
+            self.schema.start_refresher(3600).trigger()
+            return False
+        return self.schema.refresh()
+
+    def _check_schema_generation(self):
+        """ Drop the cached service proxies if the schema has been refreshed since they were created. """
+        generation = self.schema.generation
+        if generation != self._services_generation:
+            self._query_services = None
+            self._mutation_services = None
+            self._subscription_services = None
+            self._services_generation = generation
+
+    def gather(self, specs: Sequence[OperationSpec], concurrency: int = 10, timeout: float = None):
+        """
+        Send many unrelated operations at the same time.
+
+        results = client.gather([("user", fields("id"), {"id": "1"}), ("posts", None, {"first": 10})])
+
+        Blocking and Promise based transporters call the operations from worker threads and return the list
+        when all of them are done. Async transporters run them as tasks and return an awaitable for the list.
+
+        :param specs: holds the operations as tuples of an operation and optionally the selection and variables.
+        An operation is either the name of a query or an operation proxy like client.mutation.register.
+        :param concurrency: holds the maximum amount of operations that are in flight at the same time
+        :param timeout: holds the time in seconds the operations may take in total. None means forever.
+        :return: a BulkResult for every operation in input order. Failed or timed out operations hold the exception.
+        :raises: ValueError if concurrency is below 1
+        """
+        fan_out = FanOut(self, concurrency, timeout)
+        if asyncio.iscoroutinefunction(self.transporter.post):
+            return fan_out.run_async(list(specs))
+        return fan_out.run(list(specs))
+
+    def map(
+            self,
+            operation,
+            variables: Iterable[Dict],
+            select: Tuple = None,
+            concurrency: int = 10,
+            timeout: float = None
+    ):
+        """
+        Send one operation for every set of variables at the same time. See gather().
+
+        :param operation: holds the name of a query or an operation proxy
+        :param variables: holds the variables of every call
+        :param select: holds the selection of every call
+        :param concurrency: holds the maximum amount of calls that are in flight at the same time
+        :param timeout: holds the time in seconds the calls may take in total. None means forever.
+        :return: a BulkResult for every call in input order
+        """
+        return self.gather([(operation, select, v) for v in variables], concurrency, timeout)
 
     @property
     def query(self) -> QueryServiceProxy:
@@ -44,6 +194,7 @@ class Client:
         Property for lazy loading the query service proxy
         :return: the clients query service proxy
         """
+        self._check_schema_generation()
         if self._query_services is None:
             self._query_services = QueryServiceProxy(self)
         return self._query_services
@@ -54,6 +205,7 @@ class Client:
         Property for lazy loading the mutation service proxy
         :return: the clients query mutation proxy
         """
+        self._check_schema_generation()
         if self._mutation_services is None:
             self._mutation_services = MutationServiceProxy(self)
         return self._mutation_services
@@ -64,6 +216,7 @@ class Client:
         Property for lazy loading the subscription service proxy
         :return: the clients query subscription proxy
         """
+        self._check_schema_generation()
         if self._subscription_services is None:
             self._subscription_services = SubscriptionServiceProxy(self)
         return self._subscription_services
@@ -0,0 +1,271 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar, Union
+
+from promise import Promise
+
+T = TypeVar("T")
+
+
+def gather_futures(futures: List[Future]) -> Future:
+    """
+    Combine futures into one which is done once all of them are done.
+    Failed futures do not fail the combined one, their exceptions take the place of their results instead.
+
+    :param futures: holds the futures
+    :return: a future for the list of results and exceptions in the order of the futures
+    """
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        combined.set_result([f.exception() or f.result() for f in futures])
+
+    if not futures:
+        combined.set_result([])
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
+
+
+class SingleFlight:
+    """
+    A single flight collapses concurrent calls with the same key into one.
+    The first caller executes the function, every caller arriving while it is still running
+    waits for it and receives the very same result or exception.
+
+    Besides blocking calls, functions returning Promises or coroutines can be collapsed as well.
+    """
+
+    def __init__(self):
+        """ Instantiate a new SingleFlight """
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._promises: Dict[Hashable, Promise] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        """
+        Execute the function unless a call with the same key is already in flight.
+
+        :param key: holds the key identifying identical calls
+        :param function: holds the function to execute
+        :return: the result of the function
+        :raises: whatever the function raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = function()
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do_promise(self, key: Hashable, function: Callable[[], Promise]) -> Promise:
+        """
+        Call the function unless a Promise with the same key is still pending.
+
+        :param key: holds the key identifying identical calls
+        :param function: holds the function returning a Promise
+        :return: the pending Promise of the first call
+        """
+        with self._lock:
+            promise = self._promises.get(key)
+            if promise is not None:
+                self.coalesced += 1
+                return promise
+            promise = self._promises[key] = function()
+
+        def forget(_):
+            with self._lock:
+                if self._promises.get(key) is promise:
+                    del self._promises[key]
+
+        promise.then(forget, forget)
+        return promise
+
+    async def do_async(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the function unless a call with the same key is still running in the same event loop.
+        A caller that is cancelled does not cancel the call for the others.
+
+        :param key: holds the key identifying identical calls
+        :param function: holds the function returning an awaitable
+        :return: the result of the function
+        :raises: whatever the function raised
+        """
+        key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(function())
+
+            def forget(_):
+                if self._tasks.get(key) is task:
+                    del self._tasks[key]
+
+            task.add_done_callback(forget)
+        else:
+            with self._lock:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+class Batch:
+    """ The items of a BatchQueue that are sent together. Items with the same key share one future. """
+
+    __slots__ = ("items", "futures", "keys")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[Future] = []
+        self.keys: Dict[Hashable, Future] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class BatchQueue:
+    """
+    A batch queue collects items for a short time window and hands them to a send function together.
+    A batch is sent once the window has passed or once it holds max_batch_size items.
+
+    The send function gets the items and their futures and has to settle every future.
+    Windows are timed in the running event loop for asynchronous queues and by a timer thread otherwise.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[List[Any], List[Future]], None],
+            window: float = 0.005,
+            max_batch_size: int = 50,
+            asynchronous: bool = False
+    ):
+        """
+        Instantiate a new BatchQueue.
+
+        :param send: holds the function sending a batch
+        :param window: holds the time in seconds items are collected for after the first item of a batch
+        :param max_batch_size: holds the maximum amount of items that are sent together
+        :param asynchronous: True if items are put from coroutines and batches are sent in the event loop
+        """
+        self.send = send
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.asynchronous = asynchronous
+        self.items = 0
+        self.batches = 0
+        self._batch: Union[Batch, None] = None
+        self._lock = threading.Lock()
+
+    @property
+    def average_batch_size(self) -> float:
+        """
+        :return: the average amount of items per sent batch. 0.0 if no batch was sent yet.
+        """
+        return self.items / self.batches if self.batches else 0.0
+
+    def put(self, item: Any, key: Hashable = None) -> Future:
+        """
+        Add an item to the current batch and send the batch if it is full.
+
+        :param item: holds the item
+        :param key: holds an optional key. Items with the same key in a batch are only sent once.
+        :return: the future of the item
+        """
+        with self._lock:
+            self.items += 1
+            batch = self._batch
+            created = batch is None
+            if created:
+                batch = self._batch = Batch()
+            future = batch.keys.get(key) if key is not None else None
+            if future is None:
+                future = Future()
+                batch.items.append(item)
+                batch.futures.append(future)
+                if key is not None:
+                    batch.keys[key] = future
+            full = len(batch) >= self.max_batch_size
+            if full:
+                self._batch = None
+
+        if full:
+            self._send(batch)
+        elif created:
+            self._schedule(batch)
+        return future
+
+    def flush(self):
+        """ Send the current batch now instead of waiting for the window to pass. """
+        with self._lock:
+            batch, self._batch = self._batch, None
+        if batch is not None:
+            self._send(batch)
+
+    def _schedule(self, batch: Batch):
+        """
+        Send a batch once the window has passed, unless it was sent already because it was full.
+
+        :param batch: holds the batch
+        """
+        if self.asynchronous:
+            asyncio.get_running_loop().call_later(self.window, self._flush, batch)
+        else:
+            timer = threading.Timer(self.window, self._flush, (batch,))
+            timer.daemon = True
+            timer.start()
+
+    def _flush(self, batch: Batch):
+        """ Send a batch whose window has passed. """
+        with self._lock:
+            if self._batch is not batch:
+                return  # sent already
+            self._batch = None
+        self._send(batch)
+
+    def _send(self, batch: Batch):
+        """
+        Hand a batch to the send function. Its futures fail if the send function raises.
+
+        :param batch: holds the batch
+        """
+        with self._lock:
+            self.batches += 1
+        try:
+            self.send(batch.items, batch.futures)
+        except Exception as e:
+            fail(batch.futures, e)
+
+
+def fail(futures: List[Future], error: Exception):
+    """
+    Fail all futures that are not done yet.
+
+    :param futures: holds the futures
+    :param error: holds the exception to set
+    """
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
@@ -0,0 +1,340 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+from graphy.builder import SelectedField, selected_field_name
+from graphy.cache import MISS
+from graphy.utils import canonical_json
+
+TYPENAME_FIELD = "__typename"
+ID_FIELD = "id"
+
+# tells if a fragment with a type condition applies to an object of a type. None if that is not known.
+FragmentMatcher = Callable[[str, str], Union[bool, None]]
+
+
+class Reference:
+    """ A link from a stored value to the entity with the given key. """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Reference) and other.key == self.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"<Reference({self.key})>"
+
+
+def field_keys(name: str) -> Tuple[str, str]:
+    """
+    :param name: holds the name of a selected field, optionally with an alias or arguments
+    :return: the key of the field in a response and the key it is stored under in an entity.
+    The latter keeps the arguments but drops the alias, so aliased selections of a field share it.
+    """
+    head, parenthesis, arguments = name.partition("(")
+    alias, _, field = head.rpartition(":")
+    field = field.strip()
+    return alias.strip() or field, field + parenthesis + arguments
+
+
+def inline_fragment_type(name: str) -> Union[str, None]:
+    """
+    :param name: holds the name of a selected field
+    :return: the type condition of an inline fragment like "... on User" or None for any other field
+    """
+    if name.startswith("... on "):
+        return name[len("... on "):].strip()
+    return None
+
+
+def exact_match(condition: str, type_name: str) -> Union[bool, None]:
+    """
+    The fragment matcher used without a schema.
+
+    :param condition: holds the type condition of a fragment
+    :param type_name: holds the __typename of an object
+    :return: True if they are equal, otherwise None since the condition might be an interface or union
+    """
+    return True if condition == type_name else None
+
+
+def add_identity_fields(
+        selection: Tuple[SelectedField],
+        type_name: str,
+        field_type: Callable[[str, str], Union[str, None]]
+) -> Tuple[SelectedField]:
+    """
+    Add __typename to every selection on an object and id where the type has such a field,
+    so the objects of a response can be stored as entities.
+
+    :param selection: holds the selection
+    :param type_name: holds the name of the type the selection is made on
+    :param field_type: holds a callable returning the type name of a field by the parent type and field name
+    :return: the selection with the identity fields
+    """
+    def identify(fields_: Tuple[SelectedField], parent_type: Union[str, None]) -> Tuple[SelectedField]:
+        result = []
+        names = set()
+        for f in fields_:
+            if not f:
+                continue
+            names.add(f.name)
+            if not f.children:
+                result.append(f)
+                continue
+            child_type = inline_fragment_type(f.name)
+            if child_type is None:
+                child_type = field_type(parent_type, selected_field_name(f.name)) if parent_type else None
+            result.append(SelectedField(f.name, children=identify(f.children, child_type)))
+        if TYPENAME_FIELD not in names:
+            result.append(SelectedField(TYPENAME_FIELD))
+        if ID_FIELD not in names and parent_type is not None and field_type(parent_type, ID_FIELD) is not None:
+            result.append(SelectedField(ID_FIELD))
+        return tuple(result)
+
+    return identify(selection, type_name)
+
+
+class EntityCache:
+    """
+    A normalized cache which splits query results into entities identified by their __typename and id.
+
+    Every entity is stored once, no matter how many results it is part of, and is updated by every
+    query or mutation result that contains it. A query is answered without a request if all of its
+    selected fields are stored, even if they were fetched by different queries.
+
+    Queries are found by their operation name and variables. Operations that look up an entity by an argument
+    can be mapped to that argument, so they are answered from entities fetched by any other query.
+
+    cache = EntityCache(lookups={"user": "id"})  # user(id: 42) is answered from the stored User:42
+    client = Client("https://foo.bar/", entity_cache=cache)
+    """
+
+    def __init__(self, maxsize: int = 10000, lookups: Dict[str, str] = None):
+        """
+        Instantiate a new EntityCache.
+
+        :param maxsize: holds the maximum amount of stored entities and of stored query results each.
+        The least recently used ones are dropped first.
+        :param lookups: holds argument names by operation name for operations that return the entity with the id
+        passed by in that argument.
+        """
+        self.maxsize = maxsize
+        self.lookups: Dict[str, str] = dict(lookups or {})
+        self.hits = 0
+        self.misses = 0
+        self._entities: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._roots: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def entity_key(value: Dict) -> Union[str, None]:
+        """
+        :param value: holds an object of a response
+        :return: the key of the entity like "User:42" or None if the object has no __typename or id
+        """
+        type_name = value.get(TYPENAME_FIELD)
+        entity_id = value.get(ID_FIELD)
+        if type_name is None or entity_id is None:
+            return None
+        return f"{type_name}:{entity_id}"
+
+    @staticmethod
+    def root_key(operation: str, variables: Dict) -> Union[Tuple[str, str], None]:
+        """
+        :param operation: holds the operation name
+        :param variables: holds the variables
+        :return: the key of a query result or None if the variables can not be serialized
+        """
+        canonical = canonical_json(variables or {})
+        return (operation, canonical) if canonical is not None else None
+
+    def entity(self, type_name: str, entity_id: Any) -> Union[Dict[str, Any], None]:
+        """
+        :param type_name: holds the type name of the entity
+        :param entity_id: holds the id of the entity
+        :return: a copy of the stored fields of the entity or None if it is not stored.
+        Fields linking to other entities hold a Reference.
+        """
+        with self._lock:
+            entity = self._entities.get(f"{type_name}:{entity_id}")
+            return dict(entity) if entity is not None else None
+
+    def read(
+            self,
+            operation: str,
+            variables: Dict,
+            selection: Tuple[SelectedField],
+            type_name: str = None,
+            matcher: FragmentMatcher = exact_match
+    ) -> Any:
+        """
+        Answer a query from the stored entities.
+
+        :param operation: holds the operation name
+        :param variables: holds the variables
+        :param selection: holds the selection including the identity fields
+        :param type_name: holds the name of the type the operation returns. Used for lookups.
+        :param matcher: holds the callable telling which inline fragments apply to which types.
+        A fragment it does not know about makes the read a miss.
+        :return: the result or MISS if any selected field is not stored
+        """
+        key = self.root_key(operation, variables)
+        with self._lock:
+            stored = self._roots.get(key, MISS) if key is not None else MISS
+            argument = self.lookups.get(operation)
+            if stored is MISS and argument is not None and type_name is not None \
+                    and variables and variables.get(argument) is not None:
+                stored = Reference(f"{type_name}:{variables[argument]}")
+            try:
+                if stored is MISS:
+                    raise KeyError(operation)
+                result = self._read(stored, selection, matcher)
+            except KeyError:
+                self.misses += 1
+                return MISS
+            if key in self._roots:
+                self._roots.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def write(
+            self,
+            operation: Union[str, None],
+            variables: Dict,
+            selection: Tuple[SelectedField],
+            value: Any,
+            matcher: FragmentMatcher = exact_match
+    ):
+        """
+        Store the result of a query or mutation. Contained entities are merged into the stored ones.
+
+        :param operation: holds the operation name of a query. None for mutations, whose results
+        only update the entities.
+        :param variables: holds the variables
+        :param selection: holds the selection including the identity fields
+        :param value: holds the result
+        :param matcher: holds the callable telling which inline fragments apply to which types.
+        The fields of fragments it does not know about are stored if the response contains them.
+        """
+        with self._lock:
+            stored = self._write(value, selection, matcher)
+            key = self.root_key(operation, variables) if operation is not None else None
+            if key is not None:
+                self._roots[key] = stored
+                self._roots.move_to_end(key)
+                if len(self._roots) > self.maxsize:
+                    self._roots.popitem(last=False)
+
+    def evict(self, type_name: str, entity_id: Any):
+        """
+        Drop an entity. Queries that contain it are requested again.
+
+        :param type_name: holds the type name of the entity
+        :param entity_id: holds the id of the entity
+        """
+        with self._lock:
+            self._entities.pop(f"{type_name}:{entity_id}", None)
+
+    def clear(self):
+        """ Drop all entities and query results and reset the counters. """
+        with self._lock:
+            self._entities.clear()
+            self._roots.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: the share of queries that were answered from the cache. 0.0 if there were no queries yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def _write(self, value: Any, selection: Union[Tuple[SelectedField], None], matcher: FragmentMatcher) -> Any:
+        """
+        Normalize a value of a response.
+
+        :param value: holds the value
+        :param selection: holds the selection made on the value
+        :param matcher: holds the fragment matcher
+        :return: the value to store. Entities are replaced by a Reference.
+        """
+        if isinstance(value, list):
+            return [self._write(item, selection, matcher) for item in value]
+        if not isinstance(value, dict) or not selection:
+            return value
+        record = {}
+        self._write_fields(value, selection, record, matcher)
+        key = self.entity_key(value)
+        if key is None:
+            return record  # objects without an identity are stored within their parent
+        entity = self._entities.get(key)
+        if entity is None:
+            entity = self._entities[key] = record
+        else:
+            entity.update(record)
+        self._entities.move_to_end(key)
+        if len(self._entities) > self.maxsize:
+            self._entities.popitem(last=False)
+        return Reference(key)
+
+    def _write_fields(self, value: Dict, selection: Tuple[SelectedField], record: Dict, matcher: FragmentMatcher):
+        for f in selection:
+            condition = inline_fragment_type(f.name)
+            if condition is not None:
+                type_name = value.get(TYPENAME_FIELD)
+                if f.children and (type_name is None or matcher(condition, type_name) is not False):
+                    self._write_fields(value, f.children, record, matcher)
+                continue
+            response_key, storage_key = field_keys(f.name)
+            if response_key in value:
+                record[storage_key] = self._write(value[response_key], f.children, matcher)
+
+    def _read(self, stored: Any, selection: Union[Tuple[SelectedField], None], matcher: FragmentMatcher) -> Any:
+        """
+        Denormalize a stored value.
+
+        :param stored: holds the stored value
+        :param selection: holds the selection made on the value
+        :param matcher: holds the fragment matcher
+        :return: the value as it would be in a response
+        :raises: a KeyError if a selected field or entity is not stored or a fragment can not be matched
+        """
+        if isinstance(stored, list):
+            return [self._read(item, selection, matcher) for item in stored]
+        if isinstance(stored, Reference):
+            record = self._entities[stored.key]
+            self._entities.move_to_end(stored.key)
+        elif isinstance(stored, dict) and selection:
+            record = stored
+        else:
+            return stored
+        result = {}
+        self._read_fields(record, selection, result, matcher)
+        return result
+
+    def _read_fields(self, record: Dict, selection: Tuple[SelectedField], result: Dict, matcher: FragmentMatcher):
+        for f in selection:
+            condition = inline_fragment_type(f.name)
+            if condition is not None:
+                matches = matcher(condition, record[TYPENAME_FIELD])
+                if matches is None:
+                    raise KeyError(f.name)  # the fragment might apply, so its fields can not be left out
+                if matches and f.children:
+                    self._read_fields(record, f.children, result, matcher)
+                continue
+            if f.name.startswith("..."):
+                raise KeyError(f.name)  # named fragments can not be resolved
+            response_key, storage_key = field_keys(f.name)
+            result[response_key] = self._read(record[storage_key], f.children, matcher)
@@ -0,0 +1,17 @@
+from typing import Dict, List
+
+
+class GraphQLError(Exception):
+    """
+    Raised for an operation the server answered with errors instead of data.
+    The errors as sent by the server are available as errors.
+    """
+
+    def __init__(self, errors: List[Dict]):
+        """
+        Instantiate a new GraphQLError.
+
+        :param errors: holds the errors of the operation
+        """
+        self.errors = errors
+        super(GraphQLError, self).__init__("; ".join(str(e.get("message", e)) for e in errors) or "Unknown error")
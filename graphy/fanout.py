@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+from graphy.batch import BulkResult
+
+# an operation name or proxy, optionally followed by the selection and the variables
+OperationSpec = Union[Tuple[Any], Tuple[Any, Any], Tuple[Any, Any, Dict]]
+
+
+class FanOut:
+    """
+    A fan out sends many unrelated operations at the same time and collects their results in order.
+
+    At most concurrency operations are in flight at once. The timeout bounds the whole fan out:
+    every operation that has not finished once it passed, whether running or still queued,
+    is reported as failed, as is every operation that raises. The others are not affected.
+    """
+
+    def __init__(self, client, concurrency: int = 10, timeout: float = None):
+        """
+        Instantiate a new FanOut.
+
+        :param client: holds the client
+        :param concurrency: holds the maximum amount of operations that are in flight at the same time
+        :param timeout: holds the time in seconds the operations may take in total. None means forever.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency has to be at least 1")
+        self.client = client
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def calls(self, specs: Sequence[OperationSpec]) -> List[Tuple[str, Callable]]:
+        """
+        :param specs: holds the operations as tuples of an operation and optionally the selection and variables.
+        An operation is either the name of a query or an operation proxy like client.mutation.register.
+        :return: the names of the operations and callables calling them
+        """
+        calls = []
+        for spec in specs:
+            operation, select, variables = (tuple(spec) + (None, None))[:3]
+
+            def call(operation=operation, select=select, variables=variables):
+                proxy = self.client.query[operation] if isinstance(operation, str) else operation
+                return proxy(select, variables)
+
+            calls.append((getattr(operation, "name", operation), call))
+        return calls
+
+    def timeout_error(self, name: str) -> TimeoutError:
+        return TimeoutError(f"{name} did not finish within {self.timeout} seconds")
+
+    def run(self, specs: Sequence[OperationSpec]) -> List[BulkResult]:
+        """
+        Call the operations from worker threads. Used for transporters with a blocking or Promise based post().
+        Worker threads of operations that timed out are not waited for, queued operations are not started anymore.
+
+        :param specs: holds the operations
+        :return: the results in input order
+        """
+        calls = self.calls(specs)
+        if not calls:
+            return []
+        transporter = self.client.transporter
+        results: List[Union[BulkResult, None]] = [None] * len(calls)
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(calls)), thread_name_prefix="graphy-fanout")
+        futures: Dict[Future, int] = {}
+        try:
+            for index, (_, call) in enumerate(calls):
+                futures[executor.submit(lambda call=call: transporter.wait(call()))] = index
+            done, pending = wait(futures, self.timeout)
+            for future in done:
+                index = futures[future]
+                error = future.exception()
+                results[index] = BulkResult(index, error=error) if error else BulkResult(index, future.result())
+            for future in pending:
+                index = futures[future]
+                results[index] = BulkResult(index, error=self.timeout_error(calls[index][0]))
+        finally:
+            # cancel the queued operations, Executor.shutdown(cancel_futures=True) needs python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        return results
+
+    async def run_async(self, specs: Sequence[OperationSpec]) -> List[BulkResult]:
+        """
+        Call the operations as tasks of the running event loop. Used for transporters with an async post().
+
+        :param specs: holds the operations
+        :return: the results in input order
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(call: Callable):
+            async with semaphore:
+                return await call()
+
+        async def execute(index: int, name: str, call: Callable) -> BulkResult:
+            try:
+                return BulkResult(index, await asyncio.wait_for(limited(call), self.timeout))
+            except asyncio.TimeoutError:
+                return BulkResult(index, error=self.timeout_error(name))
+            except Exception as e:
+                return BulkResult(index, error=e)
+
+        return list(await asyncio.gather(*(
+            execute(index, name, call) for index, (name, call) in enumerate(self.calls(specs))
+        )))
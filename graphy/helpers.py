@@ -1,8 +1,11 @@
-from typing import Dict, Union, Tuple
+from typing import Any, Callable, Dict, List, Union, Tuple
 
-from graphy.builder import SelectedField
+from graphy.builder import GraphQLBuilder, SelectedField
+from graphy.exceptions import GraphQLError
 from graphy.schema import SchemaType, Operation, Argument, TypeDefer, OperationArgument
 
+LEAF_KINDS = ("SCALAR", "ENUM")
+
 
 def map_variables_to_types(variables: Dict, operation: Operation) -> Dict[str, str]:
     result = {}
@@ -37,10 +40,7 @@ def is_scalar(defer: TypeDefer) -> bool:
 def find_defer_name_recursively(defer: TypeDefer) -> Union[str, None]:
     if not defer:
         return None
-    if defer.name is None:
-        return find_defer_name_recursively(defer.of_type)
-    else:
-        return defer.name
+    return defer.base_name  # precomputed when the defer was parsed
 
 
 def adapt_arguments(args: Dict[str, Argument]) -> Dict[str, OperationArgument]:
@@ -53,6 +53,122 @@ def adapt_arguments(args: Dict[str, Argument]) -> Dict[str, OperationArgument]:
     return result
 
 
+def field_type_resolver(all_types: Dict[str, SchemaType]) -> Callable[[str, str], Union[str, None]]:
+    """
+    Create a callable that returns the base type name of a field by the name of its type and its own name.
+    The fields of every type are indexed on first use.
+
+    :param all_types: holds all available schema types
+    :return: the callable. It returns None for unknown types or fields.
+    """
+    field_types: Dict[str, Dict[str, str]] = {}
+
+    def field_type(type_name: str, field_name: str) -> Union[str, None]:
+        type_fields = field_types.get(type_name)
+        if type_fields is None:
+            schema_type = all_types.get(type_name)
+            type_fields = {
+                f.name: f.type.base_name for f in (schema_type.fields if schema_type else None) or () if f and f.type
+            }
+            field_types[type_name] = type_fields
+        return type_fields.get(field_name)
+
+    return field_type
+
+
+def fragment_matcher(all_types: Dict[str, SchemaType]) -> Callable[[str, str], Union[bool, None]]:
+    """
+    Create a callable that tells if an inline fragment applies to an object by its type condition and the
+    __typename of the object. Interfaces and unions are resolved through their possible types.
+
+    :param all_types: holds all available schema types
+    :return: the callable. It returns None if the condition is unknown or has no possible types.
+    """
+    def matches(condition: str, type_name: str) -> Union[bool, None]:
+        if condition == type_name:
+            return True
+        schema_type = all_types.get(condition)
+        if schema_type is None:
+            return None
+        if schema_type.kind == "OBJECT":
+            return False
+        if schema_type.possible_types is None:
+            return None
+        return any(t.get("name") == type_name for t in schema_type.possible_types if t)
+
+    return matches
+
+
+def aliased_document(
+        operation: Operation,
+        operation_type: str,
+        select: Tuple[SelectedField],
+        variables: List[Dict]
+) -> Tuple[str, Dict[str, Any], List[str]]:
+    """
+    Build one document which calls an operation once for every set of variables.
+    Every call gets its own alias and its variables are renamed with the index of the call.
+
+    query user_batch($id_0: ID!, $id_1: ID!) { user_0: user(id: $id_0) { ... } user_1: user(id: $id_1) { ... } }
+
+    :param operation: holds the operation
+    :param operation_type: holds the operation type. Either "query" or "mutation".
+    :param select: holds the selection of every call
+    :param variables: holds the variables of every call
+    :return: the document, the merged variables and the aliases of the calls
+    """
+    params = {}
+    merged = {}
+    queries = []
+    aliases = []
+    for index, call_variables in enumerate(variables):
+        alias = f"{operation.name}_{index}"
+        for key, value in map_variables_to_types(call_variables, operation).items():
+            params[f"{key}_{index}"] = value
+        merged.update((f"{key}_{index}", value) for key, value in call_variables.items())
+        builder = GraphQLBuilder().query(operation.name, alias, {key: f"${key}_{index}" for key in call_variables})
+        queries.append(builder.fields(select).generate())
+        aliases.append(alias)
+    document = GraphQLBuilder().operation(operation_type, f"{operation.name}_batch", params, queries).generate()
+    return document, merged, aliases
+
+
+def split_aliased_response(
+        body: Dict,
+        aliases: List[str],
+        response_key: str = "data"
+) -> List[Tuple[Any, Union[GraphQLError, None]]]:
+    """
+    Split the response of an aliased document into the results of its calls.
+    Errors are assigned to a call by the first element of their path. Errors without a path concern all calls
+    that have no data.
+
+    :param body: holds the decoded response body
+    :param aliases: holds the aliases of the calls
+    :param response_key: holds the key of the data in the response
+    :return: a tuple of the data and None or of None and a GraphQLError for every call
+    """
+    data = body.get(response_key) or {}
+    known = set(aliases)
+    errors: Dict[str, List[Dict]] = {}
+    general = []
+    for error in body.get("errors") or ():
+        path = error.get("path") or ()
+        if path and path[0] in known:
+            errors.setdefault(path[0], []).append(error)
+        else:
+            general.append(error)
+    results = []
+    for alias in aliases:
+        if alias in errors:
+            results.append((None, GraphQLError(errors[alias])))
+        elif alias in data:
+            results.append((data[alias], None))
+        else:
+            results.append((None, GraphQLError(general or [{"message": f"No data for '{alias}' in the response"}])))
+    return results
+
+
 def adapt_return_fields(
         field_type: TypeDefer,
         all_types: Dict[str, SchemaType],
@@ -87,6 +203,11 @@ def __recursively_find_selection_fields(
     args = []
     kwargs = {}
 
+    prefetch = getattr(all_types, "prefetch", None)
+    if prefetch is not None and curr_depth + 1 < max_depth:
+        # lazily requested types of the next level are requested at once instead of one by one
+        prefetch(f.type.base_name for f in field_type.fields if f and f.type and f.type.base_kind not in LEAF_KINDS)
+
     for field in field_type.fields:
         if field is None:
             continue
@@ -98,6 +219,8 @@ def __recursively_find_selection_fields(
         field_name = field.name
         if is_scalar(type_to_check):
             args.append(field_name)
+        elif type_to_check is None or type_to_check.base_kind in LEAF_KINDS:
+            continue  # scalars and enums have no fields to select
         elif is_list(type_to_check) or is_object(type_to_check) or is_non_null(type_to_check):
             sub_type = find_defer_name_recursively(type_to_check)
             sub_fields = __recursively_find_selection_fields(sub_type, all_types, curr_depth + 1, max_depth)
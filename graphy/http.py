@@ -0,0 +1,330 @@
+import asyncio
+import json
+import ssl
+import time
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, Tuple, Union
+from urllib.parse import urlsplit
+
+from requests import exceptions
+from requests.structures import CaseInsensitiveDict
+
+from graphy.logger import logger
+from graphy.pool import PoolMetrics
+
+
+class HTTPResponse:
+    """
+    A response of the asyncio HTTP client.
+    It offers the parts of the requests response that are used for graphql requests.
+    """
+
+    __slots__ = ("url", "status_code", "reason", "headers", "content")
+
+    def __init__(self, url: str, status_code: int, reason: str, headers: CaseInsensitiveDict, content: bytes):
+        """
+        Instantiate a new HTTPResponse.
+
+        :param url: holds the requested url
+        :param status_code: holds the HTTP status code
+        :param reason: holds the reason phrase of the status line
+        :param headers: holds the response headers
+        :param content: holds the decoded response body
+        """
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    def __repr__(self) -> str:
+        return f"<HTTPResponse [{self.status_code}]>"
+
+    @property
+    def ok(self) -> bool:
+        """
+        :return: True if the status code is below 400
+        """
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """
+        :return: the response body as text
+        """
+        return self.content.decode("UTF-8")
+
+    def json(self) -> Any:
+        """
+        :return: the decoded json body
+        """
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """
+        :raises: a requests HTTPError if the status code signals an error
+        """
+        if not self.ok:
+            raise exceptions.HTTPError(f"{self.status_code} {self.reason} for url: {self.url}", response=self)
+
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"))
+
+
+class Connection:
+    """ An open HTTP/1.1 connection. """
+
+    __slots__ = ("reader", "writer", "idle_since", "written", "received")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = 0.0
+        self.written = False  # True once the current request was written completely
+        self.received = False  # True once any byte of the current response arrived
+
+    def close(self):
+        """ Close the connection without waiting for it. """
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    A pool of keep-alive HTTP/1.1 connections built on asyncio streams.
+
+    Connections are reused per host. The amount of open connections per host is limited,
+    further requests wait until a connection is released.
+    A pool belongs to the event loop it is used in first. When it is used in a new loop,
+    the connections of the old loop are dropped.
+    """
+
+    def __init__(
+            self,
+            limit_per_host: int = 100,
+            keepalive_timeout: float = 30.0,
+            connect_timeout: float = 10.0,
+            ssl_context: ssl.SSLContext = None
+    ):
+        """
+        Instantiate a new ConnectionPool.
+
+        :param limit_per_host: holds the maximum amount of open connections per host
+        :param keepalive_timeout: holds the time in seconds an idle connection is kept open
+        :param connect_timeout: holds the time in seconds to wait for a connection to be established
+        :param ssl_context: holds an optional ssl context for https connections
+        """
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.ssl_context = ssl_context
+        self.metrics = PoolMetrics()
+        self._loop = None
+        self._idle: Dict[Tuple[str, str, int], Deque[Connection]] = {}
+        self._limits: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+
+    def _bind(self):
+        """ Drop the state of another event loop. """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = {}
+            self._limits = {}
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Union[Connection, None]:
+        """
+        :param key: holds the scheme, host and port
+        :return: an idle connection to the host or None if there is none
+        """
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            connection = idle.pop()
+            if now - connection.idle_since < self.keepalive_timeout and not connection.reader.at_eof():
+                return connection
+            connection.close()
+            self.metrics.record_expired()
+        return None
+
+    def _release(self, key: Tuple[str, str, int], connection: Connection):
+        """
+        Put a connection back to the idle connections of its host.
+
+        :param key: holds the scheme, host and port
+        :param connection: holds the connection
+        """
+        connection.idle_since = time.monotonic()
+        self._idle.setdefault(key, deque()).append(connection)
+
+    async def _connect(self, key: Tuple[str, str, int]) -> Connection:
+        """
+        Open a new connection.
+
+        :param key: holds the scheme, host and port
+        :return: the connection
+        :raises: a requests ConnectTimeout or ConnectionError if the host could not be reached
+        """
+        scheme, host, port = key
+        ssl_context = (self.ssl_context or ssl.create_default_context()) if scheme == "https" else None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_context),
+                self.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            raise exceptions.ConnectTimeout(f"Connecting to {host}:{port} timed out")
+        except OSError as e:
+            raise exceptions.ConnectionError(f"Connecting to {host}:{port} failed: {e}")
+        return Connection(reader, writer)
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            headers: Dict[str, str] = None,
+            body: bytes = b"",
+            timeout: float = None,
+            idempotent: bool = None
+    ) -> HTTPResponse:
+        """
+        Send a request over a pooled connection.
+        A reused connection that was closed by the server in the meantime is replaced once, as long as no byte of
+        a response arrived on it. Requests that are not idempotent are only sent again if they were not written
+        completely, since the server might have executed them already.
+
+        :param method: holds the HTTP method
+        :param url: holds the url
+        :param headers: holds the request headers
+        :param body: holds the request body
+        :param timeout: holds the time in seconds to wait for the response. None means forever.
+        :param idempotent: holds True if sending the request twice does no harm. None decides by the method.
+        :return: the response
+        :raises: a requests RequestException if the request failed
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        self._bind()
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        host = parts.netloc.rsplit("@", 1)[-1]
+        head = f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+        for name, value in (headers or {}).items():
+            head += f"{name}: {value}\r\n"
+        message = (head + "\r\n").encode("latin-1") + body
+
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.limit_per_host)
+        async with limit:
+            connection = self._acquire(key)
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = await self._connect(key)
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, method, url, message), timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    connection.close()
+                    if reused and not connection.received and (idempotent or not connection.written):
+                        # the server closed the idle connection before answering, so try once more with a new one
+                        connection, reused = None, False
+                        continue
+                    raise exceptions.ConnectionError(f"Connection to {key[1]}:{port} failed: {e}")
+                except asyncio.TimeoutError:
+                    connection.close()
+                    raise exceptions.ReadTimeout(f"Request to {url} timed out after {timeout} seconds")
+                except BaseException:
+                    connection.close()
+                    raise
+                break
+            self.metrics.record_request(not reused)
+
+        if keep_alive:
+            self._release(key, connection)
+        else:
+            connection.close()
+        logger.debug(f"{response.status_code} - {method} - {url}")
+        return response
+
+    @staticmethod
+    async def _exchange(connection: Connection, method: str, url: str, message: bytes) -> Tuple[HTTPResponse, bool]:
+        """
+        Write a request and read its response.
+
+        :param connection: holds the connection
+        :param method: holds the HTTP method
+        :param url: holds the url
+        :param message: holds the encoded request
+        :return: the response and True if the connection can be reused
+        """
+        reader = connection.reader
+        connection.written = connection.received = False
+        connection.writer.write(message)
+        await connection.writer.drain()
+        connection.written = True
+
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("The server closed the connection")
+            connection.received = True
+            version, status, *reason = status_line.decode("latin-1").split(" ", 2)
+            status_code = int(status)
+            headers = CaseInsensitiveDict()
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip()] = value.strip()
+            if not 100 <= status_code < 200 or status_code == 101:
+                break  # interim responses like 100 Continue are followed by the final one
+
+        connection_header = headers.get("Connection", "").lower()
+        keep_alive = connection_header != "close" if version == "HTTP/1.1" else connection_header == "keep-alive"
+        if status_code == 101:
+            keep_alive = False  # the connection speaks another protocol from now on
+        if method == "HEAD" or status_code in (101, 204, 304):
+            content = b""  # these responses never have a body, whatever their headers say
+        elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+            content = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass  # skip trailers
+                    break
+                content += await reader.readexactly(size)
+                await reader.readexactly(2)
+            content = bytes(content)
+        elif "Content-Length" in headers:
+            content = await reader.readexactly(int(headers["Content-Length"]))
+        else:
+            content = await reader.read()
+            keep_alive = False
+
+        encoding = headers.get("Content-Encoding", "").lower() if content else ""
+        if encoding == "gzip":
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            content = zlib.decompress(content)
+        return HTTPResponse(url, status_code, reason[0].strip() if reason else "", headers, content), keep_alive
+
+    async def close(self):
+        """ Close all idle connections. """
+        for idle in self._idle.values():
+            while idle:
+                connection = idle.pop()
+                connection.close()
+                try:
+                    await connection.writer.wait_closed()
+                except (ConnectionError, OSError):
+                    pass
+        self._idle = {}
@@ -1,14 +1,190 @@
-from typing import Dict
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
 
 from requests import Session
 
 from graphy.logger import logger
+from graphy.stream import JsonStream, decode_chunks
 
+FULL_PROFILE = "full"  # everything including descriptions, deprecations and directives
+MINIMAL_PROFILE = "minimal"  # only what is needed for building queries
+LAZY_PROFILE = "lazy"  # only the root operation types, everything else is requested on demand
 
-def request_schema(endpoint: str, session: Session) -> Dict:
+TYPE_REF_FRAGMENT = """
+fragment TypeRef on __Type {
+  kind
+  name
+  ofType {
+    kind
+    name
+    ofType {
+      kind
+      name
+      ofType {
+        kind
+        name
+        ofType {
+          kind
+          name
+          ofType {
+            kind
+            name
+            ofType {
+              kind
+              name
+              ofType {
+                kind
+                name
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+FULL_TYPE_FRAGMENTS = """
+fragment FullType on __Type {
+  kind
+  name
+  description
+  fields(includeDeprecated: true) {
+    name
+    description
+    args {
+      ...InputValue
+    }
+    type {
+      ...TypeRef
+    }
+    isDeprecated
+    deprecationReason
+  }
+  inputFields {
+    ...InputValue
+  }
+  interfaces {
+    ...TypeRef
+  }
+  enumValues(includeDeprecated: true) {
+    name
+    description
+    isDeprecated
+    deprecationReason
+  }
+  possibleTypes {
+    ...TypeRef
+  }
+}
+
+fragment InputValue on __InputValue {
+  name
+  description
+  type { ...TypeRef }
+  defaultValue
+}
+""" + TYPE_REF_FRAGMENT
+
+MINIMAL_TYPE_FRAGMENTS = """
+fragment FullType on __Type {
+  kind
+  name
+  fields(includeDeprecated: true) {
+    name
+    args {
+      ...InputValue
+    }
+    type {
+      ...TypeRef
+    }
+  }
+  inputFields {
+    ...InputValue
+  }
+  enumValues(includeDeprecated: true) {
+    name
+  }
+}
+
+fragment InputValue on __InputValue {
+  name
+  type { ...TypeRef }
+  defaultValue
+}
+""" + TYPE_REF_FRAGMENT
+
+INTROSPECTION_QUERY = """
+query IntrospectionQuery {
+  __schema {
+    queryType { name }
+    mutationType { name }
+    subscriptionType { name }
+    types {
+      ...FullType
+    }
+    directives {
+      name
+      description
+      locations
+      args {
+        ...InputValue
+      }
+    }
+  }
+}
+""" + FULL_TYPE_FRAGMENTS
+
+MINIMAL_INTROSPECTION_QUERY = """
+query IntrospectionQuery {
+  __schema {
+    queryType { name }
+    mutationType { name }
+    subscriptionType { name }
+    types {
+      ...FullType
+    }
+  }
+}
+""" + MINIMAL_TYPE_FRAGMENTS
+
+LAZY_INTROSPECTION_QUERY = """
+query IntrospectionQuery {
+  __schema {
+    queryType { name }
+    mutationType { name }
+    subscriptionType { name }
+  }
+}
+"""
+
+INTROSPECTION_QUERIES = {
+    FULL_PROFILE: INTROSPECTION_QUERY,
+    MINIMAL_PROFILE: MINIMAL_INTROSPECTION_QUERY,
+    LAZY_PROFILE: LAZY_INTROSPECTION_QUERY
+}
+
+
+def introspection_query(profile: str = FULL_PROFILE) -> str:
+    """
+    Return the introspection query for an introspection profile.
+
+    :param profile: holds the profile. One of "full", "minimal" or "lazy".
+    :return: the query string
+    :raises: ValueError for unknown profiles
+    """
+    try:
+        return INTROSPECTION_QUERIES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown introspection profile '{profile}'. Use one of {', '.join(INTROSPECTION_QUERIES)}")
+
+
+def request_schema(endpoint: str, session: Session, profile: str = FULL_PROFILE) -> Dict:
     """
     Makes a schema introspection and returns the resulting schema.
-    The current query looks as following:
+    The minimal profile leaves out descriptions, deprecations, interfaces and directives.
+    The lazy profile only requests the root operation type names, see request_types() for the rest.
+    The query of the full profile looks as following:
 
     query IntrospectionQuery {
       __schema {
@@ -104,112 +280,131 @@ def request_schema(endpoint: str, session: Session) -> Dict:
 
     :param endpoint: holds the servers endpoint -> http://...
     :param session: holds the session object to use
+    :param profile: holds the introspection profile. One of "full", "minimal" or "lazy".
     :return: The dictionary with the schema
     :raises: a RequestException if the schema could not be received.
     """
-    variables = {}
-    operation_name = "IntrospectionQuery"
-    query = """
-        query IntrospectionQuery {
-          __schema {
-            queryType { name }
-            mutationType { name }
-            subscriptionType { name }
-            types {
-              ...FullType
-            }
-            directives {
-              name
-              description
-              locations
-              args {
-                ...InputValue
-              }
-            }
-          }
+    introspection_response = session.post(
+        endpoint,
+        json={
+            "query": introspection_query(profile),
+            "operationName": "IntrospectionQuery",
+            "variables": {}
         }
+    )
+    logger.debug(f"SCHEMA INTROSPECTION - {introspection_response.status_code} - POST - {endpoint}")
+    introspection_response.raise_for_status()
+    return introspection_response.json()
 
-        fragment FullType on __Type {
-          kind
-          name
-          description
-          fields(includeDeprecated: true) {
-            name
-            description
-            args {
-              ...InputValue
-            }
-            type {
-              ...TypeRef
-            }
-            isDeprecated
-            deprecationReason
-          }
-          inputFields {
-            ...InputValue
-          }
-          interfaces {
-            ...TypeRef
-          }
-          enumValues(includeDeprecated: true) {
-            name
-            description
-            isDeprecated
-            deprecationReason
-          }
-          possibleTypes {
-            ...TypeRef
-          }
-        }
 
-        fragment InputValue on __InputValue {
-          name
-          description
-          type { ...TypeRef }
-          defaultValue
-        }
+def request_schema_stream(
+        endpoint: str,
+        session: Session,
+        chunk_size: int = 65536,
+        profile: str = FULL_PROFILE
+) -> Iterator[str]:
+    """
+    Makes a schema introspection like request_schema() but does not read the response body right away.
+    The request itself is made immediately, so connection errors are raised by this function.
 
-        fragment TypeRef on __Type {
-          kind
-          name
-          ofType {
-            kind
-            name
-            ofType {
-              kind
-              name
-              ofType {
-                kind
-                name
-                ofType {
-                  kind
-                  name
-                  ofType {
-                    kind
-                    name
-                    ofType {
-                      kind
-                      name
-                      ofType {
-                        kind
-                        name
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        """
+    :param endpoint: holds the servers endpoint -> http://...
+    :param session: holds the session object to use
+    :param chunk_size: holds the size of the chunks the body is read in
+    :param profile: holds the introspection profile. One of "full", "minimal" or "lazy".
+    :return: an iterator over the decoded chunks of the response body
+    :raises: a RequestException if the schema could not be received.
+    """
     introspection_response = session.post(
+        endpoint,
+        json={
+            "query": introspection_query(profile),
+            "operationName": "IntrospectionQuery",
+            "variables": {}
+        },
+        stream=True
+    )
+    logger.debug(f"SCHEMA INTROSPECTION - {introspection_response.status_code} - POST (STREAM) - {endpoint}")
+    introspection_response.raise_for_status()
+    return decode_chunks(
+        introspection_response.iter_content(chunk_size=chunk_size),
+        introspection_response.encoding or "UTF-8"
+    )
+
+
+def request_types(
+        endpoint: str,
+        session: Session,
+        names: Iterable[str],
+        response_key: str = "data"
+) -> Dict[str, Union[Dict, None]]:
+    """
+    Request single types by their names via __type(name:) queries.
+    All names are requested at once with one aliased field per name:
+
+    query TypeQuery($t0: String!, $t1: String!) {
+      t0: __type(name: $t0) { ...FullType }
+      t1: __type(name: $t1) { ...FullType }
+    }
+
+    The FullType fragment is the one of the minimal profile.
+
+    :param endpoint: holds the servers endpoint -> http://...
+    :param session: holds the session object to use
+    :param names: holds the names of the types to request
+    :param response_key: holds the key of the response data
+    :return: a dictionary with the names as keys and the raw types or None for unknown types as values
+    :raises: a RequestException if the types could not be received.
+    """
+    names = list(names)
+    if not names:
+        return {}
+    aliases = {f"t{index}": name for index, name in enumerate(names)}
+    params = ", ".join(f"${alias}: String!" for alias in aliases)
+    selections = "\n".join(f"  {alias}: __type(name: ${alias}) {{ ...FullType }}" for alias in aliases)
+    query = f"query TypeQuery({params}) {{\n{selections}\n}}\n" + MINIMAL_TYPE_FRAGMENTS
+    type_response = session.post(
         endpoint,
         json={
             "query": query,
-            "operationName": operation_name,
-            "variables": variables
+            "operationName": "TypeQuery",
+            "variables": aliases
         }
     )
-    logger.debug(f"SCHEMA INTROSPECTION - {introspection_response.status_code} - POST - {endpoint}")
-    introspection_response.raise_for_status()
-    return introspection_response.json()
+    logger.debug(f"TYPE INTROSPECTION - {type_response.status_code} - POST - {endpoint} - {', '.join(names)}")
+    type_response.raise_for_status()
+    data = type_response.json().get(response_key) or {}
+    return {name: data.get(alias) for alias, name in aliases.items()}
+
+
+def iter_schema(chunks: Iterable[str], response_key: str = "data") -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally parse an introspection response.
+    Every schema type and directive is yielded on its own as soon as it has been read,
+    so the whole response is never held in memory at once.
+
+    The yielded events are tuples of a key and the raw value:
+    ("type", {...}) for every type, ("directive", {...}) for every directive and
+    (key, value) for all other members of "__schema" like ("queryType", {"name": "Query"}).
+    Top level members besides the data like "errors" are yielded as (key, value) as well.
+
+    :param chunks: holds an iterable of text chunks of the response body
+    :param response_key: holds the key of the response data
+    :return: an iterator over the parsed events
+    """
+    stream = JsonStream(chunks)
+    for key in stream.keys():
+        if key != response_key or stream.peek() != "{":
+            yield key, stream.value()
+            continue
+        for data_key in stream.keys():
+            if data_key != "__schema" or stream.peek() != "{":
+                stream.value()
+                continue
+            for schema_key in stream.keys():
+                if schema_key in ("types", "directives") and stream.peek() == "[":
+                    event = schema_key[:-1]
+                    for _ in stream.elements():
+                        yield event, stream.value()
+                else:
+                    yield schema_key, stream.value()
+    stream.finish()
@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, Set, Union
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED = "PersistedQueryNotSupported"
+
+# markers that are searched in the raw body before it is decoded
+ERROR_MARKERS = (b"PersistedQuery", b"PERSISTED_QUERY")
+
+
+@lru_cache(maxsize=1024)
+def query_hash(query: str) -> str:
+    """
+    :param query: holds the query document
+    :return: the sha256 hex digest of the document as used by automatic persisted queries
+    """
+    return hashlib.sha256(query.encode("UTF-8")).hexdigest()
+
+
+class PersistedQueries:
+    """
+    Automatic persisted queries send the hash of a query document instead of the document itself.
+
+    A document is sent by its hash first. If the server does not know the hash yet, the request is repeated
+    with the full document, which registers it at the server. Which documents are registered at which endpoint
+    is remembered, and endpoints that do not support persisted queries get the full document right away.
+
+    A PersistedQueries instance can be shared between transporters.
+    """
+
+    def __init__(self, optimistic: bool = True):
+        """
+        Instantiate new PersistedQueries without any registered documents.
+
+        :param optimistic: True if unknown documents should be sent by their hash first, because other clients
+        might have registered them already. If False they are sent in full once, which saves a round trip.
+        """
+        self.optimistic = optimistic
+        self._registered: Dict[str, Set[str]] = {}
+        self._unsupported: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def is_registered(self, endpoint: str, document_hash: str) -> bool:
+        """
+        :param endpoint: holds the endpoint url
+        :param document_hash: holds the hash of a document
+        :return: True if the document is known to be registered at the endpoint
+        """
+        return document_hash in self._registered.get(endpoint, ())
+
+    def is_supported(self, endpoint: str) -> bool:
+        """
+        :param endpoint: holds the endpoint url
+        :return: False if the endpoint told us that it does not support persisted queries
+        """
+        return endpoint not in self._unsupported
+
+    def register(self, endpoint: str, document_hash: str):
+        """
+        Remember that a document is registered at an endpoint.
+
+        :param endpoint: holds the endpoint url
+        :param document_hash: holds the hash of the document
+        """
+        with self._lock:
+            self._registered.setdefault(endpoint, set()).add(document_hash)
+
+    def forget(self, endpoint: str, document_hash: str):
+        """
+        Forget a document, for example because the server evicted it.
+
+        :param endpoint: holds the endpoint url
+        :param document_hash: holds the hash of the document
+        """
+        with self._lock:
+            self._registered.get(endpoint, set()).discard(document_hash)
+
+    def payload(self, endpoint: str, query: str, variables: Dict) -> Dict:
+        """
+        Build the payload of a first attempt.
+
+        :param endpoint: holds the endpoint url
+        :param query: holds the query document
+        :param variables: holds the variables
+        :return: a payload with the hash only or with the full document if the endpoint does not support hashes
+        """
+        if not self.is_supported(endpoint):
+            return {"query": query, "variables": variables}
+        document_hash = query_hash(query)
+        payload = {
+            "variables": variables,
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": document_hash}}
+        }
+        if not self.optimistic and not self.is_registered(endpoint, document_hash):
+            payload["query"] = query
+        return payload
+
+    def retry_payload(self, endpoint: str, query: str, variables: Dict, payload: Dict, response) -> Union[Dict, None]:
+        """
+        Check the response of an attempt and build the payload of a second one if it is necessary.
+        Documents that were accepted with a successful response are registered.
+
+        :param endpoint: holds the endpoint url
+        :param query: holds the query document
+        :param variables: holds the variables
+        :param payload: holds the payload of the attempt
+        :param response: holds the response of the attempt
+        :return: the payload to send again or None if the response can be used
+        """
+        extensions = payload.get("extensions")
+        if extensions is None:
+            return None
+        document_hash = extensions["persistedQuery"]["sha256Hash"]
+        error = self.error(response)
+        if error is None:
+            if response.ok:
+                self.register(endpoint, document_hash)
+            return None
+        if "query" in payload:
+            return None  # the full document was sent already, so the error is the servers final answer
+        if error == PERSISTED_QUERY_NOT_SUPPORTED:
+            with self._lock:
+                self._unsupported.add(endpoint)
+            return {"query": query, "variables": variables}
+        self.forget(endpoint, document_hash)
+        return {"query": query, "variables": variables, "extensions": extensions}
+
+    @staticmethod
+    def error(response) -> Union[str, None]:
+        """
+        Find a persisted query error in a response. The body is only decoded if it mentions persisted queries.
+
+        :param response: holds the response
+        :return: PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED or None
+        """
+        content = response.content
+        if not any(marker in content for marker in ERROR_MARKERS):
+            return None
+        try:
+            errors = response.json().get("errors") or ()
+        except ValueError:
+            return None
+        for error in errors:
+            message = error.get("message")
+            code = (error.get("extensions") or {}).get("code")
+            if message == PERSISTED_QUERY_NOT_FOUND or code == "PERSISTED_QUERY_NOT_FOUND":
+                return PERSISTED_QUERY_NOT_FOUND
+            if message == PERSISTED_QUERY_NOT_SUPPORTED or code == "PERSISTED_QUERY_NOT_SUPPORTED":
+                return PERSISTED_QUERY_NOT_SUPPORTED
+        return None
@@ -0,0 +1,178 @@
+import threading
+import time
+from typing import Dict
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+
+
+class PoolMetrics:
+    """
+    Counters of a connection pool which help to size it.
+
+    A low reuse rate or many discarded connections mean the pool is too small for the amount of parallel requests.
+    """
+
+    def __init__(self):
+        """ Instantiate new PoolMetrics with all counters at zero. """
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.discarded_connections = 0
+        self.expired_connections = 0
+
+    def record_request(self, new_connection: bool):
+        """
+        Count a request.
+
+        :param new_connection: True if the request needs a new connection instead of reusing one
+        """
+        with self._lock:
+            self.requests += 1
+            if new_connection:
+                self.new_connections += 1
+
+    def record_discarded(self):
+        """ Count a connection that was closed because the pool was full. """
+        with self._lock:
+            self.discarded_connections += 1
+
+    def record_expired(self):
+        """ Count a connection that was closed because it was idle for too long. """
+        with self._lock:
+            self.expired_connections += 1
+
+    @property
+    def reused_connections(self) -> int:
+        """
+        :return: the amount of requests that reused an open connection
+        """
+        return self.requests - self.new_connections
+
+    @property
+    def reuse_rate(self) -> float:
+        """
+        :return: the share of requests that reused an open connection. 0.0 if there were no requests yet.
+        """
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        :return: all counters and the reuse rate
+        """
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "discarded_connections": self.discarded_connections,
+            "expired_connections": self.expired_connections,
+            "reuse_rate": self.reuse_rate
+        }
+
+    def reset(self):
+        """ Set all counters back to zero. """
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+            self.discarded_connections = 0
+            self.expired_connections = 0
+
+
+class MeteredPoolMixin:
+    """
+    Counts the connections a urllib3 connection pool hands out and closes connections that were idle for too long.
+    """
+
+    metrics: PoolMetrics = None
+    idle_timeout: float = None
+
+    def _get_conn(self, timeout=None):
+        connection = super(MeteredPoolMixin, self)._get_conn(timeout)
+        released = getattr(connection, "graphy_released", None)
+        if released is not None and self.idle_timeout is not None \
+                and time.monotonic() - released > self.idle_timeout and connection.sock is not None:
+            connection.close()  # it is connected again when it is used
+            if self.metrics is not None:
+                self.metrics.record_expired()
+        if self.metrics is not None:
+            self.metrics.record_request(connection.sock is None)
+        return connection
+
+    def _put_conn(self, connection):
+        if connection is not None:
+            connection.graphy_released = time.monotonic()
+            if self.metrics is not None and self.pool is not None and self.pool.full():
+                self.metrics.record_discarded()
+        super(MeteredPoolMixin, self)._put_conn(connection)
+
+
+class MeteredHTTPConnectionPool(MeteredPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class MeteredHTTPSConnectionPool(MeteredPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class MeteredPoolManager(PoolManager):
+    """ A urllib3 pool manager whose connection pools share one PoolMetrics and an idle timeout. """
+
+    def __init__(self, *args, metrics: PoolMetrics = None, idle_timeout: float = None, **kwargs):
+        super(MeteredPoolManager, self).__init__(*args, **kwargs)
+        self.metrics = metrics
+        self.idle_timeout = idle_timeout
+        self.pool_classes_by_scheme = {"http": MeteredHTTPConnectionPool, "https": MeteredHTTPSConnectionPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super(MeteredPoolManager, self)._new_pool(scheme, host, port, request_context)
+        pool.metrics = self.metrics
+        pool.idle_timeout = self.idle_timeout
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    A requests adapter with a configurable keep-alive connection pool and metrics about its use.
+
+    session.mount("https://", PooledHTTPAdapter(pool_maxsize=50, idle_timeout=30))
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["idle_timeout"]
+
+    def __init__(
+            self,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            max_retries=0,
+            pool_block: bool = False,
+            idle_timeout: float = None,
+            metrics: PoolMetrics = None
+    ):
+        """
+        Instantiate a new PooledHTTPAdapter.
+
+        :param pool_connections: holds the amount of hosts a pool is kept for
+        :param pool_maxsize: holds the maximum amount of connections that are kept open per host
+        :param max_retries: holds the amount of retries or a urllib3 Retry object
+        :param pool_block: True if requests should wait for a free connection instead of opening an extra one
+        :param idle_timeout: holds the time in seconds after which an idle connection is not reused. None means never.
+        :param metrics: holds optional metrics to count into. New ones are created otherwise.
+        """
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics or PoolMetrics()
+        super(PooledHTTPAdapter, self).__init__(pool_connections, pool_maxsize, max_retries, pool_block)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        if not hasattr(self, "metrics"):
+            self.metrics = PoolMetrics()  # metrics are not pickled
+        self.poolmanager = MeteredPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            metrics=self.metrics,
+            idle_timeout=self.idle_timeout,
+            **pool_kwargs
+        )
@@ -1,15 +1,20 @@
+import asyncio
 import itertools
 import json
 import uuid
-from typing import Dict, Iterable, Tuple, Callable
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
 from websockets import connect
 
 from graphy import helpers
+from graphy.batch import BatchLoader, BulkMutation, BulkResult
 from graphy.builder import GraphQLBuilder
-from graphy.builder import SelectedField
+from graphy.builder import SelectedField, selection_key
+from graphy.cache import MISS
+from graphy.entities import add_identity_fields
 from graphy.logger import logger
 from graphy.schema import Operation
+from graphy.utils import canonical_json
 
 
 class OperationProxy:
@@ -20,6 +25,8 @@ class OperationProxy:
     Use it's sub classes instead.
     """
 
+    operation_type: str = None
+
     def __init__(self, client, operation: Operation):
         """
         Instantiate a new OperationProxy instance
@@ -34,10 +41,107 @@ class OperationProxy:
         """ Shortcut for the operations name """
         return self.operation.name
 
+    def document(self, kind: str, select: Tuple[SelectedField], variables: Dict, build: Callable[[], str]) -> str:
+        """
+        Return the query document for a call and only build it if the clients query cache has none yet.
+        Documents are keyed by operation, selection shape and the names of the variables,
+        so the values of the variables can change without building the document again.
+
+        :param kind: holds the operation kind
+        :param select: holds the selection as passed by the caller. None for the automatic selection.
+        :param variables: holds the variables
+        :param build: holds a callable building the document
+        :return: the query document
+        """
+        cache = getattr(self.client, "query_cache", None)
+        if cache is None:
+            return build()
+        key = (
+            kind,
+            self.name,
+            selection_key(select),
+            frozenset(variables) if variables is not None else None,
+            self.client.schema.generation
+        )
+        query_string = cache.get(key)
+        if query_string is None:
+            query_string = build()
+            cache.put(key, query_string)
+        return query_string
+
+    def batch_document(self, select: Tuple[SelectedField], variables: List[Dict]) -> Tuple[str, Dict, List[str]]:
+        """
+        Build one document calling the operation for every set of variables, see helpers.aliased_document().
+
+        :param select: holds the selection as passed by the caller. None for the automatic selection.
+        :param variables: holds the variables of every call
+        :return: the document, the merged variables and the aliases of the calls
+        """
+        if select is None and not self.client.settings.disable_selection_lookup:
+            select = self.operation.get_return_fields(self.client.schema.types)
+        return helpers.aliased_document(self.operation, self.operation_type, select, variables)
+
+    def entity_cache(self):
+        """
+        :return: the entity cache of the client or None if there is none or raw responses are returned
+        """
+        entities = getattr(self.client, "entity_cache", None)
+        if entities is None or self.client.settings.return_requests_response:
+            return None
+        return entities
+
+    def identified(self, select: Tuple[SelectedField] = None) -> Union[Tuple[SelectedField], None]:
+        """
+        Return the selection with __typename and id fields added for the clients entity cache.
+        The identified selections are kept in the clients identity cache.
+
+        :param select: holds the selection as passed by the caller. None for the automatic selection.
+        :return: the identified selection or None if there is no selection
+        """
+        if select is None:
+            if self.client.settings.disable_selection_lookup:
+                return None
+            select = self.operation.get_return_fields(self.client.schema.types)
+            if select is None:
+                return None
+        cache = getattr(self.client, "identity_cache", None)
+        key = (self.name, selection_key(select), self.client.schema.generation)
+        identified = cache.get(key) if cache is not None else None
+        if identified is None:
+            identified = add_identity_fields(
+                select,
+                helpers.find_defer_name_recursively(self.operation.return_type),
+                helpers.field_type_resolver(self.client.schema.types)
+            )
+            if cache is not None:
+                cache.put(key, identified)
+        return identified
+
+    def remember(self, result, operation: Union[str, None], variables: Dict, select: Tuple[SelectedField]):
+        """
+        Store the result of a request in the clients entity cache once it is available.
+
+        :param result: holds the result of the transporter
+        :param operation: holds the operation name for queries. None for mutations.
+        :param variables: holds the variables
+        :param select: holds the identified selection
+        :return: the result in the form of the transporter
+        """
+        entities = self.client.entity_cache
+        matcher = helpers.fragment_matcher(self.client.schema.types)
+
+        def store(value):
+            entities.write(operation, variables, select, value, matcher)
+            return value
+
+        return self.client.transporter.then(result, store)
+
     def __call__(self, query: str, variables: Dict = None, *args, **kwargs):
         """
         The call makes the actual request to the endpoint.
         The result depends on the settings and transport in use.
+        Queries are answered from the clients response cache if it holds their result.
+        Identical queries that are sent at the same time share one request if the client coalesces requests.
 
         :param query: holds the query string
         :param variables: holds a dictionary of variables that will be passed by as well
@@ -47,13 +151,40 @@ class OperationProxy:
         :return: the result depending on settings and transport in use.
         """
         variables = variables or {}
-        return self.client.transporter.post(
-            self.client.endpoint,
-            query,
-            variables,
-            self.name,
-            self.operation.settings
-        )
+        transporter = self.client.transporter
+        cache = getattr(self.client, "response_cache", None)
+        key = None
+        if cache is not None and self.operation_type == "query" and not self.client.settings.return_requests_response:
+            key = cache.key(self.name, query, variables, self.client.endpoint)
+        if key is not None:
+            value = cache.get(key)
+            if value is not MISS:
+                return transporter.resolved(value)
+
+        def post():
+            return transporter.post(
+                self.client.endpoint,
+                query,
+                variables,
+                self.name,
+                self.client.settings,
+                operation_type=self.operation_type
+            )
+
+        flight = getattr(self.client, "single_flight", None)
+        flight_key = None
+        if flight is not None and self.operation_type == "query":
+            canonical = canonical_json(variables)
+            flight_key = (self.client.endpoint, query, canonical) if canonical is not None else None
+        result = transporter.coalesce(flight, flight_key, post) if flight_key is not None else post()
+        if key is None:
+            return result
+
+        def store(value):
+            cache.put(key, value)
+            return value
+
+        return transporter.then(result, store)
 
 
 class ServiceProxy:
@@ -110,6 +241,8 @@ class QueryOperationProxy(OperationProxy):
     I'm open for any suggestions and improvements.
     """
 
+    operation_type = "query"
+
     def __call__(self, select: Tuple[SelectedField] = None, where: Dict = None, *args, **kwargs):
         """
         This method is used to build the query request.
@@ -119,6 +252,7 @@ class QueryOperationProxy(OperationProxy):
         If the automatic lookup fails it will fallback to None.
 
         Then a query builder will be instantiated and optional variables as well as the fields are being set.
+        The built document is kept in the clients query cache, so calls of the same shape skip this step.
 
         Finally the request will be made and the result returned.
 
@@ -128,7 +262,56 @@ class QueryOperationProxy(OperationProxy):
         :param kwargs: holds additional key word arguments
         :return: the result from the transporter
         """
-        if select is None and not self.operation.settings.disable_selection_lookup:
+        entities = self.entity_cache()
+        if entities is not None:
+            select = self.identified(select)
+            if select is None:
+                entities = None  # nothing to normalize
+        if entities is not None:
+            value = entities.read(
+                self.name,
+                where,
+                select,
+                helpers.find_defer_name_recursively(self.operation.return_type),
+                helpers.fragment_matcher(self.client.schema.types)
+            )
+            if value is not MISS:
+                return self.client.transporter.resolved(value)
+
+        query_string = self.document("query", select, where, lambda: self.build(select, where))
+        result = super(QueryOperationProxy, self).__call__(query=query_string, variables=where, *args, **kwargs)
+        if entities is None:
+            return result
+        return self.remember(result, self.name, where, select)
+
+    def loader(
+            self,
+            select: Tuple[SelectedField] = None,
+            window: float = 0.005,
+            max_batch_size: int = 50
+    ) -> BatchLoader:
+        """
+        Create a loader which sends the calls of this query that are made within a short time window together.
+
+        loader = client.query.user.loader(select=fields("id", "name"))
+        user = loader.load({"id": "1"})
+
+        :param select: holds the selection of every call
+        :param window: holds the time in seconds calls are collected for
+        :param max_batch_size: holds the maximum amount of calls that are sent together
+        :return: the loader
+        """
+        return BatchLoader(self, select, window, max_batch_size)
+
+    def build(self, select: Tuple[SelectedField] = None, where: Dict = None) -> str:
+        """
+        Build the query document.
+
+        :param select: holds a selection of all fields.
+        :param where: holds a dictionary with query conditions.
+        :return: the query string
+        """
+        if select is None and not self.client.settings.disable_selection_lookup:
             select = self.operation.get_return_fields(self.client.schema.types)
 
         query_builder = GraphQLBuilder()
@@ -141,8 +324,12 @@ class QueryOperationProxy(OperationProxy):
             query_builder = query_builder.operation("query").query(self.name)
 
         query_builder = query_builder.fields(select)
-        query_string = query_builder.generate()
-        return super(QueryOperationProxy, self).__call__(query=query_string, variables=where, *args, **kwargs)
+        if self.client.settings.extract_fragments:
+            query_builder = query_builder.extract_fragments(
+                helpers.find_defer_name_recursively(self.operation.return_type),
+                helpers.field_type_resolver(self.client.schema.types)
+            )
+        return query_builder.generate()
 
 
 class QueryServiceProxy(ServiceProxy):
@@ -165,6 +352,8 @@ class MutationOperationProxy(OperationProxy):
     I'm open for any suggestions and improvements.
     """
 
+    operation_type = "mutation"
+
     def __call__(self, select: Tuple[SelectedField] = None, data: Dict = None, *args, **kwargs):
         """
         This method is used to build the mutation request.
@@ -173,6 +362,7 @@ class MutationOperationProxy(OperationProxy):
         Please specify the fields yourself if necessary.
 
         Then a query builder will be instantiated and necessary variables as well as the fields are being set.
+        The built document is kept in the clients query cache, so calls of the same shape skip this step.
 
         Finally the request will be made and the result returned.
 
@@ -185,7 +375,53 @@ class MutationOperationProxy(OperationProxy):
         if data is None:
             raise ValueError("No Data specified")
 
-        if select is None and not self.operation.settings.disable_selection_lookup:
+        entities = self.entity_cache()
+        if entities is not None:
+            select = self.identified(select)
+            if select is None:
+                entities = None  # nothing to normalize
+
+        query_string = self.document("mutation", select, data, lambda: self.build(select, data))
+        result = super(MutationOperationProxy, self).__call__(query=query_string, variables=data, *args, **kwargs)
+        if entities is None:
+            return result
+        return self.remember(result, None, data, select)
+
+    def bulk(
+            self,
+            data: Iterable[Dict],
+            select: Tuple[SelectedField] = None,
+            chunk_size: int = 50,
+            concurrency: int = 4
+    ) -> Union[Iterator[BulkResult], AsyncIterator[BulkResult]]:
+        """
+        Call the mutation for every item of an iterable, see BulkMutation.
+
+        for result in client.mutation.createUser.bulk({"name": name} for name in names):
+            print(result.index, result.data if result.ok else result.error)
+
+        :param data: holds the variables of every call. It is read lazily.
+        :param select: holds the selection of every call
+        :param chunk_size: holds the amount of calls per document
+        :param concurrency: holds the maximum amount of documents that are sent at the same time
+        :return: an iterator over the results in input order. An async iterator for async transporters.
+        """
+        if self.entity_cache() is not None:
+            select = self.identified(select)
+        bulk = BulkMutation(self, select, chunk_size, concurrency)
+        if asyncio.iscoroutinefunction(self.client.transporter.post):
+            return bulk.run_async(data)
+        return bulk.run(data)
+
+    def build(self, select: Tuple[SelectedField] = None, data: Dict = None) -> str:
+        """
+        Build the mutation document.
+
+        :param select: holds a selection of all fields.
+        :param data: holds a dictionary with the data to pass by
+        :return: the query string
+        """
+        if select is None and not self.client.settings.disable_selection_lookup:
             select = self.operation.get_return_fields(self.client.schema.types)
 
         query_builder = GraphQLBuilder()
@@ -194,8 +430,12 @@ class MutationOperationProxy(OperationProxy):
         query_builder = query_builder.query(self.name, params={key: f"${key}" for key in data.keys()})
 
         query_builder = query_builder.fields(select)
-        query_string = query_builder.generate()
-        return super(MutationOperationProxy, self).__call__(query=query_string, variables=data, *args, **kwargs)
+        if self.client.settings.extract_fragments:
+            query_builder = query_builder.extract_fragments(
+                helpers.find_defer_name_recursively(self.operation.return_type),
+                helpers.field_type_resolver(self.client.schema.types)
+            )
+        return query_builder.generate()
 
 
 class MutationServiceProxy(ServiceProxy):
@@ -244,7 +484,7 @@ class SubscriptionOperationProxy(OperationProxy):
         if self.client.ws_endpoint is None:
             raise ValueError("ws_endpoint is None. Please set the value manually in the client.")
 
-        if select is None and not self.operation.settings.disable_selection_lookup:
+        if select is None and not self.client.settings.disable_selection_lookup:
             select = self.operation.get_return_fields(self.client.schema.types)
 
         subscription_builder = GraphQLBuilder()
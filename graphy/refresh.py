@@ -0,0 +1,51 @@
+import threading
+import weakref
+from typing import Union
+
+from graphy.logger import logger
+
+
+class SchemaRefresher(threading.Thread):
+    """
+    A daemon thread that refreshes a schema periodically or whenever it is triggered.
+
+    The refresher only holds a weak reference to the schema and stops on its own once the schema is gone.
+    Failed refreshes are logged and the current schema is kept.
+    """
+
+    def __init__(self, schema, interval: Union[int, float]):
+        """
+        Instantiate a new SchemaRefresher.
+
+        :param schema: holds the schema to refresh
+        :param interval: holds the time in seconds between two refreshes
+        """
+        super(SchemaRefresher, self).__init__(name=f"graphy-schema-refresher-{schema.endpoint}", daemon=True)
+        self.interval = interval
+        self._schema = weakref.ref(schema)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def trigger(self):
+        """ Refresh the schema now instead of waiting for the interval. """
+        self._wake.set()
+
+    def stop(self):
+        """ Stop refreshing. A refresh that is currently running is finished. """
+        self._stopped.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            schema = self._schema()
+            if schema is None:
+                return
+            try:
+                schema.refresh()
+            except Exception as e:
+                logger.warning(f"Refreshing the schema of {schema.endpoint} failed: {e}")
+            del schema  # do not keep the schema alive while waiting
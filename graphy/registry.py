@@ -0,0 +1,97 @@
+import weakref
+from typing import Tuple, Union
+
+from graphy.cache import SchemaCache
+from graphy.concurrency import SingleFlight
+from graphy.schema import Schema
+from graphy.settings import Settings
+from graphy.transport import Transporter
+
+
+class SchemaRegistry:
+    """
+    A schema registry shares Schema instances between clients.
+
+    Clients for the same endpoint and the same schema relevant settings get the very same schema,
+    so it is introspected and held in memory only once per process.
+    The registry only holds weak references, a schema is dropped as soon as no client uses it anymore.
+    Concurrent first time constructions for the same key result in a single introspection.
+
+    Shared schemas introspect, fetch lazily requested types and refresh with the transporter of the registry,
+    never with the one of a client, so no client's session or credentials are used on behalf of the others.
+
+    registry = SchemaRegistry()
+    first = Client("https://foo.bar/", schema_registry=registry)
+    second = Client("https://foo.bar/", schema_registry=registry)  # first.schema is second.schema
+    """
+
+    def __init__(self, transporter: Transporter = None):
+        """
+        Instantiate a new empty SchemaRegistry
+
+        :param transporter: holds the transporter the shared schemas are introspected with.
+        A new Transporter without any client specific headers is used by default.
+        """
+        self.transporter: Transporter = transporter or Transporter()
+        self._schemas: "weakref.WeakValueDictionary[Tuple, Schema]" = weakref.WeakValueDictionary()
+        self._flight = SingleFlight()
+
+    def __len__(self) -> int:
+        """ Return the amount of schemas that are currently in use. """
+        return len(self._schemas)
+
+    @staticmethod
+    def key(endpoint: str, settings: Settings) -> Tuple:
+        """
+        Return the key a schema is shared under.
+        Besides the endpoint, it contains all settings that change how the schema is introspected and parsed.
+
+        :param endpoint: holds the endpoint url as a string
+        :param settings: holds the settings
+        :return: a hashable key
+        """
+        return (
+            endpoint,
+            settings.introspection_profile,
+            settings.keep_descriptions,
+            settings.stream_introspection,
+            settings.max_recursion_depth,
+            settings.default_response_key
+        )
+
+    def get(self, endpoint: str, settings: Settings, cache: SchemaCache = None) -> Schema:
+        """
+        Return the shared schema for the endpoint and create it if there is none yet.
+        The cache is only used when the schema has to be created.
+
+        :param endpoint: holds the endpoint url as a string
+        :param settings: holds the settings
+        :param cache: holds an optional schema cache
+        :return: the shared schema
+        """
+        key = self.key(endpoint, settings)
+        schema = self._schemas.get(key)
+        if schema is not None:
+            return schema
+        return self._flight.do(key, lambda: self._create(key, endpoint, settings, cache))
+
+    def _create(self, key: Tuple, endpoint: str, settings: Settings, cache: Union[SchemaCache, None]) -> Schema:
+        """
+        Create and register a new schema unless another flight registered one in the meantime.
+        """
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = Schema(endpoint, self.transporter, settings, cache)
+            self._schemas[key] = schema
+        return schema
+
+    def invalidate(self, endpoint: str = None):
+        """
+        Drop the shared schemas of an endpoint. Clients created afterwards introspect the schema again.
+        Existing clients keep their schema.
+
+        :param endpoint: holds the endpoint url as a string. None drops all schemas.
+        """
+        for key in list(self._schemas.keys()):
+            if endpoint is None or key[0] == endpoint:
+                self._schemas.pop(key, None)
@@ -1,9 +1,19 @@
-from typing import Dict, List, Tuple, Union
+import asyncio
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from requests import RequestException
 
 from graphy.builder import SelectedField
-from graphy.loaders import request_schema
+from graphy.cache import SchemaCache
+from graphy.loaders import (
+    FULL_PROFILE, LAZY_PROFILE, iter_schema, request_schema, request_schema_stream, request_types
+)
+from graphy.logger import logger
 from graphy.settings import Settings
 from graphy.transport import Transporter
+from graphy.utils import digest_chunks, hash_json, intern_string
 
 
 class OperationArgument:
@@ -11,6 +21,8 @@ class OperationArgument:
     Represents an operation argument.
     """
 
+    __slots__ = ("key", "_value", "required")
+
     def __init__(self, name: str, arg_type_name: str, is_required=False):
         """
         Instantiate a new OperationArgument
@@ -39,6 +51,8 @@ class Operation:
     Represents an operation that can be executed on the server.
     """
 
+    __slots__ = ("settings", "name", "description", "arguments", "return_type", "_return_fields")
+
     def __init__(self, field: "SchemaTypeField", settings: Settings):
         """
         Instantiate a new Operation.
@@ -79,15 +93,23 @@ class Directive:
     Represents a typed version of an schema directive
     """
 
-    def __init__(self, raw_directive: Dict):
+    __slots__ = ("name", "description", "locations", "args")
+
+    def __init__(self, raw_directive: Dict, keep_descriptions: bool = True, defers: "TypeDeferCache" = None):
         """
         Instantiate a new Directive
         :param raw_directive: holds the raw directive data
+        :param keep_descriptions: False if the description should be dropped
+        :param defers: holds an optional cache for sharing type defers
         """
-        self.name: str = raw_directive.get("name")
-        self.description: str = raw_directive.get("description")
-        self.locations: List[str] = raw_directive.get("locations", [])
-        self.args: Dict[str, Argument] = Schema.parse_arguments(raw_directive.get("args", []))
+        self.name: str = intern_string(raw_directive.get("name"))
+        self.description: str = raw_directive.get("description") if keep_descriptions else None
+        self.locations: Tuple[str] = tuple(intern_string(loc) for loc in raw_directive.get("locations") or [])
+        self.args: Dict[str, Argument] = Schema.parse_arguments(
+            raw_directive.get("args", []),
+            keep_descriptions,
+            defers
+        )
 
 
 class Argument:
@@ -95,14 +117,18 @@ class Argument:
     Represents a typed version of an query argument.
     """
 
-    def __init__(self, raw_arg: Dict):
+    __slots__ = ("name", "description", "type", "default_value")
+
+    def __init__(self, raw_arg: Dict, keep_descriptions: bool = True, defers: "TypeDeferCache" = None):
         """
         Instantiate a new Argument
         :param raw_arg: holds the raw argument data
+        :param keep_descriptions: False if the description should be dropped
+        :param defers: holds an optional cache for sharing type defers
         """
-        self.name = raw_arg.get("name")
-        self.description = raw_arg.get("description")
-        self.type = TypeDefer(raw_arg.get("type")) if raw_arg.get("type") is not None else None
+        self.name = intern_string(raw_arg.get("name"))
+        self.description = raw_arg.get("description") if keep_descriptions else None
+        self.type = TypeDefer.parse(raw_arg.get("type"), defers)
         self.default_value = raw_arg.get("defaultValue")
 
 
@@ -110,16 +136,49 @@ class TypeDefer:
     """
     Represents a typed version of an type defer.
     A TypeDefer can also have itself as a child
+
+    Type defers parsed through a TypeDeferCache are shared between all fields and arguments
+    with a structurally identical type reference. Therefore they must never be modified.
     """
 
-    def __init__(self, raw_defer: Dict):
+    __slots__ = ("kind", "name", "of_type", "base_name", "base_kind")
+
+    def __init__(self, raw_defer: Dict, defers: "TypeDeferCache" = None):
         """
         Instantiate a new TypeDefer
         :param raw_defer: holds the raw defer data
+        :param defers: holds an optional cache for sharing the child type defers
+        """
+        self._setup(raw_defer.get("kind"), raw_defer.get("name"), TypeDefer.parse(raw_defer.get("ofType"), defers))
+
+    def _setup(self, kind: str, name: str, of_type: "TypeDefer"):
         """
-        self.kind = raw_defer.get("kind")
-        self.name = raw_defer.get("name")
-        self.of_type: TypeDefer = TypeDefer(raw_defer.get("ofType")) if raw_defer.get("ofType") is not None else None
+        Set the attributes and precompute the name and kind of the innermost named type.
+
+        :param kind: holds the kind
+        :param name: holds the name which is None for wrapping kinds like NON_NULL and LIST
+        :param of_type: holds the wrapped type defer
+        """
+        self.kind = intern_string(kind)
+        self.name = intern_string(name)
+        self.of_type: TypeDefer = of_type
+        self.base_name: str = self.name if self.name is not None or of_type is None else of_type.base_name
+        self.base_kind: str = self.kind if of_type is None else of_type.base_kind
+
+    @staticmethod
+    def parse(raw_defer: Union[Dict, None], defers: "TypeDeferCache" = None) -> Union["TypeDefer", None]:
+        """
+        Parse a raw type defer, either through the cache or as a new instance.
+
+        :param raw_defer: holds the raw defer data which may be None
+        :param defers: holds an optional cache for sharing type defers
+        :return: the type defer or None
+        """
+        if raw_defer is None:
+            return None
+        if defers is not None:
+            return defers.get(raw_defer)
+        return TypeDefer(raw_defer)
 
     def is_non_null(self) -> bool:
         """
@@ -158,20 +217,65 @@ class TypeDefer:
         return self.kind and self.kind == "INPUT_OBJECT"
 
 
+class TypeDeferCache:
+    """
+    A canonicalizing cache for type defers.
+    Structurally identical type references like NON_NULL -> LIST -> NON_NULL -> OBJECT(User) are parsed only once
+    and the same TypeDefer instance is shared by every field and argument using it.
+    """
+
+    def __init__(self):
+        """ Instantiate a new empty TypeDeferCache """
+        self._defers: Dict[Tuple, TypeDefer] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """ Return the amount of distinct type defers. """
+        return len(self._defers)
+
+    def get(self, raw_defer: Dict) -> TypeDefer:
+        """
+        Return the shared type defer for a raw type defer.
+        The child is resolved first, so the key can rely on the identity of the already shared child.
+
+        :param raw_defer: holds the raw defer data
+        :return: the shared type defer
+        """
+        of_type = self.get(raw_defer["ofType"]) if raw_defer.get("ofType") is not None else None
+        key = (raw_defer.get("kind"), raw_defer.get("name"), of_type)
+        defer = self._defers.get(key)
+        if defer is None:
+            with self._lock:  # schemas sharing the cache may be parsed concurrently
+                defer = self._defers.get(key)
+                if defer is None:
+                    defer = TypeDefer.__new__(TypeDefer)
+                    defer._setup(*key)
+                    self._defers[key] = defer
+        return defer
+
+
 class SchemaTypeField:
     """
     Represents a typed version of an schema type field
     """
 
-    def __init__(self, raw_field: Dict):
+    __slots__ = ("name", "description", "args", "type", "is_deprecated", "deprecation_reason")
+
+    def __init__(self, raw_field: Dict, keep_descriptions: bool = True, defers: "TypeDeferCache" = None):
         """
         Instantiate a new SchemaTypeField
         :param raw_field: holds the raw input data
-        """
-        self.name = raw_field.get("name")
-        self.description = raw_field.get("description")
-        self.args: Dict[str, Argument] = Schema.parse_arguments(raw_field.get("args", []))
-        self.type: TypeDefer = TypeDefer(raw_field.get("type")) if raw_field.get("type") is not None else None
+        :param keep_descriptions: False if the description should be dropped
+        :param defers: holds an optional cache for sharing type defers
+        """
+        self.name = intern_string(raw_field.get("name"))
+        self.description = raw_field.get("description") if keep_descriptions else None
+        self.args: Dict[str, Argument] = Schema.parse_arguments(
+            raw_field.get("args", []),
+            keep_descriptions,
+            defers
+        )
+        self.type: TypeDefer = TypeDefer.parse(raw_field.get("type"), defers)
         self.is_deprecated: bool = raw_field.get("isDeprecated")
         self.deprecation_reason: str = raw_field.get("deprecationReason")
 
@@ -181,14 +285,18 @@ class SchemaTypeInputField:
     Represents a typed version of an schema type input field
     """
 
-    def __init__(self, raw_input: Dict):
+    __slots__ = ("name", "description", "type", "default_value")
+
+    def __init__(self, raw_input: Dict, keep_descriptions: bool = True, defers: "TypeDeferCache" = None):
         """
         Instantiate a new SchemaTypeInputField
         :param raw_input: holds the raw input data
+        :param keep_descriptions: False if the description should be dropped
+        :param defers: holds an optional cache for sharing type defers
         """
-        self.name = raw_input.get("name")
-        self.description = raw_input.get("description")
-        self.type: TypeDefer = TypeDefer(raw_input.get("type")) if raw_input.get("type") is not None else None
+        self.name = intern_string(raw_input.get("name"))
+        self.description = raw_input.get("description") if keep_descriptions else None
+        self.type: TypeDefer = TypeDefer.parse(raw_input.get("type"), defers)
         self.default_value = raw_input.get("defaultValue")
 
 
@@ -198,6 +306,8 @@ class SchemaTypeInterface:
     Signature yet unknown.
     """
 
+    __slots__ = ()
+
     def __init__(self, raw_interface: Dict):
         """
         Instantiate a new SchemaTypeInterface
@@ -211,13 +321,16 @@ class SchemaTypeEnum:
     Represents a typed version of an schema type enum value
     """
 
-    def __init__(self, raw_enum: Dict):
+    __slots__ = ("name", "description", "is_deprecated", "deprecation_reason")
+
+    def __init__(self, raw_enum: Dict, keep_descriptions: bool = True):
         """
         Instantiate a new SchemaTypeEnum
         :param raw_enum: holds the raw enum data
+        :param keep_descriptions: False if the description should be dropped
         """
-        self.name: str = raw_enum.get("name")
-        self.description: str = raw_enum.get("description")
+        self.name: str = intern_string(raw_enum.get("name"))
+        self.description: str = raw_enum.get("description") if keep_descriptions else None
         self.is_deprecated: bool = raw_enum.get("isDeprecated")
         self.deprecation_reason: str = raw_enum.get("deprecationReason")
 
@@ -227,20 +340,140 @@ class SchemaType:
     Represents a typed version of an schema type
     """
 
-    def __init__(self, raw_type: Dict):
+    __slots__ = ("kind", "name", "description", "fields", "input_fields", "interfaces", "enum_values", "possible_types")
+
+    def __init__(self, raw_type: Dict, keep_descriptions: bool = True, defers: TypeDeferCache = None):
         """
         Instantiate a new SchemaType
         :param raw_type: holds the raw enum data
+        :param keep_descriptions: False if the descriptions of the type and its children should be dropped
+        :param defers: holds an optional cache for sharing type defers
+        """
+
+        self.kind = intern_string(raw_type.get("kind"))
+        self.name = intern_string(raw_type.get("name"))
+        self.description = raw_type.get("description") if keep_descriptions else None
+        self.fields: Tuple[SchemaTypeField] = tuple(
+            SchemaTypeField(f, keep_descriptions, defers) for f in raw_type.get("fields") or [] if f
+        )
+        self.input_fields: Tuple[SchemaTypeInputField] = tuple(
+            SchemaTypeInputField(i, keep_descriptions, defers) for i in raw_type.get("inputFields") or [] if i
+        )
+        self.interfaces = tuple(SchemaTypeInterface(i) for i in raw_type.get("interfaces") or [] if i)
+        self.enum_values: Tuple[SchemaTypeEnum] = tuple(
+            SchemaTypeEnum(e, keep_descriptions) for e in raw_type.get("enumValues") or [] if e
+        )
+        self.possible_types = raw_type.get("possibleTypes")
+
+
+class SchemaTypes(Mapping):
+    """
+    A read only mapping of type names to schema types.
+    The types are kept as raw dictionaries and only parsed into SchemaType objects when they are accessed.
+    Most clients only ever touch a handful of types so parsing all of them up front is wasted effort.
+
+    With a resolver, unknown types are requested from the endpoint once they are accessed.
+    In that case iterating only covers the types that have been requested so far.
+    """
+
+    def __init__(
+            self,
+            raw_types: Dict[str, Dict],
+            keep_descriptions: bool = True,
+            defers: TypeDeferCache = None,
+            resolver: Callable[[List[str]], Dict[str, Union[Dict, None]]] = None
+    ):
         """
+        Instantiate a new SchemaTypes mapping.
 
-        self.kind = raw_type.get("kind")
-        self.name = raw_type.get("name")
-        self.description = raw_type.get("description")
-        self.fields: List[SchemaTypeField] = [SchemaTypeField(f) for f in raw_type.get("fields") or [] if f]
-        self.input_fields = [SchemaTypeInputField(i) for i in raw_type.get("inputFields") or [] if i]
-        self.interfaces = [SchemaTypeInterface(i) for i in raw_type.get("interfaces") or [] if i]
-        self.enum_values = [SchemaTypeEnum(e) for e in raw_type.get("enumValues") or [] if e]
-        self.possible_types = raw_type.get("possibleTypes")
+        :param raw_types: holds the raw types with their names as keys
+        :param keep_descriptions: False if the descriptions should be dropped while parsing
+        :param defers: holds the cache for sharing type defers between all types
+        :param resolver: holds an optional callable returning the raw types for a list of names
+        """
+        self._raw_types = raw_types
+        self._types: Dict[str, SchemaType] = {}
+        self._unknown = set()
+        self._lock = threading.Lock()
+        self.keep_descriptions = keep_descriptions
+        self.defers = defers if defers is not None else TypeDeferCache()
+        self.resolver = resolver
+
+    def __getitem__(self, name: str) -> SchemaType:
+        """
+        Return the schema type for the given name and parse it if this is the first access.
+
+        :param name: holds the type name
+        :return: the according SchemaType
+        :raises: KeyError when no type with that name exists.
+        """
+        schema_type = self._types.get(name)
+        if schema_type is None:
+            if name not in self._raw_types:
+                self.prefetch((name,))
+            schema_type = SchemaType(self._raw_types[name], self.keep_descriptions, self.defers)
+            self._types[name] = schema_type
+        return schema_type
+
+    def prefetch(self, names: Iterable[str]):
+        """
+        Request all unknown types of the given names at once. Does nothing without a resolver.
+
+        :param names: holds the type names
+        """
+        if self.resolver is None:
+            return
+        with self._lock:
+            missing = [
+                name for name in dict.fromkeys(names)
+                if name is not None and name not in self._raw_types and name not in self._unknown
+            ]
+            if not missing:
+                return
+            resolved = self.resolver(missing)
+            for name in missing:
+                raw_type = resolved.get(name)
+                if raw_type:
+                    self._raw_types[name] = raw_type
+                else:
+                    self._unknown.add(name)
+
+    def add(self, schema_type: SchemaType):
+        """
+        Add an already parsed type.
+
+        :param schema_type: holds the parsed schema type
+        """
+        self._types[schema_type.name] = schema_type
+        self._raw_types[schema_type.name] = None  # the raw type is not kept, the name is only needed for lookups
+
+    def __contains__(self, name) -> bool:
+        """ Check for a type name without parsing the type. """
+        if name not in self._raw_types:
+            self.prefetch((name,))
+        return name in self._raw_types
+
+    def __iter__(self) -> Iterator[str]:
+        """ Return an iterator over all type names. """
+        return iter(self._raw_types)
+
+    def __len__(self) -> int:
+        """ Return the amount of types. """
+        return len(self._raw_types)
+
+    def raw_type(self, name: str) -> Union[Dict, None]:
+        """
+        :param name: holds the type name
+        :return: the raw type or None if it is unknown or has not been kept
+        """
+        return self._raw_types.get(name)
+
+    @property
+    def parsed(self) -> Tuple[str]:
+        """
+        :return: the names of all types that have been parsed so far
+        """
+        return tuple(self._types)
 
 
 class Schema:
@@ -250,32 +483,88 @@ class Schema:
     instead of the transporter itself.
     """
 
-    def __init__(self, endpoint: str, transporter: Transporter, settings: Settings):
+    # the attributes that are replaced when a refresh found a changed schema
+    STATE_ATTRIBUTES = (
+        "raw_schema", "type_defers", "types", "directives", "query_type", "mutation_type", "subscription_type",
+        "queries", "mutations", "subscriptions", "_hash"
+    )
+
+    generation = 0  # incremented with every refresh that changed the schema
+    _hash = None
+    _refresher = None
+
+    def __init__(
+            self,
+            endpoint: str,
+            transporter: Transporter,
+            settings: Settings,
+            cache: SchemaCache = None,
+            introspection: Dict = None
+    ):
         """
         Create a new Schema instance.
 
         Firstly the schema will be loaded synchronously from the endpoint and stored as raw json for further processing.
+        If a cache was passed by, the schema is read from the cache instead as long as there is a usable entry.
+        With Settings(stream_introspection=True) the response is read incrementally instead
+        and the raw schema is not stored at all.
+        With Settings(introspection_profile="lazy") only the root types are requested up front
+        and the cache is not used.
         Then the request types will be parsed. Those are "Query", "Mutation" and "Subscription".
         After that the schema types and directives are parsed.
 
         :param endpoint: holds the endpoint url as a string
         :param transporter: holds the transporter instance
         :param settings: holds the settings
+        :param cache: holds an optional schema cache
+        :param introspection: holds an already received introspection result of the full or minimal profile.
+        Nothing is requested then.
         """
         self.endpoint = endpoint
         self.transport = transporter
         self.settings = settings
-
-        schema_introspection = self.introspect_schema(endpoint, transporter)
+        self.cache = cache
+        self._refresh_lock = threading.RLock()  # per schema, so a slow endpoint does not hold up other schemas
 
         # graphql schema properties
-        self.raw_schema = schema_introspection.get(self.settings.default_response_key, {}).get("__schema", {})
-        self.query_type: str = self.parse_query_type(self.raw_schema)
-        self.mutation_type: str = self.parse_mutation_type(self.raw_schema)
-        self.subscription_type: str = self.parse_subscription_type(self.raw_schema)
+        self.type_defers = TypeDeferCache()
+        profile = settings.introspection_profile
+        if introspection is None and profile == LAZY_PROFILE:
+            # only the root types are requested now, all other types once they are accessed
+            schema_introspection = self.introspect_schema(endpoint, transporter, profile)
+            self.raw_schema = schema_introspection.get(self.settings.default_response_key, {}).get("__schema", {})
+            root_schema = self.raw_schema
+            self.types = self.parse_lazy_types(root_schema, endpoint, transporter, settings, self.type_defers)
+            self.directives = {}
+            self._hash = hash_json({"schema": root_schema, "types": [self.types.raw_type(n) for n in self.types]})
+        elif introspection is None and settings.stream_introspection:
+            # the types are parsed one by one while reading the response, so there is no raw schema to hold
+            self.raw_schema: Union[Dict, None] = None
+            digest = hashlib.sha256()
+            root_schema, self.types, self.directives = self.parse_schema_stream(
+                self.stream_schema(endpoint, transporter, settings, cache, profile, digest),
+                settings.keep_descriptions,
+                self.type_defers
+            )
+            self._hash = digest.hexdigest()
+        else:
+            schema_introspection = introspection or self.load_schema(endpoint, transporter, cache, profile)
+            self.raw_schema = schema_introspection.get(self.settings.default_response_key, {}).get("__schema", {})
+            root_schema = self.raw_schema
+            self.types: SchemaTypes = self.parse_types(
+                self.raw_schema.get("types", []),
+                settings.keep_descriptions,
+                self.type_defers
+            )
+            self.directives: Dict[str, Directive] = self.parse_directives(
+                self.raw_schema.get("directives", []),
+                settings.keep_descriptions,
+                self.type_defers
+            )
 
-        self.types: Dict[str, SchemaType] = self.parse_types(self.raw_schema.get("types", []))
-        self.directives: Dict[str, Directive] = self.parse_directives(self.raw_schema.get("directives", []))
+        self.query_type: str = self.parse_query_type(root_schema)
+        self.mutation_type: str = self.parse_mutation_type(root_schema)
+        self.subscription_type: str = self.parse_subscription_type(root_schema)
 
         # custom schema properties
         self.queries: Tuple[Operation] = self.parse_operations(self.query_type)
@@ -288,16 +577,263 @@ class Schema:
     def __repr__(self) -> str:
         return f"<Schema(endpoint={self.endpoint})>"
 
+    @property
+    def hash(self) -> Union[str, None]:
+        """
+        :return: a hash of the introspection result the schema was built from
+        """
+        if self._hash is None and self.raw_schema is not None:
+            self._hash = hash_json(self.raw_schema)
+        return self._hash
+
+    def refresh(self) -> bool:
+        """
+        Introspect the endpoint again and swap in the new schema if it changed.
+        The cache is bypassed for the introspection but updated afterwards.
+
+        All parsed properties like types, queries and mutations are replaced in one step,
+        so readers either see the old or the new schema. Clients notice the new generation
+        and rebuild their service proxies on their next access.
+
+        :return: True if the schema changed
+        :raises: a RequestException if the schema could not be received.
+        """
+        with self._refresh_lock:
+            fresh = Schema(self.endpoint, self.transport, self.settings)
+            if fresh.hash == self.hash:
+                logger.debug(f"SCHEMA REFRESH - UNCHANGED - {self.endpoint}")
+                return False
+
+            state = {key: getattr(fresh, key) for key in self.STATE_ATTRIBUTES}
+            state["generation"] = self.generation + 1
+            vars(self).update(state)  # a single update, so readers never see a mix of old and new attributes
+
+            if self.cache is not None and fresh.raw_schema is not None \
+                    and self.settings.introspection_profile != LAZY_PROFILE:
+                self.cache.store(
+                    self.cache_key(self.endpoint, self.settings.introspection_profile),
+                    {self.settings.default_response_key: {"__schema": fresh.raw_schema}}
+                )
+            logger.info(f"Schema of {self.endpoint} changed. Now at generation {self.generation}.")
+            return True
+
+    def start_refresher(self, interval: float) -> "SchemaRefresher":
+        """
+        Start refreshing the schema in a background thread.
+        If a refresher is already running for this schema, that one is returned.
+
+        :param interval: holds the time in seconds between two refreshes
+        :return: the running refresher
+        """
+        from graphy.refresh import SchemaRefresher
+        with self._refresh_lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = SchemaRefresher(self, interval)
+                self._refresher.start()
+            return self._refresher
+
+    @classmethod
+    async def create(
+            cls,
+            endpoint: str,
+            transporter: Transporter,
+            settings: Settings,
+            cache: SchemaCache = None
+    ) -> "Schema":
+        """
+        Create a new Schema instance without blocking the event loop.
+
+        Transporters with an async introspect() method, like the AsyncHTTPTransporter, introspect natively.
+        In every other case and for streamed or lazy introspections the schema is created in a worker thread.
+
+        :param endpoint: holds the endpoint url as a string
+        :param transporter: holds the transporter instance
+        :param settings: holds the settings
+        :param cache: holds an optional schema cache
+        :return: the schema
+        :raises: a RequestException if the schema could not be received.
+        """
+        introspect = getattr(transporter, "introspect", None)
+        profile = settings.introspection_profile
+        if introspect is None or profile == LAZY_PROFILE or settings.stream_introspection:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, cls, endpoint, transporter, settings, cache)
+
+        cache_key = cls.cache_key(endpoint, profile)
+        schema_introspection = cache.load(cache_key) if cache is not None else None
+        if schema_introspection is None:
+            try:
+                schema_introspection = await introspect(endpoint, profile)
+            except RequestException:
+                schema_introspection = cache.load(cache_key, allow_stale=True) if cache is not None else None
+                if schema_introspection is None:
+                    raise
+                logger.warning(f"Schema introspection failed. Using stale cache entry for {endpoint}")
+            else:
+                if cache is not None:
+                    cache.store(cache_key, schema_introspection)
+        return cls(endpoint, transporter, settings, cache, schema_introspection)
+
     @classmethod
-    def introspect_schema(cls, endpoint: str, transport: Transporter) -> Dict:
+    def from_snapshot(cls, path: str, transporter: Transporter, settings: Settings) -> "Schema":
+        """
+        Create a schema from a memory mapped snapshot instead of introspecting the endpoint.
+
+        :param path: holds the path of the snapshot file
+        :param transporter: holds the transporter instance
+        :param settings: holds the settings
+        :return: the schema
+        """
+        from graphy import snapshot
+        return snapshot.open_schema(path, transporter, settings)
+
+    def write_snapshot(self, path: str):
+        """
+        Write a memory mappable snapshot of this schema including the automatic selections of all operations.
+        Every type is parsed for this.
+
+        :param path: holds the path of the snapshot file
+        """
+        from graphy import snapshot
+        snapshot.SchemaSnapshot.write(self, path)
+
+    @staticmethod
+    def cache_key(endpoint: str, profile: str = FULL_PROFILE) -> str:
+        """
+        Return the key the schema of an endpoint is cached under.
+        Every introspection profile gets its own entry.
+
+        :param endpoint: holds the endpoint url as a string
+        :param profile: holds the introspection profile
+        :return: the endpoint itself for the full profile, otherwise the endpoint with the profile as fragment
+        """
+        return endpoint if profile == FULL_PROFILE else f"{endpoint}#{profile}"
+
+    @classmethod
+    def load_schema(
+            cls,
+            endpoint: str,
+            transport: Transporter,
+            cache: SchemaCache = None,
+            profile: str = FULL_PROFILE
+    ) -> Dict:
+        """
+        Load the schema either from the cache or by introspecting the endpoint.
+        A successful introspection is written back to the cache.
+        If the endpoint can not be reached, a stale cache entry is used as a last resort.
+
+        :param endpoint: holds the endpoint url as a string
+        :param transport: holds the transporter instance
+        :param cache: holds an optional schema cache
+        :param profile: holds the introspection profile
+        :return: the raw schema in json
+        """
+        if cache is None:
+            return cls.introspect_schema(endpoint, transport, profile)
+
+        cache_key = cls.cache_key(endpoint, profile)
+        schema_introspection = cache.load(cache_key)
+        if schema_introspection is not None:
+            return schema_introspection
+
+        try:
+            schema_introspection = cls.introspect_schema(endpoint, transport, profile)
+        except RequestException:
+            schema_introspection = cache.load(cache_key, allow_stale=True)
+            if schema_introspection is None:
+                raise
+            logger.warning(f"Schema introspection failed. Using stale cache entry for {endpoint}")
+            return schema_introspection
+
+        cache.store(cache_key, schema_introspection)
+        return schema_introspection
+
+    @classmethod
+    def stream_schema(
+            cls,
+            endpoint: str,
+            transport: Transporter,
+            settings: Settings,
+            cache: SchemaCache = None,
+            profile: str = FULL_PROFILE,
+            digest=None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream the schema either from the cache or from the endpoint.
+        A streamed introspection is written to the cache while it is read.
+        If the endpoint can not be reached, a stale cache entry is used as a last resort.
+
+        :param endpoint: holds the endpoint url as a string
+        :param transport: holds the transporter instance
+        :param settings: holds the settings
+        :param cache: holds an optional schema cache
+        :param profile: holds the introspection profile
+        :param digest: holds an optional hashlib object that is updated with the streamed text
+        :return: an iterator over the schema events as described in loaders.iter_schema()
+        """
+        cache_key = cls.cache_key(endpoint, profile)
+        schema_file = cache.reader(cache_key) if cache is not None else None
+        if schema_file is None:
+            try:
+                chunks = request_schema_stream(endpoint, transport.session, profile=profile)
+            except RequestException:
+                schema_file = cache.reader(cache_key, allow_stale=True) if cache is not None else None
+                if schema_file is None:
+                    raise
+                logger.warning(f"Schema introspection failed. Using stale cache entry for {endpoint}")
+            else:
+                if cache is not None:
+                    chunks = cache.tee(cache_key, chunks)
+                yield from iter_schema(digest_chunks(chunks, digest), settings.default_response_key)
+                return
+
+        with schema_file:
+            chunks = iter(lambda: schema_file.read(65536), "")
+            yield from iter_schema(digest_chunks(chunks, digest), settings.default_response_key)
+
+    @classmethod
+    def introspect_schema(cls, endpoint: str, transport: Transporter, profile: str = FULL_PROFILE) -> Dict:
         """
         Make a synchronous request to the endpoint and return the response as json.
 
         :param endpoint: holds the endpoint url as a string
         :param transport: holds the transporter instance
+        :param profile: holds the introspection profile
         :return: the raw schema in json
         """
-        return request_schema(endpoint, transport.session)
+        return request_schema(endpoint, transport.session, profile)
+
+    @classmethod
+    def parse_lazy_types(
+            cls,
+            root_schema: Dict,
+            endpoint: str,
+            transport: Transporter,
+            settings: Settings,
+            defers: TypeDeferCache = None
+    ) -> SchemaTypes:
+        """
+        Create a types mapping that requests types from the endpoint once they are accessed.
+        The root operation types are requested right away in a single request.
+
+        :param root_schema: holds the raw schema with the root operation type names
+        :param endpoint: holds the endpoint url as a string
+        :param transport: holds the transporter instance
+        :param settings: holds the settings
+        :param defers: holds an optional cache for sharing type defers
+        :return: the lazily requesting types mapping
+        """
+        types = SchemaTypes(
+            {},
+            settings.keep_descriptions,
+            defers,
+            resolver=lambda names: request_types(endpoint, transport.session, names, settings.default_response_key)
+        )
+        types.prefetch(
+            cls.parse_operation_type(root_schema, op_type)
+            for op_type in ("queryType", "mutationType", "subscriptionType")
+        )
+        return types
 
     @staticmethod
     def parse_query_type(raw_schema: Dict) -> Union[str, None]:
@@ -354,6 +890,7 @@ class Schema:
     def parse_operations(self, operation_type: str) -> Tuple[Operation]:
         """
         Parse all operations for a given operation type.
+        Only the root type itself is parsed, all other types stay untouched until they are needed.
 
         :param operation_type: holds the operation type name.
         :return: a tuple of all available operations for this operation type
@@ -366,26 +903,71 @@ class Schema:
         return tuple([Operation(f, self.settings) for f in query_type.fields])
 
     @staticmethod
-    def parse_types(schema_types: List[Dict]) -> Dict[str, SchemaType]:
+    def parse_types(
+            schema_types: List[Dict],
+            keep_descriptions: bool = True,
+            defers: TypeDeferCache = None
+    ) -> SchemaTypes:
         """
-        Parse all types from the raw schema response.
+        Map all types from the raw schema response by their name.
+        The types themselves are parsed lazily once they are accessed.
 
         :param schema_types: holds a list of all available types.
-        :return: a dictionary with the types name as a key and the type itself as a value
+        :param keep_descriptions: False if the descriptions should be dropped while parsing
+        :param defers: holds an optional cache for sharing type defers
+        :return: a mapping with the types name as a key and the type itself as a value
         """
-        result = {}
-        for schema_type in schema_types:
-            new_type = SchemaType(schema_type)
-            result[new_type.name] = new_type
-        return result
+        return SchemaTypes(
+            {schema_type.get("name"): schema_type for schema_type in schema_types if schema_type},
+            keep_descriptions,
+            defers
+        )
+
+    @staticmethod
+    def parse_schema_stream(
+            events: Iterable[Tuple[str, Any]],
+            keep_descriptions: bool = True,
+            defers: TypeDeferCache = None
+    ) -> Tuple[Dict, SchemaTypes, Dict[str, Directive]]:
+        """
+        Parse the events of a streamed schema.
+        Every type and directive is parsed as soon as it arrives, so its raw data can be released right away.
+
+        :param events: holds the schema events as described in loaders.iter_schema()
+        :param keep_descriptions: False if the descriptions should be dropped while parsing
+        :param defers: holds an optional cache for sharing type defers
+        :return: a tuple of the root schema without types and directives, the types and the directives
+        """
+        root_schema = {}
+        types = SchemaTypes({}, keep_descriptions, defers)
+        directives = {}
+        for key, value in events:
+            if not value:
+                continue
+            if key == "type":
+                types.add(SchemaType(value, keep_descriptions, types.defers))
+            elif key == "directive":
+                directive = Directive(value, keep_descriptions, types.defers)
+                directives[directive.name] = directive
+            elif key == "errors":
+                logger.warning(f"Schema introspection returned errors: {value}")
+            else:
+                root_schema[key] = value
+        return root_schema, types, directives
 
     @staticmethod
-    def parse_arguments(args: List[Dict]) -> 'Dict[str, Argument]':
+    def parse_arguments(
+            args: List[Dict],
+            keep_descriptions: bool = True,
+            defers: TypeDeferCache = None
+    ) -> 'Dict[str, Argument]':
         """
         Parse a list of arguments into a dictionary where the key is the name of the argument and
         the argument itself is the value.
 
         :param args: holds the list of arguments to parse
+        :param keep_descriptions: False if the descriptions should be dropped
+        :param defers: holds an optional cache for sharing type defers
         :return: a dictionary with mapped arguments
         """
         if not args:
@@ -394,21 +976,27 @@ class Schema:
         for a in args:
             if not a:
                 continue
-            arg = Argument(a)
+            arg = Argument(a, keep_descriptions, defers)
             result[arg.name] = arg
         return result
 
     @staticmethod
-    def parse_directives(schema_directives: List[Dict]) -> Dict[str, Directive]:
+    def parse_directives(
+            schema_directives: List[Dict],
+            keep_descriptions: bool = True,
+            defers: TypeDeferCache = None
+    ) -> Dict[str, Directive]:
         """
         Parse a list of directives into a dictionary where the key is the name of the directive and
         the value is the directive itself.o
 
         :param schema_directives: holds the schema directives
+        :param keep_descriptions: False if the descriptions should be dropped
+        :param defers: holds an optional cache for sharing type defers
         :return: a dictionary with mapped directives
         """
         result = {}
         for schema_directive in schema_directives:
-            new_directive = Directive(schema_directive)
+            new_directive = Directive(schema_directive, keep_descriptions, defers)
             result[new_directive.name] = new_directive
         return result
@@ -11,7 +11,12 @@ class Settings:
             base_payload_key="payload",
             return_requests_response=False,
             disable_selection_lookup=False,
-            return_full_subscription_body=False
+            return_full_subscription_body=False,
+            keep_descriptions=True,
+            stream_introspection=False,
+            introspection_profile="full",
+            query_cache_size=1024,
+            extract_fragments=False
     ):
         """
         Instantiate a new Settings instance to be used by a client.
@@ -22,6 +27,11 @@ class Settings:
         :param return_requests_response: True if you want the requests response object. If False will try to parse json.
         :param disable_selection_lookup: Set to True if you want no automatic lookup when no selection was passed by.
         :param return_full_subscription_body: Set to True if you want the complete websocket response body
+        :param keep_descriptions: Set to False if you want to drop all schema descriptions for saving memory
+        :param stream_introspection: Set to True if you want to parse the schema while it is being downloaded.
+        :param introspection_profile: holds how much of the schema is requested. One of "full", "minimal" or "lazy".
+        :param query_cache_size: holds the amount of built query documents the client keeps. 0 disables the cache.
+        :param extract_fragments: Set to True if you want repeated sub selections to be sent as fragments.
         """
         self.max_recursion_depth = max_recursion_depth
         self.default_response_key = base_response_key
@@ -29,3 +39,8 @@ class Settings:
         self.return_requests_response = return_requests_response
         self.disable_selection_lookup = disable_selection_lookup
         self.return_full_subscription_body = return_full_subscription_body
+        self.keep_descriptions = keep_descriptions
+        self.stream_introspection = stream_introspection
+        self.introspection_profile = introspection_profile
+        self.query_cache_size = query_cache_size
+        self.extract_fragments = extract_fragments
@@ -0,0 +1,331 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import uuid
+from typing import Dict, Iterator, List, Mapping, Tuple, Union
+
+from graphy.builder import SelectedField
+from graphy.schema import Operation, Schema, SchemaTypeField, SchemaTypes, TypeDeferCache
+from graphy.settings import Settings
+from graphy.transport import Transporter
+
+MAGIC = b"GRAPHYS1"
+HEADER = struct.Struct("<8sIIIIII")  # magic, meta offset, meta length, type count, type index, op count, op index
+INDEX_ENTRY = struct.Struct("<IIII")  # name offset, name length, data offset, data length
+
+OPERATION_KINDS = ("query", "mutation", "subscription")
+
+
+def dump_defer(defer) -> Union[Dict, None]:
+    """
+    :param defer: holds a TypeDefer or None
+    :return: the raw type defer as it would be returned by an introspection
+    """
+    if defer is None:
+        return None
+    return {"kind": defer.kind, "name": defer.name, "ofType": dump_defer(defer.of_type)}
+
+
+def dump_input_value(value) -> Dict:
+    """
+    :param value: holds an Argument or a SchemaTypeInputField
+    :return: the raw input value as it would be returned by an introspection
+    """
+    return {
+        "name": value.name,
+        "description": value.description,
+        "type": dump_defer(value.type),
+        "defaultValue": value.default_value
+    }
+
+
+def dump_type(schema_type) -> Dict:
+    """
+    :param schema_type: holds a SchemaType
+    :return: the raw type as it would be returned by an introspection. Interfaces are left out.
+    """
+    return {
+        "kind": schema_type.kind,
+        "name": schema_type.name,
+        "description": schema_type.description,
+        "fields": [{
+            "name": f.name,
+            "description": f.description,
+            "args": [dump_input_value(a) for a in f.args.values()],
+            "type": dump_defer(f.type),
+            "isDeprecated": f.is_deprecated,
+            "deprecationReason": f.deprecation_reason
+        } for f in schema_type.fields],
+        "inputFields": [dump_input_value(i) for i in schema_type.input_fields],
+        "enumValues": [{
+            "name": e.name,
+            "description": e.description,
+            "isDeprecated": e.is_deprecated,
+            "deprecationReason": e.deprecation_reason
+        } for e in schema_type.enum_values],
+        "possibleTypes": schema_type.possible_types
+    }
+
+
+def dump_selection(selection: Union[Tuple[SelectedField], None]) -> Union[List, None]:
+    """
+    :param selection: holds a tuple of selected fields or None
+    :return: a nested list where a field without children is its name and a field with children is [name, [...]]
+    """
+    if selection is None:
+        return None
+    return [f.name if not f.children else [f.name, dump_selection(f.children)] for f in selection]
+
+
+def load_selection(raw_selection: Union[List, None]) -> Union[Tuple[SelectedField], None]:
+    """
+    :param raw_selection: holds a nested list as created by dump_selection()
+    :return: the tuple of selected fields or None
+    """
+    if raw_selection is None:
+        return None
+    return tuple(
+        SelectedField(f) if isinstance(f, str) else SelectedField(f[0], children=load_selection(f[1]))
+        for f in raw_selection
+    )
+
+
+class SchemaSnapshot(Mapping):
+    """
+    A read only, memory mapped snapshot of a parsed schema.
+
+    The snapshot holds every type as a compact record and the automatic selection of every operation.
+    Records are found by a binary search over a sorted index in the mapped file and only decoded when accessed,
+    so opening a snapshot costs next to nothing and the file pages are shared between all processes using it.
+    This makes it a good fit for prefork servers where the master writes the snapshot and every worker opens it.
+
+    As a mapping it maps type names to raw types and can therefore be used as the source of a SchemaTypes mapping.
+
+    Layout (little endian):
+    header: magic, meta offset, meta length, type count, type index offset, operation count, operation index offset
+    index: sorted entries of name offset, name length, record offset, record length
+    data: utf-8 names, json records and the json meta data
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and map a snapshot file.
+
+        :param path: holds the path of the snapshot file
+        :raises: ValueError if the file is no snapshot
+        """
+        self.path = path
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_offset, meta_length, self._type_count, self._type_index, self._op_count, self._op_index = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is no graphy schema snapshot")
+        self.meta: Dict = json.loads(self._mmap[meta_offset:meta_offset + meta_length])
+
+    def close(self):
+        """ Unmap the snapshot file. """
+        self._mmap.close()
+
+    def _entry(self, index_offset: int, position: int) -> Tuple[int, int, int, int]:
+        """
+        :return: the index entry at the position of the index starting at the offset
+        """
+        return INDEX_ENTRY.unpack_from(self._mmap, index_offset + position * INDEX_ENTRY.size)
+
+    def _find(self, index_offset: int, count: int, name: str) -> Union[bytes, None]:
+        """
+        Binary search a record by its name.
+
+        :param index_offset: holds the offset of the index to search
+        :param count: holds the amount of index entries
+        :param name: holds the name to search for
+        :return: the raw record or None if there is no record with that name
+        """
+        key = name.encode("UTF-8")
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            name_offset, name_length, data_offset, data_length = self._entry(index_offset, middle)
+            current = self._mmap[name_offset:name_offset + name_length]
+            if current == key:
+                return self._mmap[data_offset:data_offset + data_length]
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __getitem__(self, name: str) -> Dict:
+        """
+        Decode and return the raw type with the given name.
+
+        :param name: holds the type name
+        :return: the raw type
+        :raises: KeyError when no type with that name exists
+        """
+        record = self._find(self._type_index, self._type_count, name)
+        if record is None:
+            raise KeyError(name)
+        return json.loads(record)
+
+    def __contains__(self, name) -> bool:
+        """ Check for a type name without decoding the type. """
+        return isinstance(name, str) and self._find(self._type_index, self._type_count, name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """ Return an iterator over all type names. """
+        for position in range(self._type_count):
+            name_offset, name_length, _, _ = self._entry(self._type_index, position)
+            yield self._mmap[name_offset:name_offset + name_length].decode("UTF-8")
+
+    def __len__(self) -> int:
+        """ Return the amount of types. """
+        return self._type_count
+
+    def digest(self) -> str:
+        """
+        :return: a sha256 hex digest of the root types and all type records. Used for snapshots without a hash.
+        """
+        digest = hashlib.sha256()
+        for key in ("queryType", "mutationType", "subscriptionType"):
+            digest.update(f"{key}:{self.meta.get(key)};".encode("UTF-8"))
+        for position in range(self._type_count):
+            _, _, data_offset, data_length = self._entry(self._type_index, position)
+            digest.update(self._mmap[data_offset:data_offset + data_length])
+        return digest.hexdigest()
+
+    def selection(self, kind: str, name: str) -> Union[Tuple[SelectedField], None]:
+        """
+        Return the precomputed automatic selection of an operation.
+
+        :param kind: holds the operation kind. One of "query", "mutation" or "subscription".
+        :param name: holds the operation name
+        :return: the selection or None if there is none
+        """
+        record = self._find(self._op_index, self._op_count, f"{kind}:{name}")
+        return load_selection(json.loads(record)) if record is not None else None
+
+    @staticmethod
+    def write(schema, path: str):
+        """
+        Write a snapshot of a schema. Every type of the schema is parsed for this.
+        The file is written to a temporary file first and then moved, so readers never see partial snapshots.
+
+        :param schema: holds the schema
+        :param path: holds the path of the snapshot file
+        """
+        types = sorted(
+            (name.encode("UTF-8"), json.dumps(dump_type(schema.types[name]), separators=(",", ":")).encode("UTF-8"))
+            for name in schema.types
+        )
+        operations = sorted(
+            (f"{kind}:{op.name}".encode("UTF-8"),
+             json.dumps(dump_selection(op.get_return_fields(schema.types)), separators=(",", ":")).encode("UTF-8"))
+            for kind, ops in zip(OPERATION_KINDS, (schema.queries, schema.mutations, schema.subscriptions))
+            for op in ops
+        )
+        meta = json.dumps({
+            "endpoint": schema.endpoint,
+            "queryType": schema.query_type,
+            "mutationType": schema.mutation_type,
+            "subscriptionType": schema.subscription_type,
+            "hash": schema.hash,
+            "maxRecursionDepth": schema.settings.max_recursion_depth
+        }).encode("UTF-8")
+
+        type_index = HEADER.size
+        op_index = type_index + len(types) * INDEX_ENTRY.size
+        offset = op_index + len(operations) * INDEX_ENTRY.size
+        index = bytearray()
+        data = bytearray()
+        for name, record in types + operations:
+            index += INDEX_ENTRY.pack(offset + len(data), len(name), offset + len(data) + len(name), len(record))
+            data += name
+            data += record
+        meta_offset = offset + len(data)
+        header = HEADER.pack(MAGIC, meta_offset, len(meta), len(types), type_index, len(operations), op_index)
+
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(index)
+            snapshot_file.write(data)
+            snapshot_file.write(meta)
+        os.replace(temporary_path, path)
+
+
+class SnapshotOperation(Operation):
+    """
+    An operation that takes its automatic selection from a snapshot instead of looking it up in the schema types.
+    """
+
+    __slots__ = ("_snapshot", "_kind")
+
+    def __init__(self, field: SchemaTypeField, settings: Settings, snapshot: Union[SchemaSnapshot, None], kind: str):
+        """
+        Instantiate a new SnapshotOperation.
+
+        :param field: holds the schema type field the operation is attached to.
+        :param settings: holds the clients settings
+        :param snapshot: holds the snapshot or None if its selections do not match the settings
+        :param kind: holds the operation kind. One of "query", "mutation" or "subscription".
+        """
+        super(SnapshotOperation, self).__init__(field, settings)
+        self._snapshot = snapshot
+        self._kind = kind
+
+    def get_return_fields(self, all_types: "Dict[str, SchemaType]") -> Tuple[SelectedField]:
+        """
+        Return the precomputed selection of the snapshot and fall back to the lookup if there is none.
+
+        :param all_types: holds all available schema types
+        :return: a tuple of selection fields
+        """
+        if self._return_fields is None and self._snapshot is not None:
+            self._return_fields = self._snapshot.selection(self._kind, self.name)
+            self._snapshot = None  # the snapshot is only asked once
+        return super(SnapshotOperation, self).get_return_fields(all_types)
+
+
+def open_schema(path: str, transporter: Transporter, settings: Settings) -> Schema:
+    """
+    Create a schema from a snapshot without any introspection.
+    Types are decoded from the mapped file once they are accessed.
+
+    :param path: holds the path of the snapshot file
+    :param transporter: holds the transporter instance
+    :param settings: holds the settings
+    :return: the schema
+    """
+    snapshot = SchemaSnapshot(path)
+    meta = snapshot.meta
+    selections = snapshot if meta.get("maxRecursionDepth") == settings.max_recursion_depth else None
+
+    schema = Schema.__new__(Schema)
+    schema.endpoint = meta.get("endpoint")
+    schema.transport = transporter
+    schema.settings = settings
+    schema.cache = None
+    schema._refresh_lock = threading.RLock()
+    schema.raw_schema = None
+    schema.type_defers = TypeDeferCache()
+    schema.types = SchemaTypes(snapshot, settings.keep_descriptions, schema.type_defers)
+    schema.directives = {}
+    schema.query_type = meta.get("queryType")
+    schema.mutation_type = meta.get("mutationType")
+    schema.subscription_type = meta.get("subscriptionType")
+    schema._hash = meta.get("hash") or snapshot.digest()
+
+    operations = []
+    operation_types = (schema.query_type, schema.mutation_type, schema.subscription_type)
+    for kind, operation_type in zip(OPERATION_KINDS, operation_types):
+        root_type = schema.types.get(operation_type) if operation_type is not None else None
+        fields = root_type.fields if root_type is not None else ()
+        operations.append(tuple(SnapshotOperation(f, settings, selections, kind) for f in fields))
+    schema.queries, schema.mutations, schema.subscriptions = operations
+    return schema
@@ -0,0 +1,180 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Union
+
+WHITESPACE = " \t\n\r"
+
+
+class JsonStream:
+    """
+    An incremental JSON reader.
+
+    The document is read chunk by chunk. Objects and arrays can be walked through step by step
+    and only the values that are asked for are decoded, so a huge document never has to be held
+    in memory as a whole.
+
+    stream = JsonStream(chunks)
+    for key in stream.keys():
+        if key == "items":
+            for _ in stream.elements():
+                handle(stream.value())
+        else:
+            stream.value()
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        """
+        Instantiate a new JsonStream.
+
+        :param chunks: holds an iterable of text chunks
+        """
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """
+        Append the next chunk to the buffer and drop everything that has already been read.
+
+        :return: False if there are no more chunks
+        """
+        if self._exhausted:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer = self._buffer[self._position:] + chunk
+                self._position = 0
+                return True
+        self._exhausted = True
+        return False
+
+    def _error(self, message: str) -> ValueError:
+        """
+        :param message: holds the error message
+        :return: a ValueError with a short excerpt of the current position
+        """
+        excerpt = self._buffer[self._position:self._position + 20]
+        return ValueError(f"{message} near '{excerpt}'")
+
+    def peek(self) -> str:
+        """
+        Skip all whitespace and return the next character without consuming it.
+
+        :return: the next character or an empty string at the end of the document
+        """
+        while True:
+            buffer = self._buffer
+            position = self._position
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            self._position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        """
+        Consume the next character.
+
+        :param char: holds the expected character
+        :raises: ValueError if the next character is a different one
+        """
+        if self.peek() != char:
+            raise self._error(f"Expected '{char}'")
+        self._position += 1
+
+    def _next_separator(self, closing: str) -> bool:
+        """
+        Consume the separator after an object member or an array element.
+
+        :param closing: holds the closing bracket of the current container
+        :return: True if another member or element follows
+        """
+        char = self.peek()
+        if char == ",":
+            self._position += 1
+            return True
+        if char == closing:
+            self._position += 1
+            return False
+        raise self._error(f"Expected ',' or '{closing}'")
+
+    def value(self) -> Any:
+        """
+        Decode and consume the next complete value.
+
+        :return: the decoded value
+        :raises: ValueError if the document is invalid or ends unexpectedly
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue  # a number or literal might continue in the next chunk
+            self._position = end
+            return value
+
+    def keys(self) -> Iterator[str]:
+        """
+        Walk through the members of the next object.
+        Each member value has to be consumed by the caller before the next key is requested.
+
+        :return: an iterator over the member keys
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self._position += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            if not self._next_separator("}"):
+                return
+
+    def elements(self) -> Iterator[None]:
+        """
+        Walk through the elements of the next array.
+        Each element has to be consumed by the caller before the iteration continues.
+
+        :return: an iterator yielding once for every element
+        """
+        self._expect("[")
+        if self.peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield
+            if not self._next_separator("]"):
+                return
+
+    def finish(self):
+        """
+        Consume the remaining chunks.
+
+        :raises: ValueError if there is anything but whitespace left
+        """
+        if self.peek() != "":
+            raise self._error("Unexpected data after the document")
+
+
+def decode_chunks(chunks: Iterable[Union[bytes, str]], encoding: str = "UTF-8") -> Iterator[str]:
+    """
+    Decode binary chunks incrementally, so multi byte characters may be split between chunks.
+
+    :param chunks: holds an iterable of binary chunks. Text chunks are passed through.
+    :param encoding: holds the encoding of the binary chunks
+    :return: an iterator over the decoded text chunks
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
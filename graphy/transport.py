@@ -1,38 +1,115 @@
-from typing import Dict, Union
+import asyncio
+import json
+import ssl
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Hashable, List, Tuple, Union
+from urllib.parse import urlencode
 
 import requests
 from promise import Promise
 from requests import Session, Response
+from requests.structures import CaseInsensitiveDict
 
+from graphy.cache import CREDENTIAL_HEADERS, CachedResponse, HTTPCache
+from graphy.concurrency import BatchQueue, SingleFlight, fail
+from graphy.exceptions import GraphQLError
+from graphy.http import ConnectionPool, HTTPResponse
+from graphy.loaders import FULL_PROFILE, introspection_query
+from graphy.logger import logger
+from graphy.persisted import PersistedQueries
+from graphy.pool import PoolMetrics, PooledHTTPAdapter
 from graphy.settings import Settings
 from graphy.utils import get_version
 
+MAX_GET_QUERY_LENGTH = 8000  # longer documents are posted, since urls are limited by many servers and proxies
+
 
 class Transporter:
     """
     A transport object handles communication between client and server.
 
     Optionally a custom session can be passed by and an operation timeout be set.
+    The connection pool of the session can be configured as well. Its metrics are available as pool_metrics.
     """
 
-    def __init__(self, session=None, operation_timeout=None):
+    def __init__(
+            self,
+            session=None,
+            operation_timeout=None,
+            pool_connections: int = None,
+            pool_maxsize: int = None,
+            pool_block: bool = None,
+            idle_timeout: float = None,
+            max_retries=None,
+            persisted_queries: Union[bool, PersistedQueries] = False,
+            get_queries: bool = False,
+            http_cache: Union[bool, HTTPCache] = True,
+            array_batching: bool = False,
+            batch_window: float = 0.005,
+            max_batch_size: int = 10
+    ):
         """
         Create a new Transporter object.
+        The pool options are applied to new sessions. A custom session keeps its adapters unless one is given.
 
         :param session: (optional) a requests session object
         :param operation_timeout: (optional) requests operation timeout
+        :param pool_connections: (optional) amount of hosts a connection pool is kept for. Defaults to 10.
+        :param pool_maxsize: (optional) maximum amount of connections kept open per host. Defaults to 10.
+        :param pool_block: (optional) True if requests should wait for a free connection
+        instead of opening one that is discarded afterwards. Defaults to False.
+        :param idle_timeout: (optional) time in seconds after which an idle connection is not reused
+        :param max_retries: (optional) amount of retries or a urllib3 Retry object. Defaults to 0.
+        :param persisted_queries: (optional) True or a shared PersistedQueries instance
+        for sending documents by their hash instead of their full text.
+        :param get_queries: (optional) True if queries should be sent as GET requests, so HTTP caches can store them.
+        Mutations are always posted.
+        :param http_cache: (optional) True, False or a shared HTTPCache for storing and revalidating the responses
+        of GET requests. Only used together with get_queries.
+        :param array_batching: (optional) True if queries that are sent at the same time, for example from different
+        threads, should be posted together as a json array. The server has to support this.
+        :param batch_window: (optional) time in seconds queries are collected for before a batch is posted
+        :param max_batch_size: (optional) maximum amount of queries that are posted together
         """
         self.operation_timeout = operation_timeout
+        self.array_batching = array_batching
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.batch_queues: Dict[str, BatchQueue] = {}
+        self._batch_lock = threading.Lock()
+        if persisted_queries is True:
+            persisted_queries = PersistedQueries()
+        self.persisted_queries: Union[PersistedQueries, None] = persisted_queries or None
+        self.get_queries = get_queries
+        if http_cache is True:
+            http_cache = HTTPCache() if get_queries else None
+        self.http_cache: Union[HTTPCache, None] = http_cache if isinstance(http_cache, HTTPCache) else None
         self.session: Session = session or requests.sessions.session()
         self.session.headers["User-Agent"] = f"Graphy/{get_version()} (https://pypi.org/project/python-graphy/)"
 
+        pool_options = (pool_connections, pool_maxsize, pool_block, idle_timeout, max_retries)
+        self.pool_metrics: Union[PoolMetrics, None] = None
+        if session is None or any(option is not None for option in pool_options):
+            adapter = PooledHTTPAdapter(
+                pool_connections=pool_connections or 10,
+                pool_maxsize=pool_maxsize or 10,
+                max_retries=max_retries or 0,
+                pool_block=bool(pool_block),
+                idle_timeout=idle_timeout
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            self.pool_metrics = adapter.metrics
+
     def post(
             self,
             endpoint: str,
             query: str,
             variables: Dict,
             operation_name: str,
-            settings: Settings
+            settings: Settings,
+            operation_type: str = None
     ) -> Union[Response, Dict]:
         """
         Wrapper for the requests.post() method.
@@ -42,54 +119,473 @@ class Transporter:
         :param variables: holds the query variables if there are any
         :param operation_name: holds the operation name. Used for reading response data
         :param settings: holds the clients settings
+        :param operation_type: holds the operation type if it is known. Only queries are sent with GET or batched.
         :return:
         """
-        response = self.session.post(
-            endpoint,
-            json={
-                "query": query,
-                "variables": variables
-            },
-            timeout=self.operation_timeout
-        )
+        if self.array_batching and operation_type == "query":
+            item = ({"query": query, "variables": variables}, operation_name, settings)
+            return self.batch_queue(endpoint).put(item).result()
+        payload = self.build_payload(endpoint, query, variables)
+        response = self.send(endpoint, payload, self.method(operation_type, payload))
+        if self.persisted_queries is not None:
+            retry = self.persisted_queries.retry_payload(endpoint, query, variables, payload, response)
+            if retry is not None:
+                response = self.send(endpoint, retry, self.method(operation_type, retry))
+        return self.parse_response(response, operation_name, settings)
+
+    def resolved(self, value):
+        """
+        Wrap a value the way post() returns its results. Used for answering requests from a cache.
+
+        :param value: holds the value
+        :return: the value itself
+        """
+        return value
+
+    def then(self, result, callback: Callable, errback: Callable = None):
+        """
+        Apply a callback to a result of post() without changing the way it is returned.
+
+        :param result: holds the result of post()
+        :param callback: holds a callable which gets the result and returns a new one
+        :param errback: holds an optional callable which gets the exception if the result fails.
+        It is never called here, since blocking transporters raise in post() already.
+        :return: the return value of the callback
+        """
+        return callback(result)
+
+    def wait(self, result):
+        """
+        Block until a result of post() is available.
+
+        :param result: holds the result of post()
+        :return: the result itself, since post() blocks already
+        """
+        return result
+
+    def coalesce(self, flight: SingleFlight, key: Hashable, call: Callable):
+        """
+        Share a call of post() with identical calls that are still in flight.
+
+        :param flight: holds the single flight collapsing the calls
+        :param key: holds the key identifying identical calls
+        :param call: holds a callable calling post()
+        :return: the result of the shared call
+        """
+        return flight.do(key, call)
+
+    def from_future(self, future: Future):
+        """
+        Return the result of a future the way post() returns its results.
+
+        :param future: holds a future that is completed by another thread
+        :return: the result of the future, once it is done
+        :raises: whatever the future raised
+        """
+        return future.result()
+
+    def batch_queue(self, endpoint: str, asynchronous: bool = False) -> BatchQueue:
+        """
+        :param endpoint: holds the request endpoint
+        :param asynchronous: True if the queue is used from coroutines
+        :return: the queue collecting the queries for an endpoint
+        """
+        with self._batch_lock:
+            queue = self.batch_queues.get(endpoint)
+            if queue is None:
+                queue = self.batch_queues[endpoint] = BatchQueue(
+                    lambda items, futures: self.send_batch(endpoint, items, futures),
+                    self.batch_window,
+                    self.max_batch_size,
+                    asynchronous
+                )
+            return queue
+
+    def send_batch(self, endpoint: str, items: List[Tuple[Dict, str, Settings]], futures: List[Future]):
+        """
+        Post the payloads of a batch as one json array and settle the futures of the operations.
+
+        :param endpoint: holds the request endpoint
+        :param items: holds the payload, operation name and settings of every operation
+        :param futures: holds the futures of the operations
+        """
+        payloads = [payload for payload, _, _ in items]
+        response = self.session.post(endpoint, json=payloads, timeout=self.operation_timeout)
+        self.demultiplex(response, items, futures)
+
+    def demultiplex(self, response, items: List[Tuple[Dict, str, Settings]], futures: List[Future]):
+        """
+        Split the response of a batch into the results of its operations.
+        Every operation gets the same result as if it had been posted on its own.
+
+        :param response: holds the response of the batch
+        :param items: holds the payload, operation name and settings of every operation
+        :param futures: holds the futures of the operations
+        """
+        try:
+            bodies = response.json()
+        except ValueError as e:
+            fail(futures, e)
+            return
+        if isinstance(bodies, dict):
+            fail(futures, GraphQLError(bodies.get("errors") or [{"message": "The server does not support batches"}]))
+            return
+        if not isinstance(bodies, list) or len(bodies) != len(items):
+            fail(futures, ValueError("The server did not answer every operation of the batch"))
+            return
+        for (_, operation_name, settings), future, body in zip(items, futures, bodies):
+            try:
+                if settings.return_requests_response:
+                    future.set_result(self.item_response(response, body))
+                    continue
+                future.set_result(self.parse_data(body, operation_name, settings))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def item_response(response: Response, body: Dict) -> Response:
+        """
+        :param response: holds the response of a batch
+        :param body: holds the result of one operation of the batch
+        :return: a requests response holding the result of the operation only
+        """
+        item = Response()
+        item.url = response.url
+        item.status_code = response.status_code
+        item.headers.update(response.headers)
+        item._content = json.dumps(body).encode("UTF-8")
+        item._content_consumed = True
+        return item
+
+    def method(self, operation_type: Union[str, None], payload: Dict) -> str:
+        """
+        :param operation_type: holds the operation type if it is known
+        :param payload: holds the json payload
+        :return: "GET" for queries if get_queries is set and the document fits into an url, otherwise "POST"
+        """
+        if self.get_queries and operation_type == "query" and len(payload.get("query") or "") <= MAX_GET_QUERY_LENGTH:
+            return "GET"
+        return "POST"
+
+    def build_payload(self, endpoint: str, query: str, variables: Dict) -> Dict:
+        """
+        Build the json payload of a request.
+
+        :param endpoint: holds the request endpoint
+        :param query: holds the query string
+        :param variables: holds the query variables
+        :return: the payload. With persisted queries it might only hold the hash of the query.
+        """
+        if self.persisted_queries is not None:
+            return self.persisted_queries.payload(endpoint, query, variables)
+        return {"query": query, "variables": variables}
+
+    def send(self, endpoint: str, payload: Dict, method: str = "POST") -> Response:
+        """
+        Post a json payload or send it in the url of a GET request.
+
+        :param endpoint: holds the request endpoint
+        :param payload: holds the json payload
+        :param method: holds the HTTP method. Either "POST" or "GET".
+        :return: the response
+        """
+        if method != "GET":
+            return self.session.post(endpoint, json=payload, timeout=self.operation_timeout)
+
+        url = self.get_url(endpoint, payload)
+        session_headers = self.request_headers(url) if self.http_cache is not None else None
+        if session_headers is None:
+            return self.session.get(url, timeout=self.operation_timeout)
+        entry = self.http_cache.fresh(url, session_headers)
+        if entry is not None:
+            return self.cached_response(url, entry)
+        headers = self.http_cache.conditional_headers(url, session_headers)
+        response = self.session.get(url, headers=headers, timeout=self.operation_timeout)
+        entry = self.http_cache.update(url, response, session_headers)
+        if entry is not None:
+            return self.cached_response(url, entry)
+        if response.status_code == 304:
+            # the stored response was dropped while the request was in flight
+            response = self.session.get(url, timeout=self.operation_timeout)
+            self.http_cache.update(url, response, session_headers)
+        return response
+
+    def request_headers(self, url: str) -> Union[CaseInsensitiveDict, None]:
+        """
+        Resolve the headers the session sends with a GET request, including its cookies and authentication.
+
+        :param url: holds the requested url
+        :return: the headers or None if the session authenticates in a way the HTTP cache cannot tell apart
+        """
+        headers = self.session.prepare_request(requests.Request("GET", url)).headers
+        if self.session.auth is not None and not any(name in headers for name in CREDENTIAL_HEADERS):
+            return None
+        return headers
+
+    @staticmethod
+    def get_url(endpoint: str, payload: Dict) -> str:
+        """
+        Encode a payload into the url of a GET request. Variables and extensions are encoded as compact json.
+
+        :param endpoint: holds the request endpoint
+        :param payload: holds the json payload
+        :return: the url
+        """
+        params = {
+            key: value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), sort_keys=True)
+            for key, value in payload.items() if value is not None
+        }
+        return f"{endpoint}{'&' if '?' in endpoint else '?'}{urlencode(params)}"
+
+    @staticmethod
+    def cached_response(url: str, entry: CachedResponse) -> Response:
+        """
+        :param url: holds the requested url
+        :param entry: holds the stored response
+        :return: a requests response made from the stored response
+        """
+        response = Response()
+        response.url = url
+        response.status_code = entry.status_code
+        response.headers.update(entry.headers)
+        response._content = entry.content
+        response._content_consumed = True
+        return response
 
+    @staticmethod
+    def parse_response(response, operation_name: str, settings: Settings) -> Union[Response, Dict]:
+        """
+        Read the operation data from a response.
+
+        :param response: holds the response
+        :param operation_name: holds the operation name
+        :param settings: holds the clients settings
+        :return: the response itself if Settings(return_requests_response=True) or the data of the operation
+        """
         if settings.return_requests_response:
             return response
         else:
-            response_json: Dict = response.json()
-            try:
-                return response_json[settings.default_response_key][operation_name]
-            except KeyError:
-                raise KeyError("Key not found in response. Try to set Settings(return_requests_response=True)")
+            return Transporter.parse_data(response.json(), operation_name, settings)
+
+    @staticmethod
+    def parse_data(response_json: Dict, operation_name: str, settings: Settings) -> Dict:
+        """
+        Read the operation data from a decoded response body.
+
+        :param response_json: holds the decoded response body
+        :param operation_name: holds the operation name
+        :param settings: holds the clients settings
+        :return: the data of the operation
+        """
+        try:
+            return response_json[settings.default_response_key][operation_name]
+        except KeyError:
+            raise KeyError("Key not found in response. Try to set Settings(return_requests_response=True)")
 
 
 class PromiseTransporter(Transporter):
     """
     A promise transporter returns Promises instead of the Response.
     Use this when you do not want to wait for the request to finish and continue to run with your code.
+
+    Requests are sent by a bounded pool of worker threads which share the session and its connections,
+    so promises that are created one after another are resolved in parallel.
     """
 
+    def __init__(self, session=None, operation_timeout=None, max_workers: int = 10, **options):
+        """
+        Create a new PromiseTransporter object.
+
+        :param session: (optional) a requests session object
+        :param operation_timeout: (optional) requests operation timeout
+        :param max_workers: holds the maximum amount of requests that are sent at the same time.
+        Further requests are queued. New sessions keep as many connections per host open.
+        :param options: holds further options of the Transporter like the connection pool options
+        """
+        if session is None:
+            options.setdefault("pool_maxsize", max_workers)
+        super(PromiseTransporter, self).__init__(session, operation_timeout, **options)
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graphy-promise")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._cancelled = False
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        :return: the amount of requests waiting for a free worker
+        """
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        """
+        :return: the amount of requests that are currently sent
+        """
+        return self._in_flight
+
     def post(
             self,
             endpoint: str,
             query: str,
             variables: Dict,
             operation_name: str,
-            settings: Settings
+            settings: Settings,
+            operation_type: str = None
     ) -> Promise[Union[Response, Dict]]:
         """
-        This method wraps the parents post method in a Promise.
+        This method sends the parents post in a worker thread and returns a Promise for its result.
+
+        :raises: RuntimeError if the transporter has been shut down
         """
-        return Promise(
-            lambda resolve, reject: resolve(super(PromiseTransporter, self).post(
-                endpoint, query, variables, operation_name, settings
-            ))
-        )
+        promise = Promise()
+
+        def send():
+            with self._lock:
+                self._queued -= 1
+                if self._cancelled:
+                    promise.do_reject(RuntimeError("The transporter has been shut down"))
+                    return
+                self._in_flight += 1
+            try:
+                result = super(PromiseTransporter, self).post(
+                    endpoint, query, variables, operation_name, settings, operation_type
+                )
+            except Exception as e:
+                promise.do_reject(e)
+            else:
+                promise.do_resolve(result)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        with self._lock:
+            self._queued += 1
+        try:
+            self._executor.submit(send)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        return promise
 
+    def resolved(self, value) -> Promise:
+        """
+        :param value: holds the value
+        :return: a resolved Promise for the value
+        """
+        return Promise.resolve(value)
+
+    def then(self, result: Promise, callback: Callable, errback: Callable = None) -> Promise:
+        """
+        :param result: holds a Promise returned by post()
+        :param callback: holds a callable which gets the result and returns a new one
+        :param errback: holds an optional callable which gets the exception if the Promise is rejected
+        :return: a Promise for the return value of the callback or errback
+        """
+        return result.then(callback, errback)
 
-class AsyncTransporter(Transporter):
+    def wait(self, result: Promise):
+        """
+        :param result: holds a Promise returned by post()
+        :return: the value of the Promise, once it is settled
+        :raises: the reason of a rejected Promise
+        """
+        return result.get()
+
+    def coalesce(self, flight: SingleFlight, key: Hashable, call: Callable) -> Promise:
+        """
+        :param flight: holds the single flight collapsing the calls
+        :param key: holds the key identifying identical calls
+        :param call: holds a callable calling post()
+        :return: the Promise of the shared call
+        """
+        return flight.do_promise(key, call)
+
+    def from_future(self, future: Future) -> Promise:
+        """
+        :param future: holds a future that is completed by another thread
+        :return: a Promise which is settled with the future
+        """
+        promise = Promise()
+
+        def settle(done: Future):
+            error = done.exception()
+            if error is not None:
+                promise.do_reject(error)
+            else:
+                promise.do_resolve(done.result())
+
+        future.add_done_callback(settle)
+        return promise
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        Stop the worker threads. Requests after a shutdown raise a RuntimeError.
+
+        :param wait: True if this call should wait until all sent requests are finished
+        :param cancel_pending: True if queued requests should be rejected instead of sent
+        """
+        if cancel_pending:
+            with self._lock:
+                self._cancelled = True
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "PromiseTransporter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+class AsyncResultMixin:
+    """ Lets the result hooks of a transporter work with the awaitables returned by an async post(). """
+
+    async def resolved(self, value):
+        """
+        :param value: holds the value
+        :return: the value. Calling this method returns an awaitable.
+        """
+        return value
+
+    async def then(self, result: Awaitable, callback: Callable, errback: Callable = None):
+        """
+        :param result: holds an awaitable returned by post()
+        :param callback: holds a callable which gets the result and returns a new one
+        :param errback: holds an optional callable which gets the exception if the result fails
+        :return: the return value of the callback or errback. Calling this method returns an awaitable.
+        """
+        try:
+            value = await result
+        except Exception as e:
+            if errback is None:
+                raise
+            return errback(e)
+        return callback(value)
+
+    def coalesce(self, flight: SingleFlight, key: Hashable, call: Callable) -> Awaitable:
+        """
+        :param flight: holds the single flight collapsing the calls
+        :param key: holds the key identifying identical calls
+        :param call: holds a callable calling post()
+        :return: an awaitable for the result of the shared call
+        """
+        return flight.do_async(key, call)
+
+    def from_future(self, future: Future) -> Awaitable:
+        """
+        :param future: holds a future that is completed by another thread or callback
+        :return: an awaitable for its result
+        """
+        return asyncio.wrap_future(future)
+
+
+class AsyncTransporter(AsyncResultMixin, Transporter):
     """
     An async transporter wraps the default post in an async method.
+    The blocking request runs in the default executor of the event loop, so other coroutines keep running.
     Use this for async programming.
     """
 
@@ -99,9 +595,197 @@ class AsyncTransporter(Transporter):
             query: str,
             variables: Dict,
             operation_name: str,
-            settings: Settings
+            settings: Settings,
+            operation_type: str = None
     ) -> Union[Response, Dict]:
         """
-        This method wraps the parents post method in an awaitable.
+        This method wraps the parents post method in an awaitable which runs it in the default executor.
+        """
+        post = super().post
+        return await asyncio.get_running_loop().run_in_executor(
+            None, lambda: post(endpoint, query, variables, operation_name, settings, operation_type)
+        )
+
+
+class AsyncHTTPTransporter(AsyncResultMixin, Transporter):
+    """
+    An async transporter with a non-blocking HTTP client built on asyncio streams.
+    Requests do not block the event loop, so many of them can run concurrently.
+    Connections are kept alive and reused from a pool with a limit of open connections per host.
+    The metrics of that pool are available as pool_metrics.
+
+    The headers of the session are sent with every request, so a custom session still works for authentication.
+    The session itself is only used by synchronous schema introspections, see Client.create() for an async one.
+    """
+
+    def __init__(
+            self,
+            session=None,
+            operation_timeout=None,
+            limit_per_host: int = 100,
+            keepalive_timeout: float = 30.0,
+            connect_timeout: float = 10.0,
+            ssl_context: ssl.SSLContext = None,
+            persisted_queries: Union[bool, PersistedQueries] = False,
+            get_queries: bool = False,
+            http_cache: Union[bool, HTTPCache] = True,
+            array_batching: bool = False,
+            batch_window: float = 0.005,
+            max_batch_size: int = 10
+    ):
+        """
+        Create a new AsyncHTTPTransporter object.
+
+        :param session: (optional) a requests session object whose headers are used
+        :param operation_timeout: (optional) time in seconds to wait for a response
+        :param limit_per_host: holds the maximum amount of open connections per host
+        :param keepalive_timeout: holds the time in seconds an idle connection is kept open
+        :param connect_timeout: holds the time in seconds to wait for a connection to be established
+        :param ssl_context: holds an optional ssl context for https connections
+        :param persisted_queries: (optional) True or a shared PersistedQueries instance
+        for sending documents by their hash instead of their full text.
+        :param get_queries: (optional) True if queries should be sent as GET requests, so HTTP caches can store them.
+        :param http_cache: (optional) True, False or a shared HTTPCache for the responses of GET requests
+        :param array_batching: (optional) True if queries that are sent at the same time should be posted together
+        as a json array. The server has to support this.
+        :param batch_window: (optional) time in seconds queries are collected for before a batch is posted
+        :param max_batch_size: (optional) maximum amount of queries that are posted together
         """
-        return super().post(endpoint, query, variables, operation_name, settings)
+        super(AsyncHTTPTransporter, self).__init__(
+            session,
+            operation_timeout,
+            persisted_queries=persisted_queries,
+            get_queries=get_queries,
+            http_cache=http_cache,
+            array_batching=array_batching,
+            batch_window=batch_window,
+            max_batch_size=max_batch_size
+        )
+        self.pool = ConnectionPool(limit_per_host, keepalive_timeout, connect_timeout, ssl_context)
+        self.pool_metrics = self.pool.metrics
+
+    async def request(
+            self,
+            endpoint: str,
+            payload: Union[Dict, List[Dict]],
+            method: str = "POST",
+            idempotent: bool = False
+    ) -> HTTPResponse:
+        """
+        Post a json payload or send it in the url of a GET request without blocking the event loop.
+
+        :param endpoint: holds the request endpoint
+        :param payload: holds the json payload
+        :param method: holds the HTTP method. Either "POST" or "GET".
+        :param idempotent: holds True if a post may be sent again when the connection broke, like for queries.
+        GET requests always may.
+        :return: the response
+        :raises: a RequestException if the request failed
+        """
+        headers = dict(self.session.headers)
+        headers["Accept-Encoding"] = "gzip, deflate"
+        if method != "GET":
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(payload).encode("UTF-8")
+            return await self.pool.request("POST", endpoint, headers, body, self.operation_timeout, idempotent)
+
+        url = self.get_url(endpoint, payload)
+        if self.http_cache is None:
+            return await self.pool.request("GET", url, headers, b"", self.operation_timeout)
+        entry = self.http_cache.fresh(url, headers)
+        if entry is not None:
+            return self.cached_response(url, entry)
+        conditional = dict(headers, **self.http_cache.conditional_headers(url, headers))
+        response = await self.pool.request("GET", url, conditional, b"", self.operation_timeout)
+        entry = self.http_cache.update(url, response, headers)
+        if entry is not None:
+            return self.cached_response(url, entry)
+        if response.status_code == 304:
+            # the stored response was dropped while the request was in flight
+            response = await self.pool.request("GET", url, headers, b"", self.operation_timeout)
+            self.http_cache.update(url, response, headers)
+        return response
+
+    @staticmethod
+    def cached_response(url: str, entry: CachedResponse) -> HTTPResponse:
+        """
+        :param url: holds the requested url
+        :param entry: holds the stored response
+        :return: a response made from the stored response
+        """
+        return HTTPResponse(url, entry.status_code, "OK", CaseInsensitiveDict(entry.headers), entry.content)
+
+    async def post(
+            self,
+            endpoint: str,
+            query: str,
+            variables: Dict,
+            operation_name: str,
+            settings: Settings,
+            operation_type: str = None
+    ) -> Union[HTTPResponse, Dict]:
+        """
+        Post a query without blocking the event loop.
+        With Settings(return_requests_response=True) a graphy.http.HTTPResponse is returned.
+        """
+        if self.array_batching and operation_type == "query":
+            item = ({"query": query, "variables": variables}, operation_name, settings)
+            return await asyncio.wrap_future(self.batch_queue(endpoint, asynchronous=True).put(item))
+        payload = self.build_payload(endpoint, query, variables)
+        idempotent = operation_type == "query"
+        response = await self.request(endpoint, payload, self.method(operation_type, payload), idempotent)
+        if self.persisted_queries is not None:
+            retry = self.persisted_queries.retry_payload(endpoint, query, variables, payload, response)
+            if retry is not None:
+                response = await self.request(endpoint, retry, self.method(operation_type, retry), idempotent)
+        return self.parse_response(response, operation_name, settings)
+
+    def send_batch(self, endpoint: str, items: List[Tuple[Dict, str, Settings]], futures: List[Future]):
+        """
+        Post the payloads of a batch as one json array in the running event loop.
+
+        :param endpoint: holds the request endpoint
+        :param items: holds the payload, operation name and settings of every operation
+        :param futures: holds the futures of the operations
+        """
+        async def send():
+            try:
+                response = await self.request(endpoint, [payload for payload, _, _ in items], idempotent=True)
+            except Exception as e:
+                fail(futures, e)
+            else:
+                self.demultiplex(response, items, futures)
+
+        asyncio.ensure_future(send())
+
+    @staticmethod
+    def item_response(response: HTTPResponse, body: Dict) -> HTTPResponse:
+        """
+        :param response: holds the response of a batch
+        :param body: holds the result of one operation of the batch
+        :return: a response holding the result of the operation only
+        """
+        content = json.dumps(body).encode("UTF-8")
+        return HTTPResponse(response.url, response.status_code, response.reason, response.headers, content)
+
+    async def introspect(self, endpoint: str, profile: str = FULL_PROFILE) -> Dict:
+        """
+        Makes a schema introspection without blocking the event loop.
+
+        :param endpoint: holds the servers endpoint
+        :param profile: holds the introspection profile. One of "full", "minimal" or "lazy".
+        :return: The dictionary with the schema
+        :raises: a RequestException if the schema could not be received.
+        """
+        response = await self.request(endpoint, {
+            "query": introspection_query(profile),
+            "operationName": "IntrospectionQuery",
+            "variables": {}
+        }, idempotent=True)
+        logger.debug(f"SCHEMA INTROSPECTION - {response.status_code} - POST (ASYNC) - {endpoint}")
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self):
+        """ Close all idle connections of the pool. """
+        await self.pool.close()
@@ -1,4 +1,7 @@
-from typing import Union
+import hashlib
+import json
+import sys
+from typing import Any, Iterable, Iterator, Union
 
 
 def get_version() -> str:
@@ -10,6 +13,49 @@ def get_version() -> str:
     return __version__
 
 
+def intern_string(value):
+    """
+    Intern a string so that equal strings share one object in memory.
+    :param value: the value to intern. Anything but a string is returned as is.
+    :return: the interned string or the value itself
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def canonical_json(value: Any) -> Union[str, None]:
+    """
+    Serialize a json serializable value independent of its key order.
+    :param value: the value to serialize
+    :return: the compact json or None if the value can not be serialized
+    """
+    try:
+        return json.dumps(value, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+
+
+def hash_json(value: Any) -> str:
+    """
+    Hash a json serializable value independent of its key order.
+    :param value: the value to hash
+    :return: the sha256 hex digest
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("UTF-8")).hexdigest()
+
+
+def digest_chunks(chunks: Iterable[str], digest=None) -> Iterator[str]:
+    """
+    Pass text chunks through while updating a digest with them.
+    :param chunks: the text chunks
+    :param digest: an optional hashlib object. Without one the chunks are passed through only.
+    :return: an iterator over the very same chunks
+    """
+    for chunk in chunks:
+        if digest is not None:
+            digest.update(chunk.encode("UTF-8"))
+        yield chunk
+
+
 def remove_duplicate_spaces(string: str) -> str:
     """
     Remove duplicate spaces from a string
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from graphy import AsyncTransporter, Client, GraphQLError, PromiseTransporter, Transporter, fields
+from graphy.helpers import split_aliased_response
+from tests.fixtures import FakeSession, fake_transporter
+
+
+class EchoSession(FakeSession):
+    """ A session that answers every aliased user query with the requested id. """
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs.get("json") or {}
+        if "_batch" in (body.get("query") or ""):
+            self.responses.append({"data": {
+                f"user_{key.rsplit('_', 1)[1]}": {"id": value} for key, value in body["variables"].items()
+            }})
+        return super(EchoSession, self).request(method, url, *args, **kwargs)
+
+
+class BatchLoaderTest(unittest.TestCase):
+    def test_concurrent_loads_are_sent_together(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=EchoSession()))
+        loader = client.query.user.loader(select=fields("id"), window=0.05)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            users = list(executor.map(lambda i: loader.load({"id": str(i)}), range(5)))
+        self.assertEqual(users, [{"id": str(i)} for i in range(5)])
+        self.assertEqual(len(client.transporter.session.requests), 1)
+        self.assertIn("user_4: user (id: $id_4) { id }", client.transporter.session.requests[0]["json"]["query"])
+
+    def test_full_batches_are_sent_at_once(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=EchoSession()))
+        loader = client.query.user.loader(select=fields("id"), window=10, max_batch_size=2)
+        users = loader.load_many([{"id": "1"}, {"id": "2"}, {"id": "1"}, {"id": "3"}])
+        self.assertEqual([u["id"] for u in users], ["1", "2", "1", "3"])
+        self.assertEqual((loader.batches, loader.average_batch_size), (2, 2.0))
+
+    def test_errors_are_split(self):
+        client = Client("http://localhost:8080", transporter=fake_transporter([{
+            "data": {"user_0": {"id": "1"}, "user_1": None},
+            "errors": [{"message": "Not allowed", "path": ["user_1"]}]
+        }]))
+        users = client.query.user.loader(select=fields("id")).load_many([{"id": "1"}, {"id": "2"}])
+        self.assertEqual(users[0], {"id": "1"})
+        self.assertIsInstance(users[1], GraphQLError)
+        with self.assertRaises(ValueError):
+            client.query.user.loader().load({"name": "Ash"})
+
+    def test_promise_transporter(self):
+        with PromiseTransporter(session=EchoSession()) as transporter:
+            loader = Client("http://localhost:8080", transporter=transporter).query.user.loader(select=fields("id"))
+            promises = [loader.load({"id": str(i)}) for i in range(3)]
+            self.assertEqual([p.get()["id"] for p in promises], ["0", "1", "2"])
+        self.assertEqual(len(transporter.session.requests), 1)
+
+    def test_async_transporter(self):
+        transporter = AsyncTransporter(session=EchoSession())
+        loader = Client("http://localhost:8080", transporter=transporter).query.user.loader(select=fields("id"))
+
+        async def run():
+            return await asyncio.gather(*(loader.load({"id": str(i)}) for i in range(3)))
+
+        self.assertEqual([u["id"] for u in asyncio.run(run())], ["0", "1", "2"])
+        self.assertEqual(len(transporter.session.requests), 1)
+
+
+class MutationSession(FakeSession):
+    """ A session that answers aliased createUser mutations slowly and rejects the name "bad". """
+
+    def __init__(self):
+        super(MutationSession, self).__init__()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs.get("json") or {}
+        if "createUser_batch" in (body.get("query") or ""):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.02)
+            with self.lock:
+                self.active -= 1
+            data, errors = {}, []
+            for key, name in body["variables"].items():
+                alias = f"createUser_{key.rsplit('_', 1)[1]}"
+                data[alias] = None if name == "bad" else {"name": name}
+                if name == "bad":
+                    errors.append({"message": "Invalid name", "path": [alias]})
+            self.responses.append({"data": data, "errors": errors})
+        return super(MutationSession, self).request(method, url, *args, **kwargs)
+
+
+class BulkMutationTest(unittest.TestCase):
+    names = ["a", "b", "bad", "c", "d", "e", "f"]
+
+    def test_results_are_streamed_in_order(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=MutationSession()))
+        consumed = []
+
+        def data():
+            for name in self.names:
+                consumed.append(name)
+                yield {"name": name}
+
+        results = client.mutation.createUser.bulk(data(), select=fields("name"), chunk_size=2, concurrency=2)
+        first = next(results)
+        self.assertLessEqual(len(consumed), 6)
+        results = [first] + list(results)
+        self.assertEqual([r.index for r in results], list(range(7)))
+        self.assertEqual([r.data["name"] for r in results if r.ok], ["a", "b", "c", "d", "e", "f"])
+        self.assertIsInstance(results[2].error, GraphQLError)
+        self.assertEqual(len(client.transporter.session.requests), 4)
+        self.assertLessEqual(client.transporter.session.max_active, 2)
+
+    def test_async_transporter(self):
+        client = Client("http://localhost:8080", transporter=AsyncTransporter(session=MutationSession()))
+
+        async def run():
+            bulk = client.mutation.createUser.bulk(({"name": n} for n in self.names), fields("name"), chunk_size=3)
+            return [result async for result in bulk]
+
+        results = asyncio.run(run())
+        self.assertEqual([r.ok for r in results], [True, True, False, True, True, True, True])
+        self.assertEqual(len(client.transporter.session.requests), 3)
+
+
+class SplitAliasedResponseTest(unittest.TestCase):
+    def test_errors_without_path_concern_missing_data(self):
+        results = split_aliased_response({"errors": [{"message": "Server error"}]}, ["a", "b"])
+        self.assertEqual([str(error) for _, error in results], ["Server error"] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
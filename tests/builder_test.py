@@ -0,0 +1,68 @@
+import pickle
+import unittest
+
+from graphy import fields
+from graphy.builder import GraphQLBuilder, SelectedField, extract_fragments
+
+
+class SelectedFieldTest(unittest.TestCase):
+    def test_identical_selections_are_shared(self):
+        first = fields("id", posts=["id", "title"])
+        second = fields("id", posts=["id", SelectedField("title")])
+        self.assertEqual(first, second)
+        self.assertIs(first[1], second[1])
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, fields("id", posts=["id"]))
+
+    def test_fields_are_immutable(self):
+        field = SelectedField("id")
+        with self.assertRaises(AttributeError):
+            field.name = "name"
+
+    def test_rendering(self):
+        selection = fields("id", posts=["id", "title"])
+        self.assertEqual(str(selection[1]), "posts { id title }")
+        self.assertEqual(GraphQLBuilder().fields(selection).generate(), "{ id posts { id title } }")
+
+    def test_operation_with_variables(self):
+        builder = GraphQLBuilder().operation("query", name="user", params={"$id": "ID!"})
+        builder = builder.query("user", params={"id": "$id"}).fields(fields("id", posts=["title"]))
+        self.assertEqual(builder.generate(), "query user ($id: ID!) { user (id: $id) { id posts { title } } }")
+
+    def test_pickle(self):
+        selection = fields("id", posts=["id", "title"])
+        self.assertIs(pickle.loads(pickle.dumps(selection))[1], selection[1])
+
+
+class FragmentExtractionTest(unittest.TestCase):
+    TYPES = {
+        ("Feed", "posts"): "Post",
+        ("Feed", "author"): "User",
+        ("Post", "author"): "User",
+        ("User", "profile"): "Profile"
+    }
+
+    def field_type(self, type_name, field_name):
+        return self.TYPES.get((type_name, field_name))
+
+    def test_repeated_selections_are_hoisted(self):
+        author = fields("id", "name", "email", "avatarUrl", "createdAt", profile=fields("bio", "website", "location"))
+        selection = fields("id", posts=fields("id", "title", author=author), author=author)
+        document = GraphQLBuilder().operation("query").query("feed").fields(selection)
+        plain = document.generate()
+        optimized = document.extract_fragments("Feed", self.field_type).generate()
+        self.assertLess(len(optimized), len(plain))
+        self.assertEqual(optimized.count("...UserFields"), 2)
+        self.assertTrue(optimized.endswith(
+            "fragment UserFields on User { id name email avatarUrl createdAt profile { bio website location } }"
+        ))
+
+    def test_small_or_unknown_selections_stay(self):
+        selection = fields(posts=fields("id"), author=fields("id"), unknown=fields("a", "b"), other=fields("a", "b"))
+        rewritten, fragments = extract_fragments(selection, "Feed", self.field_type)
+        self.assertEqual(rewritten, selection)
+        self.assertEqual(fragments, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
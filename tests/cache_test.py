@@ -0,0 +1,106 @@
+import tempfile
+import time
+import unittest
+
+from graphy import Client, ResponseCache, SchemaCache
+from graphy.cache import MISS
+from tests.fixtures import fake_transporter, INTROSPECTION
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.endpoint = "http://localhost:8080"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_second_client_reads_from_cache(self):
+        cache = SchemaCache(self.directory.name)
+        first = fake_transporter()
+        Client(self.endpoint, transporter=first, schema_cache=cache)
+        second = fake_transporter()
+        client = Client(self.endpoint, transporter=second, schema_cache=cache)
+        self.assertEqual(first.session.introspections, 1)
+        self.assertEqual(second.session.introspections, 0)
+        self.assertIn("user", dict(client.query))
+
+    def test_stale_entry_is_refreshed(self):
+        cache = SchemaCache(self.directory.name, ttl=-1)
+        cache.store(self.endpoint, INTROSPECTION)
+        transporter = fake_transporter()
+        Client(self.endpoint, transporter=transporter, schema_cache=cache)
+        self.assertEqual(transporter.session.introspections, 1)
+
+    def test_stale_entry_is_used_without_refresh(self):
+        cache = SchemaCache(self.directory.name, ttl=-1, refresh_if_stale=False)
+        cache.store(self.endpoint, INTROSPECTION)
+        transporter = fake_transporter()
+        Client(self.endpoint, transporter=transporter, schema_cache=cache)
+        self.assertEqual(transporter.session.introspections, 0)
+
+    def test_concurrent_writes_do_not_mix(self):
+        cache = SchemaCache(self.directory.name)
+        first = cache.tee(self.endpoint, ['{"data": ', '{"first": true}}'])
+        second = cache.tee(self.endpoint, ['{"data": ', '{"second": true}}'])
+        next(first)
+        next(second)
+        list(first)
+        list(second)
+        self.assertEqual(cache.load(self.endpoint), {"data": {"second": True}})
+
+    def test_invalidate(self):
+        cache = SchemaCache(self.directory.name)
+        cache.store(self.endpoint, INTROSPECTION)
+        cache.invalidate(self.endpoint)
+        self.assertIsNone(cache.load(self.endpoint))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_variables_are_canonicalized(self):
+        cache = ResponseCache()
+        cache.put(cache.key("user", "query", {"a": 1, "b": 2}), "value")
+        self.assertEqual(cache.get(cache.key("user", "query", {"b": 2, "a": 1})), "value")
+        self.assertIs(cache.get(cache.key("user", "query", {"a": 2, "b": 2})), MISS)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_results_expire(self):
+        cache = ResponseCache(ttl=0.01, ttls={"users": None, "posts": 0})
+        cache.put(cache.key("user", "query", {}), "user")
+        cache.put(cache.key("users", "query", {}), "users")
+        self.assertIsNone(cache.key("posts", "query", {}))
+        time.sleep(0.02)
+        self.assertIs(cache.get(cache.key("user", "query", {})), MISS)
+        self.assertEqual(cache.get(cache.key("users", "query", {})), "users")
+
+    def test_least_recently_used_results_are_dropped(self):
+        cache = ResponseCache(maxsize=2)
+        for name in ("a", "b"):
+            cache.put(cache.key(name, "query", {}), name)
+        cache.get(cache.key("a", "query", {}))
+        cache.put(cache.key("c", "query", {}), "c")
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(cache.key("b", "query", {})), MISS)
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        for name, variables in (("a", {"id": 1}), ("a", {"id": 2}), ("b", {})):
+            cache.put(cache.key(name, "query", variables), name)
+        cache.invalidate("a", {"id": 1})
+        self.assertEqual(len(cache), 2)
+        cache.invalidate("a")
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_by_variables(self):
+        cache = ResponseCache()
+        for variables in ({"id": 1}, {"id": 2}):
+            cache.put(cache.key("a", "query", variables), variables["id"])
+        cache.invalidate(variables={"id": 1})
+        self.assertIs(cache.get(cache.key("a", "query", {"id": 1})), MISS)
+        self.assertEqual(cache.get(cache.key("a", "query", {"id": 2})), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from graphy import Client, EntityCache, fields
+from graphy.cache import MISS
+from graphy.entities import Reference, add_identity_fields, field_keys
+from graphy.helpers import field_type_resolver, fragment_matcher
+from graphy.schema import SchemaType
+from tests.fixtures import fake_transporter
+
+
+def user(user_id: str, name: str) -> dict:
+    return {"name": name, "__typename": "User", "id": user_id}
+
+
+class IdentityFieldsTest(unittest.TestCase):
+    def test_identity_fields_are_added(self):
+        client = Client("http://localhost:8080", transporter=fake_transporter())
+        selection = add_identity_fields(
+            fields("name", posts=fields("title"), **{"... on User": fields("id")}),
+            "User",
+            field_type_resolver(client.schema.types)
+        )
+        self.assertEqual(
+            " ".join(str(f) for f in selection),
+            "name posts { title __typename id } ... on User { id __typename } __typename id"
+        )
+
+    def test_field_keys(self):
+        self.assertEqual(field_keys("name"), ("name", "name"))
+        self.assertEqual(field_keys("first: posts(first: 1)"), ("first", "posts(first: 1)"))
+
+
+class EntityCacheTest(unittest.TestCase):
+    selection = fields("name", "__typename", "id")
+
+    def test_entities_are_shared_between_results(self):
+        cache = EntityCache()
+        cache.write("users", {}, self.selection, [user("1", "Ash"), user("2", "Misty")])
+        cache.write("user", {"id": "1"}, self.selection, user("1", "Ash Ketchum"))
+        self.assertEqual(cache.read("users", {}, self.selection)[0]["name"], "Ash Ketchum")
+        self.assertEqual(cache.entity("User", "1")["name"], "Ash Ketchum")
+        self.assertEqual(len(cache), 2)
+
+    def test_missing_fields_are_requested(self):
+        cache = EntityCache()
+        cache.write("user", {"id": "1"}, fields("__typename", "id"), {"__typename": "User", "id": "1"})
+        self.assertIs(cache.read("user", {"id": "1"}, self.selection), MISS)
+        self.assertEqual(cache.read("user", {"id": "1"}, fields("id")), {"id": "1"})
+
+    def test_evicted_entities_are_requested(self):
+        cache = EntityCache()
+        cache.write("user", {"id": "1"}, self.selection, user("1", "Ash"))
+        cache.evict("User", "1")
+        self.assertIs(cache.read("user", {"id": "1"}, self.selection), MISS)
+
+    def test_objects_without_identity_are_embedded(self):
+        cache = EntityCache()
+        selection = fields(stats=fields("count"), owner=self.selection)
+        cache.write("summary", {}, selection, {"stats": {"count": 2}, "owner": user("1", "Ash")})
+        self.assertEqual(cache.read("summary", {}, selection)["stats"], {"count": 2})
+        self.assertEqual(cache._roots[("summary", "{}")]["owner"], Reference("User:1"))
+
+
+    def test_fragments_on_abstract_types(self):
+        types = {
+            "Node": SchemaType({"kind": "INTERFACE", "name": "Node", "possibleTypes": [{"name": "User"}]}),
+            "Post": SchemaType({"kind": "OBJECT", "name": "Post"})
+        }
+        selection = fields("__typename", "id", **{"... on Node": fields("name"), "... on Post": fields("title")})
+        cache = EntityCache()
+        cache.write("user", {"id": "1"}, selection, user("1", "Ash"), fragment_matcher(types))
+        self.assertEqual(cache.read("user", {"id": "1"}, selection, matcher=fragment_matcher(types)), user("1", "Ash"))
+        self.assertIs(cache.read("user", {"id": "1"}, selection), MISS)  # without a schema Node might apply
+
+
+class ClientEntityCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.transporter = fake_transporter()
+        self.client = Client(
+            "http://localhost:8080",
+            transporter=self.transporter,
+            entity_cache=EntityCache(lookups={"user": "id"})
+        )
+
+    def respond(self, *responses):
+        self.transporter.session.responses.extend(responses)
+
+    def test_lookups_are_answered_from_other_queries(self):
+        self.respond({"data": {"users": [user("1", "Ash"), user("2", "Misty")]}})
+        self.client.query.users(select=fields("name"))
+        self.assertEqual(self.client.query.user(select=fields("name"), where={"id": "2"}), user("2", "Misty"))
+        self.assertEqual(len(self.transporter.session.requests), 1)
+        self.assertIn("users { name __typename id }", self.transporter.session.requests[0]["json"]["query"])
+
+    def test_mutations_update_entities(self):
+        self.respond({"data": {"user": user("1", "Ash")}}, {"data": {"createUser": user("1", "Gary")}})
+        self.client.query.user(select=fields("name"), where={"id": "1"})
+        self.client.mutation.createUser(select=fields("name"), data={"name": "Gary"})
+        self.assertEqual(self.client.query.user(select=fields("name"), where={"id": "1"})["name"], "Gary")
+        self.assertEqual(len(self.transporter.session.requests), 2)
+        self.assertEqual(self.client.entity_cache.hit_rate, 0.5)
+
+    def test_identified_selections_are_kept_apart_from_documents(self):
+        self.respond({"data": {"user": user("1", "Ash")}})
+        self.client.query.user(select=fields("name"), where={"id": "1"})
+        self.client.query.user(select=fields("name"), where={"id": "1"})
+        self.assertEqual(len(self.client.query_cache), 1)
+        self.assertEqual(self.client.query_cache.hits + self.client.query_cache.misses, 1)
+        self.assertEqual(len(self.client.identity_cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from graphy import AsyncTransporter, Client, PromiseTransporter, Transporter, fields
+from tests.fixtures import FakeSession
+
+
+class DelaySession(FakeSession):
+    """ A session answering user queries with the requested id after a delay. The ids "slow" and "down" misbehave. """
+
+    def __init__(self):
+        super(DelaySession, self).__init__()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs.get("json") or {}
+        if "__schema" in (body.get("query") or ""):
+            return super(DelaySession, self).request(method, url, *args, **kwargs)
+        user_id = (body.get("variables") or {}).get("id")
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.5 if user_id == "slow" else 0.05)
+            if user_id == "down":
+                raise ConnectionError("down")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        with self.lock:
+            self.responses.append({"data": {"user": {"id": user_id}, "users": [{"id": "1"}]}})
+            return super(DelaySession, self).request(method, url, *args, **kwargs)
+
+
+SPECS = [("user", fields("id"), {"id": str(i)}) for i in range(6)] + [("users", fields("id"))]
+
+
+class FanOutTest(unittest.TestCase):
+    def test_results_are_returned_in_order(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=DelaySession()))
+        start = time.monotonic()
+        results = client.gather(SPECS, concurrency=3)
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertEqual([r.data for r in results], [{"id": str(i)} for i in range(6)] + [[{"id": "1"}]])
+        self.assertEqual(client.transporter.session.max_in_flight, 3)
+
+    def test_failures_are_reported_per_item(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=DelaySession()))
+        results = client.map("user", [{"id": "1"}, {"id": "down"}, {"id": "slow"}, {"id": "2"}], timeout=0.2)
+        self.assertEqual([r.ok for r in results], [True, False, False, True])
+        self.assertIsInstance(results[1].error, ConnectionError)
+        self.assertIsInstance(results[2].error, TimeoutError)
+        self.assertEqual(results[3].data, {"id": "2"})
+
+    def test_timeout_bounds_queued_operations(self):
+        client = Client("http://localhost:8080", transporter=Transporter(session=DelaySession()))
+        start = time.monotonic()
+        results = client.map("user", [{"id": "slow"}, {"id": "1"}], concurrency=1, timeout=0.2)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual([type(r.error) for r in results], [TimeoutError, TimeoutError])
+
+    def test_async_timeout_bounds_queued_operations(self):
+        client = Client("http://localhost:8080", transporter=AsyncTransporter(session=DelaySession()))
+
+        async def run():
+            start = time.monotonic()
+            results = await client.map("user", [{"id": "slow"}, {"id": "1"}], concurrency=1, timeout=0.2)
+            return time.monotonic() - start, results
+
+        elapsed, results = asyncio.run(run())
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual([type(r.error) for r in results], [TimeoutError, TimeoutError])
+
+    def test_promise_transporter(self):
+        with PromiseTransporter(session=DelaySession(), max_workers=4) as transporter:
+            client = Client("http://localhost:8080", transporter=transporter)
+            results = client.gather(SPECS + [(client.query.user, None, {"id": "slow"})], timeout=0.2)
+        self.assertEqual([r.ok for r in results], [True] * 7 + [False])
+
+    def test_async_transporter(self):
+        client = Client("http://localhost:8080", transporter=AsyncTransporter(session=DelaySession()))
+
+        async def run():
+            start = time.monotonic()
+            results = await client.map("user", [{"id": "1"}, {"id": "slow"}, {"id": "2"}], concurrency=3, timeout=0.2)
+            return time.monotonic() - start, results
+
+        elapsed, results = asyncio.run(run())
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual([r.data for r in results], [{"id": "1"}, None, {"id": "2"}])
+        self.assertIsInstance(results[1].error, TimeoutError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import json
+from typing import Dict, List
+
+import requests
+
+from graphy import Transporter
+
+
+def named(kind: str, name: str) -> Dict:
+    return {"kind": kind, "name": name, "ofType": None}
+
+
+def wrapped(kind: str, of_type: Dict) -> Dict:
+    return {"kind": kind, "name": None, "ofType": of_type}
+
+
+def field(name: str, field_type: Dict, args: List[Dict] = None) -> Dict:
+    return {
+        "name": name,
+        "description": f"The {name} field.",
+        "args": args or [],
+        "type": field_type,
+        "isDeprecated": False,
+        "deprecationReason": None
+    }
+
+
+def argument(name: str, arg_type: Dict) -> Dict:
+    return {"name": name, "description": None, "type": arg_type, "defaultValue": None}
+
+
+def object_type(name: str, fields: List[Dict]) -> Dict:
+    return {
+        "kind": "OBJECT",
+        "name": name,
+        "description": f"The {name} type.",
+        "fields": fields,
+        "inputFields": None,
+        "interfaces": [],
+        "enumValues": None,
+        "possibleTypes": None
+    }
+
+
+def scalar_type(name: str) -> Dict:
+    return {
+        "kind": "SCALAR",
+        "name": name,
+        "description": None,
+        "fields": None,
+        "inputFields": None,
+        "interfaces": None,
+        "enumValues": None,
+        "possibleTypes": None
+    }
+
+
+USER = named("OBJECT", "User")
+POST = named("OBJECT", "Post")
+ID = wrapped("NON_NULL", named("SCALAR", "ID"))
+STRING = named("SCALAR", "String")
+
+INTROSPECTION = {
+    "data": {
+        "__schema": {
+            "queryType": {"name": "Query"},
+            "mutationType": {"name": "Mutation"},
+            "subscriptionType": None,
+            "types": [
+                object_type("Query", [
+                    field("user", USER, [argument("id", ID)]),
+                    field("users", wrapped("NON_NULL", wrapped("LIST", wrapped("NON_NULL", USER))))
+                ]),
+                object_type("Mutation", [
+                    field("createUser", USER, [argument("name", wrapped("NON_NULL", STRING))])
+                ]),
+                object_type("User", [
+                    field("id", ID),
+                    field("name", STRING),
+                    field("posts", wrapped("LIST", POST))
+                ]),
+                object_type("Post", [
+                    field("id", ID),
+                    field("title", STRING),
+                    field("author", USER)
+                ]),
+                scalar_type("ID"),
+                scalar_type("String")
+            ],
+            "directives": []
+        }
+    }
+}
+
+
+def make_response(payload: Dict, status_code: int = 200, headers: Dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("UTF-8")
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession(requests.Session):
+    """ A session that answers introspection queries from the fixture and records everything else. """
+
+    def __init__(self, responses: List[Dict] = None, introspection: Dict = None):
+        super().__init__()
+        self.introspection = introspection or INTROSPECTION
+        self.responses = list(responses or [])
+        self.requests: List[Dict] = []
+        self.introspections = 0
+        self.type_requests: List[List[str]] = []
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs.get("json") or {}
+        if not isinstance(body, dict):
+            body = {}  # batches are recorded like every other request
+        if "__schema" in (body.get("query") or ""):
+            self.introspections += 1
+            return make_response(self.introspection)
+        if "__type(" in (body.get("query") or ""):
+            types = {t["name"]: t for t in self.introspection["data"]["__schema"]["types"]}
+            self.type_requests.append(list(body["variables"].values()))
+            return make_response({"data": {alias: types.get(name) for alias, name in body["variables"].items()}})
+        self.requests.append({"method": method, "url": url, **kwargs})
+        return make_response(self.responses.pop(0) if self.responses else {"data": {}})
+
+
+def fake_transporter(responses: List[Dict] = None, **kwargs) -> Transporter:
+    return Transporter(session=FakeSession(responses), **kwargs)
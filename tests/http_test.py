@@ -0,0 +1,249 @@
+import asyncio
+import json
+import time
+import unittest
+
+import requests
+
+from graphy import AsyncHTTPTransporter, Client, Settings
+from tests.fixtures import INTROSPECTION
+
+
+class FakeServer:
+    """ A keep-alive HTTP server answering introspections and user queries after a short delay. """
+
+    def __init__(self, delay: float = 0.05, chunked: bool = False, hang_up: bool = False, interim: bool = False):
+        self.delay = delay
+        self.chunked = chunked
+        self.interim = interim  # send 100 Continue before every response
+        self.hang_up = hang_up  # close every connection instead of answering its second request
+        self.documents = set()  # the hashes of the persisted queries
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.bodies = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/graphql"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        answered = 0
+        try:
+            while True:
+                headers = {}
+                if not await reader.readline():
+                    break
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = json.loads(await reader.readexactly(int(headers["content-length"])))
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                await asyncio.sleep(self.delay)
+                self.active -= 1
+                self.bodies.append(body)
+                if self.hang_up and answered:
+                    break
+                answered += 1
+                persisted = (body.get("extensions") or {}).get("persistedQuery") if isinstance(body, dict) else None
+                if persisted is not None and "query" in body:
+                    self.documents.add(persisted["sha256Hash"])
+                if persisted is not None and persisted["sha256Hash"] not in self.documents:
+                    payload = {"errors": [{"message": "PersistedQueryNotFound"}]}
+                elif isinstance(body, list):
+                    payload = [{"data": {"user": {"id": b["variables"]["id"], "name": "Jane"}}} for b in body]
+                elif "__schema" in body.get("query", ""):
+                    payload = INTROSPECTION
+                else:
+                    payload = {"data": {"user": {"id": body["variables"]["id"], "name": "Jane"}}}
+                content = json.dumps(payload).encode()
+                if self.interim:
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                if self.chunked:
+                    middle = len(content) // 2
+                    parts = (content[:middle], content[middle:])
+                    framed = b"".join(b"%x\r\n%s\r\n" % (len(part), part) for part in parts)
+                    writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n" + framed + b"0\r\n\r\n")
+                else:
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(content), content))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class AsyncHTTPTransporterTest(unittest.TestCase):
+    def run_with_server(self, scenario, **kwargs):
+        async def run():
+            server = FakeServer(**kwargs)
+            endpoint = await server.start()
+            try:
+                return await scenario(server, endpoint)
+            finally:
+                await server.stop()
+        return asyncio.run(run())
+
+    def test_queries_run_concurrently_over_pooled_connections(self):
+        async def scenario(server, endpoint):
+            transporter = AsyncHTTPTransporter(limit_per_host=20)
+            client = await Client.create(endpoint, transporter=transporter)
+            started = time.monotonic()
+            users = await asyncio.gather(*(client.query.user(where={"id": str(i)}) for i in range(200)))
+            elapsed = time.monotonic() - started
+            await transporter.close()
+            return server, users, elapsed
+
+        server, users, elapsed = self.run_with_server(scenario)
+        self.assertEqual([u["id"] for u in users], [str(i) for i in range(200)])
+        self.assertEqual(server.max_active, 20)
+        self.assertLessEqual(server.connections, 20)
+        self.assertLess(elapsed, 200 * 0.05 / 4)
+
+    def test_chunked_response(self):
+        async def scenario(server, endpoint):
+            client = await Client.create(endpoint)
+            user = await client.query.user(where={"id": "1"})
+            await client.transporter.close()
+            return client, user
+
+        client, user = self.run_with_server(scenario, delay=0, chunked=True)
+        self.assertIn("user", dict(client.query))
+        self.assertEqual(user["name"], "Jane")
+
+    def test_interim_responses_are_skipped(self):
+        async def scenario(server, endpoint):
+            client = await Client.create(endpoint, transporter=AsyncHTTPTransporter(limit_per_host=1))
+            users = [await client.query.user(where={"id": str(i)}) for i in range(2)]
+            await client.transporter.close()
+            return server, users
+
+        server, users = self.run_with_server(scenario, delay=0, interim=True)
+        self.assertEqual([u["id"] for u in users], ["0", "1"])
+        self.assertEqual(server.connections, 1)
+
+    def test_only_idempotent_requests_are_sent_again_on_a_broken_connection(self):
+        async def scenario(server, endpoint):
+            client = await Client.create(endpoint, transporter=AsyncHTTPTransporter(limit_per_host=1))
+            user = await client.query.user(where={"id": "1"})  # on the connection of the introspection
+            with self.assertRaises(requests.ConnectionError):
+                await client.mutation.createUser(data={"name": "Jane"})
+            await client.transporter.close()
+            return server, user
+
+        server, user = self.run_with_server(scenario, delay=0, hang_up=True)
+        self.assertEqual(user["id"], "1")
+        kinds = [b["query"].split()[0] if "__schema" not in b["query"] else "introspection" for b in server.bodies]
+        self.assertEqual(kinds, ["introspection", "query", "query", "mutation"])
+
+    def test_persisted_queries(self):
+        async def scenario(server, endpoint):
+            client = await Client.create(endpoint, transporter=AsyncHTTPTransporter(persisted_queries=True))
+            users = [await client.query.user(where={"id": str(i)}) for i in range(2)]
+            await client.transporter.close()
+            return server, users
+
+        server, users = self.run_with_server(scenario, delay=0)
+        self.assertEqual([u["id"] for u in users], ["0", "1"])
+        self.assertEqual([("query" in b) for b in server.bodies[1:]], [False, True, False])
+        self.assertEqual(len(server.documents), 1)
+
+
+class RevalidatingServer:
+    """ A keep-alive HTTP server answering GET requests with an ETag and revalidations with a bare 304. """
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/graphql"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                self.requests.append(headers)
+                if headers.get("if-none-match") == '"v1"':
+                    writer.write(b'HTTP/1.1 304 Not Modified\r\nETag: "v1"\r\nCache-Control: no-cache\r\n\r\n')
+                else:
+                    content = json.dumps({"data": {"user": {"id": "1"}}}).encode()
+                    writer.write(
+                        b'HTTP/1.1 200 OK\r\nETag: "v1"\r\nCache-Control: no-cache\r\nContent-Length: %d\r\n\r\n%s'
+                        % (len(content), content)
+                    )
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class AsyncGetQueriesTest(unittest.TestCase):
+    def test_not_modified_responses_have_no_body(self):
+        async def run():
+            server = RevalidatingServer()
+            endpoint = await server.start()
+            transporter = AsyncHTTPTransporter(get_queries=True)
+            try:
+                users = [await asyncio.wait_for(
+                    transporter.post(endpoint, "query { user { id } }", {}, "user", Settings(), "query"), 2
+                ) for _ in range(2)]
+            finally:
+                await transporter.close()
+                await server.stop()
+            return server, transporter, users
+
+        server, transporter, users = asyncio.run(run())
+        self.assertEqual(users, [{"id": "1"}] * 2)
+        self.assertEqual(server.requests[1].get("if-none-match"), '"v1"')
+        self.assertEqual((server.connections, transporter.http_cache.revalidated), (1, 1))
+
+
+class AsyncArrayBatchingTest(unittest.TestCase):
+    def test_concurrent_queries_are_posted_as_one_array(self):
+        async def run():
+            server = FakeServer(delay=0)
+            endpoint = await server.start()
+            transporter = AsyncHTTPTransporter(array_batching=True, max_batch_size=3)
+            try:
+                client = await Client.create(endpoint, transporter=transporter)
+                users = await asyncio.gather(*(client.query.user(where={"id": str(i)}) for i in range(4)))
+            finally:
+                await transporter.close()
+                await server.stop()
+            return server, users
+
+        server, users = asyncio.run(run())
+        self.assertEqual([u["id"] for u in users], ["0", "1", "2", "3"])
+        self.assertEqual([len(b) for b in server.bodies if isinstance(b, list)], [3, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from graphy import AsyncTransporter, Client, PromiseTransporter, ResponseCache, Settings, Transporter, fields
+from tests.fixtures import FakeSession, fake_transporter
+
+
+class QueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.transporter = fake_transporter([{"data": {"user": None}}] * 3)
+        self.client = Client("http://localhost:8080", transporter=self.transporter)
+
+    def test_same_shape_is_built_once(self):
+        self.client.query.user(where={"id": "1"})
+        self.client.query.user(where={"id": "2"})
+        requests = self.transporter.session.requests
+        self.assertEqual(requests[0]["json"]["query"], requests[1]["json"]["query"])
+        self.assertEqual(requests[1]["json"]["variables"], {"id": "2"})
+        self.assertEqual((self.client.query_cache.hits, self.client.query_cache.misses), (1, 1))
+
+    def test_different_selections_are_built_separately(self):
+        self.client.query.user(select=fields("id"), where={"id": "1"})
+        self.client.query.user(select=fields("id", "name"), where={"id": "1"})
+        self.client.query.user(select=fields("id", "name"), where={"id": "2"})
+        queries = [r["json"]["query"] for r in self.transporter.session.requests]
+        self.assertNotIn("name", queries[0])
+        self.assertIn("name", queries[1])
+        self.assertEqual((self.client.query_cache.hits, self.client.query_cache.misses), (1, 2))
+
+    def test_cache_can_be_disabled(self):
+        transporter = fake_transporter([{"data": {"user": None}}])
+        client = Client("http://localhost:8080", transporter=transporter, settings=Settings(query_cache_size=0))
+        client.query.user(where={"id": "1"})
+        self.assertIsNone(client.query_cache)
+
+
+class FragmentSettingTest(unittest.TestCase):
+    def test_repeated_selections_are_sent_as_fragments(self):
+        transporter = fake_transporter([{"data": {"user": None}}])
+        client = Client("http://localhost:8080", transporter=transporter, settings=Settings(extract_fragments=True))
+        post = fields("id", "title", author=fields("id", "name", posts=fields("id", "title")))
+        client.query.user(select=fields(**{"a: posts": post, "b: posts": post, "c: posts": post}), where={"id": "1"})
+        query = transporter.session.requests[0]["json"]["query"]
+        self.assertIn("a: posts { ...PostFields }", query)
+        self.assertIn("fragment PostFields on Post { id title author { id name posts { id title } } }", query)
+
+
+class ResponseCacheClientTest(unittest.TestCase):
+    responses = [{"data": {"user": {"id": "1"}}}, {"data": {"user": {"id": "2"}}}]
+
+    def client(self, transporter) -> Client:
+        return Client("http://localhost:8080", transporter=transporter, response_cache=ResponseCache())
+
+    def test_repeated_queries_are_cached(self):
+        client = self.client(fake_transporter(self.responses))
+        self.assertEqual(client.query.user(where={"id": "1"}), {"id": "1"})
+        self.assertEqual(client.query.user(where={"id": "1"}), {"id": "1"})
+        self.assertEqual(client.query.user(where={"id": "2"}), {"id": "2"})
+        self.assertEqual(len(client.transporter.session.requests), 2)
+        self.assertAlmostEqual(client.response_cache.hit_rate, 1 / 3)
+
+    def test_endpoints_do_not_share_results(self):
+        cache = ResponseCache()
+        first = Client("http://localhost:8080", transporter=fake_transporter(self.responses), response_cache=cache)
+        second = Client("http://localhost:8081", transporter=fake_transporter(self.responses), response_cache=cache)
+        self.assertEqual(first.query.user(where={"id": "1"}), {"id": "1"})
+        self.assertEqual(second.query.user(where={"id": "1"}), {"id": "1"})
+        self.assertEqual(len(second.transporter.session.requests), 1)
+        cache.invalidate(endpoint="http://localhost:8081")
+        self.assertEqual(len(cache), 1)
+
+    def test_mutations_are_not_cached(self):
+        client = self.client(fake_transporter([{"data": {"createUser": {"id": "1"}}}] * 2))
+        client.mutation.createUser(data={"name": "Ash"})
+        client.mutation.createUser(data={"name": "Ash"})
+        self.assertEqual(len(client.transporter.session.requests), 2)
+
+    def test_promise_transporter(self):
+        with PromiseTransporter(session=FakeSession(self.responses)) as transporter:
+            client = self.client(transporter)
+            self.assertEqual(client.query.user(where={"id": "1"}).get(), {"id": "1"})
+            self.assertEqual(client.query.user(where={"id": "1"}).get(), {"id": "1"})
+        self.assertEqual(len(transporter.session.requests), 1)
+
+    def test_async_transporter(self):
+        transporter = AsyncTransporter(session=FakeSession(self.responses))
+        client = self.client(transporter)
+
+        async def run():
+            return [await client.query.user(where={"id": "1"}) for _ in range(2)]
+
+        self.assertEqual(asyncio.run(run()), [{"id": "1"}] * 2)
+        self.assertEqual(len(transporter.session.requests), 1)
+
+
+class SlowSession(FakeSession):
+    """ A session that takes a while for every query and fails if asked to. """
+
+    def __init__(self, error: Exception = None):
+        super(SlowSession, self).__init__()
+        self.error = error
+
+    def request(self, method, url, *args, **kwargs):
+        if "__schema" not in kwargs.get("json", {}).get("query", ""):
+            time.sleep(0.1)
+            if self.error is not None:
+                self.requests.append(kwargs)
+                raise self.error
+            self.responses.append({"data": {"user": {"id": "1"}}})
+        return super(SlowSession, self).request(method, url, *args, **kwargs)
+
+
+class SingleFlightTest(unittest.TestCase):
+    def client(self, transporter) -> Client:
+        return Client("http://localhost:8080", transporter=transporter, single_flight=True)
+
+    def test_concurrent_queries_share_a_request(self):
+        client = self.client(Transporter(session=SlowSession()))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            users = list(executor.map(lambda _: client.query.user(where={"id": "1"}), range(4)))
+        self.assertEqual(users, [{"id": "1"}] * 4)
+        self.assertEqual(len(client.transporter.session.requests), 1)
+        self.assertEqual(client.single_flight.coalesced, 3)
+        client.query.user(where={"id": "1"})
+        self.assertEqual(len(client.transporter.session.requests), 2)
+
+    def test_errors_are_shared(self):
+        client = self.client(Transporter(session=SlowSession(ConnectionError("down"))))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(client.query.user, where={"id": "1"}) for _ in range(2)]
+        for future in futures:
+            self.assertIsInstance(future.exception(), ConnectionError)
+        self.assertEqual(len(client.transporter.session.requests), 1)
+
+    def test_promise_transporter(self):
+        with PromiseTransporter(session=SlowSession()) as transporter:
+            client = self.client(transporter)
+            promises = [client.query.user(where={"id": "1"}) for _ in range(3)]
+            self.assertEqual([p.get() for p in promises], [{"id": "1"}] * 3)
+        self.assertEqual((len(transporter.session.requests), client.single_flight.coalesced), (1, 2))
+
+    def test_async_transporter(self):
+        client = self.client(AsyncTransporter(session=SlowSession()))
+
+        async def run():
+            return await asyncio.gather(*(client.query.user(where={"id": i}) for i in ("1", "1", "2")))
+
+        self.assertEqual(len(asyncio.run(run())), 3)
+        self.assertEqual((len(client.transporter.session.requests), client.single_flight.coalesced), (2, 1))
+
+
+class AsyncTransporterTest(unittest.TestCase):
+    def test_requests_do_not_block_the_event_loop(self):
+        client = Client("http://localhost:8080", transporter=AsyncTransporter(session=SlowSession()))
+
+        async def run():
+            start = time.monotonic()
+            users = await asyncio.gather(*(client.query.user(where={"id": str(i)}) for i in range(3)))
+            return time.monotonic() - start, users
+
+        elapsed, users = asyncio.run(run())
+        self.assertEqual(users, [{"id": "1"}] * 3)
+        self.assertLess(elapsed, 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import copy
+import time
+import unittest
+
+from graphy import Client
+from tests.fixtures import argument, field, fake_transporter, INTROSPECTION, STRING, USER, wrapped
+
+
+def changed_introspection():
+    introspection = copy.deepcopy(INTROSPECTION)
+    query = introspection["data"]["__schema"]["types"][0]
+    query["fields"].append(field("userByName", USER, [argument("name", wrapped("NON_NULL", STRING))]))
+    return introspection
+
+
+class SchemaRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.transporter = fake_transporter()
+        self.client = Client("http://localhost:8080", transporter=self.transporter)
+
+    def test_unchanged_schema_is_kept(self):
+        types = self.client.schema.types
+        self.assertFalse(self.client.refresh_schema())
+        self.assertIs(self.client.schema.types, types)
+        self.assertEqual(self.client.schema.generation, 0)
+
+    def test_changed_schema_is_swapped(self):
+        query = self.client.query
+        self.assertNotIn("userByName", dict(query))
+        self.transporter.session.introspection = changed_introspection()
+        self.assertTrue(self.client.refresh_schema())
+        self.assertEqual(self.client.schema.generation, 1)
+        self.assertIsNot(self.client.query, query)
+        self.assertIn("userByName", dict(self.client.query))
+
+    def test_background_refresh(self):
+        self.transporter.session.introspection = changed_introspection()
+        refresher = self.client.schema.start_refresher(3600)
+        self.assertIs(self.client.schema.start_refresher(3600), refresher)
+        refresher.trigger()
+        deadline = time.time() + 5
+        while self.client.schema.generation == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        refresher.stop()
+        self.assertIn("userByName", dict(self.client.query))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import gc
+import threading
+import unittest
+
+from graphy import Client, SchemaRegistry, Settings
+from tests.fixtures import fake_transporter
+
+
+class SchemaRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = SchemaRegistry(transporter=fake_transporter())
+
+    def test_clients_share_the_schema(self):
+        first = Client("http://localhost:8080", transporter=fake_transporter(), schema_registry=self.registry)
+        second = Client("http://localhost:8080", transporter=fake_transporter(), schema_registry=self.registry)
+        other = Client(
+            "http://localhost:8080",
+            transporter=fake_transporter(),
+            settings=Settings(max_recursion_depth=3),
+            schema_registry=self.registry
+        )
+        self.assertIs(first.schema, second.schema)
+        self.assertIsNot(first.schema, other.schema)
+        self.assertEqual(self.registry.transporter.session.introspections, 2)
+        self.assertEqual(first.transporter.session.introspections + second.transporter.session.introspections, 0)
+        self.assertIs(first.schema.transport, self.registry.transporter)
+
+    def test_unused_schemas_are_dropped(self):
+        client = Client("http://localhost:8080", transporter=fake_transporter(), schema_registry=self.registry)
+        self.assertEqual(len(self.registry), 1)
+        del client
+        gc.collect()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_concurrent_construction_introspects_once(self):
+        transporters = [fake_transporter() for _ in range(8)]
+        clients = []
+
+        def create(transporter):
+            clients.append(Client("http://localhost:8080", transporter=transporter, schema_registry=self.registry))
+
+        threads = [threading.Thread(target=create, args=(t,)) for t in transporters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(t.session.introspections for t in transporters), 0)
+        self.assertEqual(self.registry.transporter.session.introspections, 1)
+        self.assertEqual(len({id(c.schema) for c in clients}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
+import json
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
-from graphy import Client
+from graphy import Client, SchemaCache, Settings, Transporter
+from graphy.loaders import iter_schema
+from graphy.schema import TypeDeferCache
+from tests.fixtures import FakeSession, fake_transporter, INTROSPECTION
 
 
 class SchemaTest(unittest.TestCase):
@@ -9,5 +15,124 @@ class SchemaTest(unittest.TestCase):
         self.assertIsInstance(client.schema.raw, dict)
 
 
+class LazySchemaTypesTest(unittest.TestCase):
+    def setUp(self):
+        self.client = Client("http://localhost:8080", transporter=fake_transporter())
+
+    def test_only_root_types_are_parsed(self):
+        self.assertEqual(set(self.client.schema.types.parsed), {"Query", "Mutation"})
+        self.assertEqual(len(self.client.schema.types), 6)
+
+    def test_types_are_parsed_on_access(self):
+        user = self.client.schema.types["User"]
+        self.assertEqual([f.name for f in user.fields], ["id", "name", "posts"])
+        self.assertIs(self.client.schema.types["User"], user)
+        self.assertIsNone(self.client.schema.types.get("Unknown"))
+
+    def test_identical_type_defers_are_shared(self):
+        user = self.client.schema.types["User"]
+        post = self.client.schema.types["Post"]
+        self.assertIs(user.fields[0].type, post.fields[0].type)
+        self.assertEqual(user.fields[0].type.base_name, "ID")
+        self.assertEqual(post.fields[2].type.base_name, "User")
+
+    def test_type_defers_are_shared_between_threads(self):
+        defers = TypeDeferCache()
+        raw_defer = {"kind": "NON_NULL", "ofType": {"kind": "LIST", "ofType": {"kind": "OBJECT", "name": "User"}}}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            shared = list(executor.map(lambda _: defers.get(raw_defer), range(64)))
+        self.assertTrue(all(defer is shared[0] for defer in shared))
+        self.assertEqual(len(defers), 3)
+
+
+class StreamingSchemaTest(unittest.TestCase):
+    def test_iter_schema_with_tiny_chunks(self):
+        content = json.dumps(INTROSPECTION, indent=2)
+        events = list(iter_schema(content[i:i + 3] for i in range(0, len(content), 3)))
+        self.assertEqual([value["name"] for key, value in events if key == "type"],
+                         ["Query", "Mutation", "User", "Post", "ID", "String"])
+        self.assertIn(("queryType", {"name": "Query"}), events)
+
+    def test_streamed_schema(self):
+        settings = Settings(stream_introspection=True)
+        client = Client("http://localhost:8080", transporter=fake_transporter(), settings=settings)
+        self.assertIsNone(client.schema.raw_schema)
+        self.assertEqual(client.schema.query_type, "Query")
+        self.assertEqual(len(client.schema.types), 6)
+        self.assertEqual([f.name for f in client.schema.types["Post"].fields], ["id", "title", "author"])
+        self.assertIn("createUser", dict(client.mutation))
+
+    def test_streamed_schema_is_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SchemaCache(directory)
+            settings = Settings(stream_introspection=True)
+            Client("http://localhost:8080", transporter=fake_transporter(), settings=settings, schema_cache=cache)
+            self.assertEqual(cache.load("http://localhost:8080"), INTROSPECTION)
+            transporter = fake_transporter()
+            client = Client("http://localhost:8080", transporter=transporter, settings=settings, schema_cache=cache)
+            self.assertEqual(transporter.session.introspections, 0)
+            self.assertIn("user", dict(client.query))
+
+
+class LazyProfileTest(unittest.TestCase):
+    def test_types_are_requested_on_demand(self):
+        transporter = fake_transporter()
+        settings = Settings(introspection_profile="lazy")
+        client = Client("http://localhost:8080", transporter=transporter, settings=settings)
+        self.assertEqual(transporter.session.type_requests, [["Query", "Mutation"]])
+        self.assertEqual(set(client.schema.types), {"Query", "Mutation"})
+
+        select = client.schema.queries[0].get_return_fields(client.schema.types)
+        self.assertEqual(str(select[0]), "id")
+        self.assertEqual(transporter.session.type_requests[1:], [["User"], ["Post"]])
+        self.assertIsNone(client.schema.types.get("Unknown"))
+        self.assertIsNone(client.schema.types.get("Unknown"))
+        self.assertEqual(transporter.session.type_requests[-1], ["Unknown"])
+
+
+def strip_minimal(value):
+    """ Drop everything the minimal profile does not request from an introspection result. """
+    if isinstance(value, list):
+        return [strip_minimal(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    dropped = ("description", "isDeprecated", "deprecationReason", "interfaces", "possibleTypes", "directives")
+    return {k: strip_minimal(v) for k, v in value.items() if k not in dropped}
+
+
+class MinimalSession(FakeSession):
+    """ A session answering introspections like a server would for the minimal query and recording the query. """
+
+    def __init__(self):
+        super(MinimalSession, self).__init__(introspection=strip_minimal(INTROSPECTION))
+        self.introspection_queries = []
+
+    def request(self, method, url, *args, **kwargs):
+        query = (kwargs.get("json") or {}).get("query") or ""
+        if "__schema" in query:
+            self.introspection_queries.append(query)
+        return super(MinimalSession, self).request(method, url, *args, **kwargs)
+
+
+class MinimalProfileTest(unittest.TestCase):
+    def test_only_fields_for_building_queries_are_requested(self):
+        transporter = Transporter(session=MinimalSession())
+        settings = Settings(introspection_profile="minimal")
+        client = Client("http://localhost:8080", transporter=transporter, settings=settings)
+        query, = transporter.session.introspection_queries
+        for requested in ("queryType", "types", "fields", "args", "inputFields", "enumValues", "ofType"):
+            self.assertIn(requested, query)
+        for left_out in ("description", "isDeprecated", "deprecationReason", "interfaces", "directives"):
+            self.assertNotIn(left_out, query)
+
+        self.assertEqual(client.schema.directives, {})
+        self.assertEqual(set(client.schema.types), {"Query", "Mutation", "User", "Post", "ID", "String"})
+        user = client.schema.types["User"]
+        self.assertIsNone(user.description)
+        self.assertEqual([f.name for f in user.fields], ["id", "name", "posts"])
+        self.assertIsNone(user.fields[0].description)
+        self.assertEqual(str(client.schema.queries[0].get_return_fields(client.schema.types)[0]), "id")
+
+
 if __name__ == '__main__':
     unittest.main()
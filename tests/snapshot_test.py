@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from graphy import Client, Settings
+from tests.fixtures import fake_transporter
+
+
+class SchemaSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "schema.snapshot")
+        self.client = Client("http://localhost:8080", transporter=fake_transporter())
+        self.client.schema.write_snapshot(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snapshot_schema_matches(self):
+        transporter = fake_transporter()
+        client = Client("http://localhost:8080", transporter=transporter, schema_snapshot=self.path)
+        self.assertEqual(transporter.session.introspections, 0)
+        self.assertEqual(sorted(client.schema.types), sorted(self.client.schema.types))
+        self.assertEqual(client.schema.types.parsed, ("Query", "Mutation"))
+        self.assertEqual([f.name for f in client.schema.types["User"].fields], ["id", "name", "posts"])
+        self.assertNotIn("Unknown", client.schema.types)
+
+    def test_precomputed_selections(self):
+        client = Client("http://localhost:8080", transporter=fake_transporter(), schema_snapshot=self.path)
+        expected = self.client.schema.queries[0].get_return_fields(self.client.schema.types)
+        selection = client.schema.queries[0].get_return_fields(client.schema.types)
+        self.assertEqual([str(f) for f in selection], [str(f) for f in expected])
+        self.assertEqual(client.schema.types.parsed, ("Query", "Mutation"))
+
+    def test_selections_are_ignored_for_other_depths(self):
+        settings = Settings(max_recursion_depth=1)
+        client = Client("http://localhost:8080", transporter=fake_transporter(), settings=settings,
+                        schema_snapshot=self.path)
+        selection = client.schema.queries[0].get_return_fields(client.schema.types)
+        self.assertEqual([str(f) for f in selection], ["id", "name"])
+
+
+    def test_unchanged_schema_is_not_swapped_on_refresh(self):
+        client = Client("http://localhost:8080", transporter=fake_transporter(), schema_snapshot=self.path)
+        self.assertEqual(client.schema.hash, self.client.schema.hash)
+        self.assertFalse(client.schema.refresh())
+        self.assertEqual(client.schema.generation, 0)
+
+    def test_snapshots_without_a_hash_get_one(self):
+        self.client.schema.raw_schema = None  # a schema without a hash, like the streamed ones of older versions
+        self.client.schema._hash = None
+        self.client.schema.write_snapshot(self.path)
+        client = Client("http://localhost:8080", transporter=fake_transporter(), schema_snapshot=self.path)
+        self.assertIsNotNone(client.schema.hash)
+        self.assertIsNot(client.schema._refresh_lock, self.client.schema._refresh_lock)
+
+
+if __name__ == '__main__':
+    unittest.main()
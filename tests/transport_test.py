@@ -0,0 +1,315 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from promise import Promise
+
+from graphy import GraphQLError, HTTPCache, PersistedQueries, PromiseTransporter, Settings, Transporter
+from graphy.cache import CachedResponse
+from tests.fixtures import FakeSession, make_response
+
+
+class SlowSession(FakeSession):
+    """ A session that takes a while for every request. """
+
+    def request(self, method, url, *args, **kwargs):
+        time.sleep(0.05)
+        return make_response({"data": {"user": {"thread": threading.current_thread().name}}})
+
+
+class PromiseTransporterTest(unittest.TestCase):
+    def test_requests_run_in_parallel(self):
+        with PromiseTransporter(session=SlowSession(), max_workers=4) as transporter:
+            started = time.monotonic()
+            promises = [transporter.post("http://localhost:8080", "{}", {}, "user", Settings()) for _ in range(8)]
+            self.assertEqual(transporter.queue_depth + transporter.in_flight, 8)
+            users = Promise.all(promises).get()
+            elapsed = time.monotonic() - started
+        self.assertEqual(len({u["thread"] for u in users}), 4)
+        self.assertLess(elapsed, 8 * 0.05 / 2)
+        self.assertEqual(transporter.in_flight, 0)
+
+    def test_shutdown_rejects_pending_requests(self):
+        transporter = PromiseTransporter(session=SlowSession(), max_workers=1)
+        promises = [transporter.post("http://localhost:8080", "{}", {}, "user", Settings()) for _ in range(3)]
+        transporter.shutdown(cancel_pending=True)
+        self.assertTrue(promises[0].is_fulfilled)
+        self.assertTrue(promises[-1].is_rejected)
+        with self.assertRaises(RuntimeError):
+            transporter.post("http://localhost:8080", "{}", {}, "user", Settings())
+
+
+class PersistedQuerySession(FakeSession):
+    """ A session that acts like a server supporting automatic persisted queries. """
+
+    def __init__(self, supported: bool = True):
+        super().__init__()
+        self.supported = supported
+        self.documents = {}
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs["json"]
+        self.requests.append(body)
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+        if persisted is not None and not self.supported:
+            return make_response({"errors": [{"message": "PersistedQueryNotSupported"}]})
+        if persisted is not None and "query" not in body:
+            if persisted["sha256Hash"] not in self.documents:
+                return make_response({"errors": [{"message": "PersistedQueryNotFound"}]})
+        elif persisted is not None:
+            self.documents[persisted["sha256Hash"]] = body["query"]
+        return make_response({"data": {"user": {"id": "1"}}})
+
+
+class PersistedQueriesTest(unittest.TestCase):
+    def post(self, transporter, query="query { user { id } }"):
+        return transporter.post("http://localhost:8080", query, {}, "user", Settings())
+
+    def test_documents_are_registered_once(self):
+        transporter = Transporter(session=PersistedQuerySession(), persisted_queries=True)
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        requests = transporter.session.requests
+        self.assertEqual([("query" in r) for r in requests], [False, True, False])
+        self.assertEqual(len(transporter.session.documents), 1)
+
+    def test_pessimistic_mode_sends_unknown_documents_in_full(self):
+        persisted_queries = PersistedQueries(optimistic=False)
+        transporter = Transporter(session=PersistedQuerySession(), persisted_queries=persisted_queries)
+        self.post(transporter)
+        self.post(transporter)
+        self.assertEqual([("query" in r) for r in transporter.session.requests], [True, False])
+
+    def test_unsupported_endpoints_get_full_documents(self):
+        transporter = Transporter(session=PersistedQuerySession(supported=False), persisted_queries=True)
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        requests = transporter.session.requests
+        self.assertEqual([("extensions" in r) for r in requests], [True, False, False])
+
+    def test_promise_transporter(self):
+        with PromiseTransporter(session=PersistedQuerySession(), persisted_queries=True) as transporter:
+            self.assertEqual(self.post(transporter).get(), {"id": "1"})
+            self.assertEqual(self.post(transporter).get(), {"id": "1"})
+        self.assertEqual([("query" in r) for r in transporter.session.requests], [False, True, False])
+
+    def test_failed_responses_do_not_register(self):
+        persisted_queries = PersistedQueries(optimistic=False)
+        query = "query { user { id } }"
+        payload = persisted_queries.payload("http://localhost:8080", query, {})
+        response = make_response({"errors": [{"message": "Internal Server Error"}]}, status_code=500)
+        self.assertIsNone(persisted_queries.retry_payload("http://localhost:8080", query, {}, payload, response))
+        self.assertIn("query", persisted_queries.payload("http://localhost:8080", query, {}))
+
+
+class CachingSession(FakeSession):
+    """ A session that answers GET requests with validators and honors conditional requests. """
+
+    def __init__(self, cache_control: str, vary: str = None):
+        super().__init__()
+        self.cache_control = cache_control
+        self.vary = vary
+        self.etag = '"v1"'
+        self.before_not_modified = None  # called before answering with 304
+
+    def request(self, method, url, *args, **kwargs):
+        headers = kwargs.get("headers") or {}
+        self.requests.append({"method": method, "url": url, "headers": headers})
+        cache_headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.vary:
+            cache_headers["Vary"] = self.vary
+        if headers.get("If-None-Match") == self.etag:
+            if self.before_not_modified is not None:
+                self.before_not_modified()
+            response = make_response({}, status_code=304, headers=cache_headers)
+            response._content = b""
+            return response
+        return make_response({"data": {"user": {"id": "1"}}}, headers=cache_headers)
+
+
+class GetQueriesTest(unittest.TestCase):
+    def post(self, transporter, operation_type="query"):
+        query = "query { user { id } }"
+        return transporter.post("http://localhost:8080", query, {}, "user", Settings(), operation_type)
+
+    def test_queries_are_revalidated(self):
+        transporter = Transporter(session=CachingSession("no-cache"), get_queries=True)
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        first, second = transporter.session.requests
+        self.assertEqual(first["method"], "GET")
+        self.assertIn("query=query+%7B+user+%7B+id+%7D+%7D", first["url"])
+        self.assertEqual(second["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(transporter.http_cache.revalidated, 1)
+
+    def test_fresh_responses_are_reused(self):
+        transporter = Transporter(session=CachingSession("max-age=60"), get_queries=True)
+        self.post(transporter)
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        self.assertEqual(len(transporter.session.requests), 1)
+        self.assertEqual(transporter.http_cache.get(transporter.session.requests[0]["url"]).etag, '"v1"')
+
+    def test_malformed_age_headers_are_ignored(self):
+        for age in ("1.5", "garbage", ""):
+            self.assertTrue(CachedResponse(200, {"Cache-Control": "max-age=60", "Age": age}, b"").is_fresh)
+        self.assertFalse(CachedResponse(200, {"Cache-Control": "max-age=60", "Age": "60"}, b"").is_fresh)
+
+    def test_shared_caches_keep_credentials_apart(self):
+        cache = HTTPCache()
+        transporters = [Transporter(session=CachingSession("max-age=60"), get_queries=True, http_cache=cache)
+                        for _ in range(3)]
+        transporters[0].session.headers["Authorization"] = "Bearer first"
+        transporters[1].session.headers["Authorization"] = "Bearer second"
+        transporters[2].session.headers["Authorization"] = "Bearer first"
+        for transporter in transporters:
+            self.post(transporter)
+        self.assertEqual([len(t.session.requests) for t in transporters], [1, 1, 0])
+
+    def test_session_auth_is_part_of_the_key(self):
+        cache = HTTPCache()
+        transporters = [Transporter(session=CachingSession("max-age=60"), get_queries=True, http_cache=cache)
+                        for _ in range(3)]
+        transporters[0].session.auth = ("jane", "first")
+        transporters[1].session.auth = ("jane", "second")
+        transporters[2].session.auth = ("jane", "first")
+        for transporter in transporters:
+            self.post(transporter)
+        self.assertEqual([len(t.session.requests) for t in transporters], [1, 1, 0])
+        self.assertNotIn("Authorization", transporters[0].session.headers)
+
+    def test_sessions_with_unknown_auth_are_not_cached(self):
+        transporter = Transporter(session=CachingSession("max-age=60"), get_queries=True)
+        transporter.session.auth = lambda request: request
+        self.post(transporter)
+        self.post(transporter)
+        self.assertEqual(len(transporter.session.requests), 2)
+        self.assertEqual(len(transporter.http_cache), 0)
+
+    def test_vary_headers_are_part_of_the_key(self):
+        transporter = Transporter(session=CachingSession("max-age=60", vary="Accept-Language"), get_queries=True)
+        self.post(transporter)
+        transporter.session.headers["Accept-Language"] = "de"
+        self.post(transporter)
+        self.post(transporter)
+        self.assertEqual(len(transporter.session.requests), 2)
+
+    def test_dropped_entries_are_requested_again(self):
+        transporter = Transporter(session=CachingSession("no-cache"), get_queries=True)
+        self.post(transporter)
+        transporter.session.before_not_modified = transporter.http_cache.clear
+        self.assertEqual(self.post(transporter), {"id": "1"})
+        validators = [r["headers"].get("If-None-Match") for r in transporter.session.requests]
+        self.assertEqual(validators, [None, '"v1"', None])
+
+    def test_no_store_responses_drop_the_stored_one(self):
+        transporter = Transporter(session=CachingSession("no-cache"), get_queries=True)
+        self.post(transporter)
+        transporter.session.etag, transporter.session.cache_control = '"v2"', "no-store"
+        self.post(transporter)
+        self.assertEqual(len(transporter.http_cache), 0)
+        self.post(transporter)
+        validators = [r["headers"].get("If-None-Match") for r in transporter.session.requests]
+        self.assertEqual(validators, [None, '"v1"', None])
+
+    def test_mutations_are_posted(self):
+        transporter = Transporter(session=CachingSession("max-age=60"), get_queries=True)
+        self.post(transporter, "mutation")
+        self.assertEqual(transporter.session.requests[0]["method"], "POST")
+
+
+class ArraySession(FakeSession):
+    """ A session that answers json arrays of user queries and fails the ones for a missing user. """
+
+    missing = {"data": {"user": None}, "errors": [{"message": "Not found", "path": ["user"]}]}
+
+    def request(self, method, url, *args, **kwargs):
+        body = kwargs.get("json")
+        if not isinstance(body, list):
+            return super(ArraySession, self).request(method, url, *args, **kwargs)
+        self.requests.append({"method": method, "url": url, **kwargs})
+        return make_response([
+            self.missing if b["variables"]["id"] == "missing" else {"data": {"user": {"id": b["variables"]["id"]}}}
+            for b in body
+        ])
+
+
+class ArrayBatchingTest(unittest.TestCase):
+    def setUp(self):
+        self.transporter = Transporter(session=ArraySession(), array_batching=True, batch_window=0.05)
+
+    def post(self, user_id: str, operation_type: str = "query"):
+        return self.transporter.post("http://localhost:8080", "{}", {"id": user_id}, "user", Settings(), operation_type)
+
+    def test_concurrent_queries_are_posted_together(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.post, user_id) for user_id in ("1", "2", "missing", "3")]
+        self.assertEqual([f.result() and f.result()["id"] for f in futures], ["1", "2", None, "3"])
+        self.assertEqual(len(self.transporter.session.requests), 1)
+        self.assertEqual(len(self.transporter.session.requests[0]["json"]), 4)
+
+    def test_errors_without_data_match_unbatched_posts(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batched = [executor.submit(self.post, user_id) for user_id in ("1", "missing")]
+        self.transporter.session.responses.append(ArraySession.missing)
+        unbatched = self.post("missing", "mutation")
+        self.assertIsNone(unbatched)
+        self.assertEqual(batched[1].result(), unbatched)
+
+    def test_mutations_are_not_batched(self):
+        self.transporter.session.responses.append({"data": {"user": {"id": "1"}}})
+        self.assertEqual(self.post("1", "mutation"), {"id": "1"})
+        self.assertIsInstance(self.transporter.session.requests[0]["json"], dict)
+
+    def test_unsupported_batches_fail(self):
+        session = FakeSession([{"errors": [{"message": "Batching is not supported"}]}])
+        transporter = Transporter(session=session, array_batching=True, batch_window=0)
+        with self.assertRaises(GraphQLError):
+            transporter.post("http://localhost:8080", "{}", {}, "user", Settings(), "query")
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        content = json.dumps({"data": {"user": {"id": "1"}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TransporterPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        transporter = Transporter(pool_maxsize=4)
+        for _ in range(5):
+            transporter.post(self.endpoint, "{}", {}, "user", Settings())
+        self.assertEqual(transporter.pool_metrics.requests, 5)
+        self.assertEqual(transporter.pool_metrics.new_connections, 1)
+        self.assertEqual(transporter.pool_metrics.reuse_rate, 0.8)
+
+    def test_idle_connections_expire(self):
+        transporter = Transporter(idle_timeout=0)
+        for _ in range(3):
+            transporter.post(self.endpoint, "{}", {}, "user", Settings())
+        self.assertEqual(transporter.pool_metrics.new_connections, 3)
+        self.assertEqual(transporter.pool_metrics.expired_connections, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()